@@ -0,0 +1,207 @@
+"""데이터가 늘어날 때 나만의 기록 앱(test.py)의 주요 경로가 얼마나 느려지는지 측정하는 벤치마크입니다.
+
+사용법:
+    python bench.py [--scales 10x100,50x1000] [--rooms 20] [--repeat 20] [--backend json|sqlite]
+                    [--output bench_results.json] [--compare 이전_결과.json]
+
+--scales의 "NxM"은 사용자 N명, 사용자마다 기록 M개입니다. 규모마다 임시 폴더에 가짜 데이터를 만들고
+새 프로세스에서 (공유 캐시 등 프로세스 전역 상태가 섞이지 않도록) 다음 작업을 --repeat번씩 실행합니다.
+    load_user_records (캐시 없이 / 캐시 적중), save_user_records, add_user_record, authenticate_user,
+    create_sharing_room, get_sharing_room, 그리고 Streamlit AppTest로 '📖 내 기록 보기' 페이지 전체 렌더링
+결과(p50/p95/p99, ms)는 --output JSON 파일로 저장하며, --compare로 이전 결과와 p95를 비교할 수 있습니다.
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.py')
+BENCH_PASSWORD = 'bench-password'
+_TITLES = ['기생충', '올드보이', '데미안', '어린 왕자', '인터스텔라', '채식주의자', '헤어질 결심', '소년이 온다']
+
+
+def percentiles(samples):
+    """샘플(초) 목록의 p50/p95/p99(ms)를 반환합니다. (nearest-rank 방식)"""
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))] * 1000
+
+    return {"n": len(ordered), "p50_ms": rank(50), "p95_ms": rank(95), "p99_ms": rank(99)}
+
+
+def make_record(i, now):
+    record_type = random.choice(['영화', '책'])
+    return {
+        "id": str(uuid.uuid4()),
+        "type": record_type,
+        "title": f"{random.choice(_TITLES)} {i}",
+        "director_author": f"작가 {i % 50}",
+        "release_pub_date": f"{random.randint(1980, 2024)}-01-01",
+        "genre": random.choice(['드라마', '스릴러', 'SF', '소설', '에세이']),
+        "summary": "벤치마크용 줄거리입니다. " * 5,
+        "image_url": None,
+        "rating": random.randint(1, 5),
+        "review": "벤치마크용 감상입니다. " * 10,
+        "recorded_date": (now - timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def _load_app():
+    """test.py를 모듈로 불러옵니다. (표준 라이브러리 test 패키지와 이름이 겹치지 않도록 다른 이름 사용)"""
+    spec = importlib.util.spec_from_file_location('record_app', APP_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _timed(samples, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    samples.append(time.perf_counter() - started)
+    return result
+
+
+def _run_scale(args):
+    """새 프로세스에서 한 규모의 데이터를 만들고 측정합니다."""
+    backend, data_dir, users, records_per_user, rooms, repeat = args
+    os.chdir(data_dir)
+    os.environ['RECORD_APP_STORAGE'] = backend
+    os.makedirs('.streamlit', exist_ok=True)
+    open(os.path.join('.streamlit', 'secrets.toml'), 'w').close() # test.py가 st.secrets를 읽음
+
+    app = _load_app()
+    from data_cache import get_cache
+    from passwords import get_password_hasher, hash_password
+    from storage import get_storage
+
+    storage = get_storage()
+    now = datetime.now()
+    password_hash = hash_password(BENCH_PASSWORD) # 사용자마다 해시하면 데이터 만드는 데만 오래 걸림
+    usernames = [f'user_{i}' for i in range(users)]
+    started = time.perf_counter()
+    for username in usernames:
+        storage.add_user(username, {'password': password_hash})
+        storage.save_user_records(username, [make_record(i, now) for i in range(records_per_user)])
+    room_ids = []
+    for i in range(rooms):
+        username = usernames[i % users]
+        shared = [r['id'] for r in random.sample(storage.load_user_records(username), min(10, records_per_user))]
+        room_ids.append(app.create_sharing_room(username, f'room {i}', '', shared))
+    setup_seconds = time.perf_counter() - started
+
+    samples = {name: [] for name in (
+        'load_user_records_cold', 'load_user_records_warm', 'save_user_records', 'add_user_record',
+        'authenticate_user', 'create_sharing_room', 'get_sharing_room', 'render_my_records_page',
+    )}
+    target = usernames[0]
+    for i in range(repeat):
+        get_cache().clear()
+        records = _timed(samples['load_user_records_cold'], app.load_user_records, target)
+        _timed(samples['load_user_records_warm'], app.load_user_records, target)
+        _timed(samples['save_user_records'], app.save_user_records, target, list(records))
+        _timed(samples['add_user_record'], app.add_user_record, usernames[-1], make_record(i, now))
+        get_password_hasher().clear_cache() # 매번 해시를 계산하는 처음 로그인 기준
+        _timed(samples['authenticate_user'], app.authenticate_user, target, BENCH_PASSWORD)
+        shared = [r['id'] for r in records[:10]]
+        _timed(samples['create_sharing_room'], app.create_sharing_room, target, f'bench room {i}', '', shared)
+        _timed(samples['get_sharing_room'], app.get_sharing_room, random.choice(room_ids) if room_ids else '')
+
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_FILE, default_timeout=60)
+    at.session_state['logged_in'] = True
+    at.session_state['username'] = target
+    at.session_state['current_page'] = "📖 내 기록 보기"
+    at.run() # 첫 실행은 모듈 import 등이 포함되므로 측정하지 않음
+    for _ in range(repeat):
+        _timed(samples['render_my_records_page'], at.run)
+    if at.exception:
+        raise RuntimeError(f"페이지 렌더링 중 오류: {at.exception[0].message}")
+
+    return {
+        "users": users,
+        "records_per_user": records_per_user,
+        "rooms": rooms,
+        "setup_seconds": setup_seconds,
+        "ops": {name: percentiles(values) for name, values in samples.items()},
+    }
+
+
+def run(scales, rooms, repeat, backend):
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    for users, records_per_user in scales:
+        with tempfile.TemporaryDirectory(prefix='record-bench-') as data_dir, ctx.Pool(1) as pool:
+            results.append(pool.apply(_run_scale, ((backend, data_dir, users, records_per_user, rooms, repeat),)))
+    return results
+
+
+def parse_scales(text):
+    scales = []
+    for part in text.split(','):
+        users, records = part.lower().split('x')
+        scales.append((int(users), int(records)))
+    return scales
+
+
+def compare(previous, current):
+    """같은 규모/작업끼리 p95를 비교한 줄 목록을 반환합니다."""
+    lines = []
+    old_scales = {(s['users'], s['records_per_user']): s for s in previous['scales']}
+    for scale in current['scales']:
+        old = old_scales.get((scale['users'], scale['records_per_user']))
+        if old is None:
+            continue
+        for name, stats in scale['ops'].items():
+            if name in old['ops'] and old['ops'][name]['p95_ms'] > 0:
+                change = (stats['p95_ms'] / old['ops'][name]['p95_ms'] - 1) * 100
+                mark = ' ⚠️' if change > 20 else ''
+                lines.append(f"  {scale['users']}x{scale['records_per_user']} {name:<26} "
+                             f"{old['ops'][name]['p95_ms']:>9.2f} -> {stats['p95_ms']:>9.2f}ms ({change:+.0f}%){mark}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="나만의 기록 앱 주요 경로 벤치마크")
+    parser.add_argument('--scales', default='10x100,50x1000', help="쉼표로 구분한 '사용자수x사용자당 기록수' 목록")
+    parser.add_argument('--rooms', type=int, default=20, help="미리 만들어 둘 공유방 수")
+    parser.add_argument('--repeat', type=int, default=20, help="작업마다 측정할 횟수")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--output', default='bench_results.json', help="결과를 저장할 JSON 파일")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args()
+
+    report = {
+        "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "backend": args.backend,
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "scales": run(parse_scales(args.scales), args.rooms, args.repeat, args.backend),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    for scale in report['scales']:
+        print(f"[{args.backend}] 사용자 {scale['users']}명 x 기록 {scale['records_per_user']}개, "
+              f"공유방 {scale['rooms']}개 (데이터 생성 {scale['setup_seconds']:.1f}초)")
+        for name, stats in scale['ops'].items():
+            print(f"  {name:<26} p50 {stats['p50_ms']:>9.2f}ms  p95 {stats['p95_ms']:>9.2f}ms  p99 {stats['p99_ms']:>9.2f}ms")
+    print(f"결과를 {args.output}에 저장했습니다.")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f"p95 비교 ({args.compare} -> 이번 실행, 20% 넘게 느려지면 ⚠️)")
+        for line in compare(previous, report):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""비밀번호 해시 비용 설정별로 초당 로그인 처리 수를 측정하는 벤치마크입니다.
+
+사용법:
+    python bench_passwords.py [--logins 40] [--concurrency 8] [--workers 2]
+
+설정마다 해시 하나를 만든 뒤, --concurrency개의 스레드(동시에 로그인하는 세션)가 passwords.PasswordHasher의
+작업자 풀(--workers개)을 거쳐 모두 --logins번 확인합니다. 확인 결과 캐시를 쓰지 않는 경우(처음 로그인)와
+쓰는 경우(같은 사용자의 재로그인)를 나눠 보고합니다.
+비용을 정할 때는 해시 한 번이 수십~수백 ms 걸리면서, 예상되는 로그인 집중 시간에 필요한 처리량을 넘는 값을 고르세요.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passwords import KDF_WORKERS, PasswordHasher, hash_password_sync
+
+COST_SETTINGS = [
+    ('scrypt', (2 ** 12, 8, 1)),
+    ('scrypt', (2 ** 13, 8, 1)),
+    ('scrypt', (2 ** 14, 8, 1)),
+    ('scrypt', (2 ** 15, 8, 1)),
+    ('pbkdf2_sha256', (100000,)),
+    ('pbkdf2_sha256', (310000,)),
+    ('pbkdf2_sha256', (600000,)),
+]
+PASSWORD = 'correct horse'
+
+
+def _logins_per_second(hasher, stored, logins, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: hasher.verify_password(PASSWORD, stored)[0], range(logins)))
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    return logins / elapsed
+
+
+def run(logins, concurrency, workers):
+    """설정별 결과를 딕셔너리 목록으로 반환합니다."""
+    results = []
+    for scheme, params in COST_SETTINGS:
+        started = time.perf_counter()
+        stored = hash_password_sync(PASSWORD, scheme, params)
+        hash_ms = (time.perf_counter() - started) * 1000
+
+        # 처음 로그인: 캐시 없이 매번 해시를 계산
+        cold = PasswordHasher(scheme, params, workers=workers, max_pending=concurrency, cache_size=0)
+        cold_rate = _logins_per_second(cold, stored, logins, concurrency)
+
+        # 같은 사용자의 재로그인: 첫 확인 뒤에는 캐시에서 바로 확인
+        warm = PasswordHasher(scheme, params, workers=workers, max_pending=concurrency)
+        warm.verify_password(PASSWORD, stored)
+        warm_rate = _logins_per_second(warm, stored, logins * 100, concurrency)
+
+        results.append({
+            "scheme": scheme,
+            "params": params,
+            "hash_ms": hash_ms,
+            "logins_per_second": cold_rate,
+            "cached_logins_per_second": warm_rate,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="비밀번호 해시 비용별 로그인 처리량 벤치마크")
+    parser.add_argument('--logins', type=int, default=40, help="설정마다 확인할 로그인 수")
+    parser.add_argument('--concurrency', type=int, default=8, help="동시에 로그인하는 세션 수")
+    parser.add_argument('--workers', type=int, default=KDF_WORKERS, help="해시 작업자 풀 크기")
+    args = parser.parse_args()
+
+    print(f"로그인 {args.logins}회, 동시 세션 {args.concurrency}개, 작업자 {args.workers}개")
+    print(f"{'알고리즘':<16}{'비용':<18}{'해시 1회':>10}{'로그인/초':>12}{'캐시 적중 시':>14}")
+    for result in run(args.logins, args.concurrency, args.workers):
+        params = '/'.join(str(x) for x in result['params'])
+        print(f"{result['scheme']:<16}{params:<18}{result['hash_ms']:>8.1f}ms"
+              f"{result['logins_per_second']:>12.1f}{result['cached_logins_per_second']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""기록 저장 형식별 파일 크기와 읽기/쓰기 시간을 비교하는 벤치마크입니다.
+
+사용법:
+    python bench_record_format.py [--sizes 100,1000,10000] [--repeat 5]
+
+bench.py와 같은 가짜 기록을 만들어 다음 형식으로 임시 폴더에 저장한 뒤 다시 읽는 시간을 잽니다. (--repeat번 중 최솟값)
+    json-indent: 예전 방식(json.dump(..., indent=4))의 JSON 리스트 파일
+    jsonl-log: 지금의 JSON Lines 로그 (RECORD_APP_RECORD_FORMAT=json)
+    columnar / msgpack: record_codec의 형식으로 쓴 스냅샷 + 스냅샷을 가리키는 로그 (msgpack은 설치된 경우만)
+감상(review)은 실제 데이터처럼 기록마다 다르게 만들고, 종류/장르/작가처럼 반복되는 값은 bench.py 그대로 둡니다.
+읽기 시간은 RecordLog.load() 전체(로그 줄 확인 + 스냅샷 mmap 읽기) 기준입니다.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from bench import make_record
+from record_codec import SERIALIZERS
+from record_log import RecordLog
+
+
+def _best_ms(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def _bench_legacy(directory, records, repeat):
+    path = os.path.join(directory, 'legacy_records.json')
+
+    def write():
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=4, ensure_ascii=False)
+
+    def read():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    write_ms = _best_ms(write, repeat)
+    return {'format': 'json-indent', 'bytes': os.path.getsize(path), 'write_ms': write_ms, 'load_ms': _best_ms(read, repeat)}
+
+
+def _bench_log(directory, records, repeat, record_format):
+    subdir = os.path.join(directory, record_format)
+    os.makedirs(subdir)
+    log = RecordLog(os.path.join(subdir, 'user_records.jsonl'), record_format)
+    write_ms = _best_ms(lambda: log.rewrite(records), repeat)
+    assert log.load() == records
+    return {
+        'format': 'jsonl-log' if record_format == 'json' else record_format,
+        'bytes': os.path.getsize(log.path) + log.snapshot_size,
+        'write_ms': write_ms,
+        'load_ms': _best_ms(log.load, repeat),
+    }
+
+
+def run(sizes, repeat):
+    """기록 수마다 형식별 결과 목록을 {기록 수: [결과, ...]}로 반환합니다."""
+    now = datetime.now()
+    results = {}
+    for size in sizes:
+        records = [make_record(i, now) for i in range(size)]
+        for i, record in enumerate(records):
+            record['review'] = f"{i}번째 {record['review']}"
+        with tempfile.TemporaryDirectory(prefix='record-format-') as directory:
+            rows = [_bench_legacy(directory, records, repeat)]
+            rows += [_bench_log(directory, records, repeat, name) for name in SERIALIZERS]
+        results[size] = rows
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록 저장 형식별 크기/읽기 시간 벤치마크")
+    parser.add_argument('--sizes', default='100,1000,10000', help="쉼표로 구분한 사용자당 기록 수 목록")
+    parser.add_argument('--repeat', type=int, default=5, help="형식마다 측정할 횟수 (최솟값을 보고)")
+    args = parser.parse_args()
+
+    for size, rows in run([int(size) for size in args.sizes.split(',')], args.repeat).items():
+        baseline = rows[0]
+        print(f"기록 {size}개")
+        print(f"  {'형식':<12}{'크기':>12}{'쓰기':>12}{'읽기':>12}{'크기 비율':>10}{'읽기 비율':>10}")
+        for row in rows:
+            print(f"  {row['format']:<12}{row['bytes'] / 1024:>10.1f}KB{row['write_ms']:>10.2f}ms{row['load_ms']:>10.2f}ms"
+                  f"{row['bytes'] / baseline['bytes']:>10.2f}{row['load_ms'] / baseline['load_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""저장소에서 읽은 데이터를 프로세스 전체에서 공유하는 메모리 캐시입니다.
+
+Streamlit은 세션마다 스크립트를 다시 실행하지만 import 된 모듈은 프로세스에 한 번만 올라가므로,
+이 모듈의 캐시는 모든 세션이 함께 사용합니다.
+
+- 항목은 이름(파일 경로 등)별로 하나씩 저장하고, 버전(파일의 inode/mtime/크기 또는 DB 버전 번호)이
+  같을 때만 캐시를 사용합니다. 파일이 바뀌면 자동으로 다시 읽게 됩니다.
+- 전체 크기(바이트)가 한도를 넘으면 가장 오래 사용하지 않은 항목부터 버립니다. (LRU)
+- 캐시된 값은 여러 세션이 함께 보므로 읽기 전용으로 다뤄야 합니다. 수정이 필요하면 복사해서 쓰세요.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+CACHE_MAX_BYTES = int(os.environ.get('RECORD_APP_CACHE_MB', '64')) * 1024 * 1024
+
+
+def file_identity(path):
+    """파일 버전을 나타내는 값을 반환합니다. 파일이 없으면 None입니다."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class DataCache:
+    """크기(바이트) 한도가 있는 LRU 캐시입니다."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # name -> (version, value, cost)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name, version, default=None):
+        """버전이 일치하는 캐시 값을 반환합니다. 없으면 default를 반환합니다."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return default
+
+    def put(self, name, version, value, cost):
+        """값을 저장합니다. cost는 값이 차지하는 대략적인 바이트 수입니다."""
+        with self._lock:
+            self._put(name, version, value, cost)
+
+    def update(self, name, old_version, new_version, update_fn, added_cost):
+        """old_version의 값이 캐시에 있으면 update_fn(값)의 결과를 new_version으로 저장합니다.
+
+        저장할 때 캐시를 함께 갱신(write-through)하기 위해 사용합니다. 캐시에 없던 값이면 아무것도 하지 않습니다.
+        added_cost는 기존 값에 비해 늘어난 바이트 수입니다.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != old_version:
+                self._discard(name)
+                return
+            self._put(name, new_version, update_fn(entry[1]), entry[2] + added_cost)
+
+    def _put(self, name, version, value, cost):
+        self._discard(name)
+        if cost > self.max_bytes:
+            return # 한도보다 큰 값은 캐시하지 않습니다.
+        self._entries[name] = (version, value, cost)
+        self._bytes += cost
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def invalidate(self, name):
+        with self._lock:
+            self._discard(name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _discard(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def stats(self):
+        """캐시 적중/실패 횟수와 사용량을 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_cache = DataCache()
+
+
+def get_cache():
+    """프로세스 전체에서 공유하는 데이터 캐시를 반환합니다."""
+    return _cache
@@ -0,0 +1,107 @@
+"""JSON 백엔드의 파일 배치(데이터 폴더와 사용자별 파일 경로)를 정합니다.
+
+모든 데이터 파일은 RECORD_APP_DATA_DIR(기본값: 현재 디렉터리) 아래에 둡니다.
+사용자별 파일은 한 폴더에 수십만 개가 쌓이지 않도록 사용자 이름 해시로 두 단계 하위 폴더에 나눠 담습니다.
+
+    <데이터 폴더>/users.json, sharing_rooms.json, room_snapshots/ ...
+    <데이터 폴더>/user_data/<해시 앞 2자리>/<해시 다음 2자리>/<인코딩한 사용자 이름>_records.jsonl
+
+사용자 이름은 퍼센트 인코딩(. 과 / 포함)해서 파일 이름에 쓰므로 "../x" 같은 이름도 데이터 폴더 밖을 가리키지 않습니다.
+예전처럼 데이터 폴더에 바로 있던 {username}_records.json(l) 파일은 migrate_layout.py로 한 번에 옮기거나,
+그 사용자의 기록을 처음 읽을 때 저장소가 옮깁니다.
+"""
+import filecmp
+import hashlib
+import os
+import shutil
+from urllib.parse import quote, unquote
+
+DATA_DIR = os.environ.get('RECORD_APP_DATA_DIR', '.')
+USER_DATA_SUBDIR = 'user_data'
+RECORDS_FILE_SUFFIX = '_records.json' # 예전 형식 (JSON 리스트 하나)
+RECORD_LOG_SUFFIX = '_records.jsonl'
+MAX_ENCODED_NAME_LENGTH = 200 # 파일 이름 길이 제한(보통 255바이트)에 여유를 둠
+
+
+def data_path(*parts, root=None):
+    """데이터 폴더 안의 경로를 만듭니다."""
+    return os.path.join(DATA_DIR if root is None else root, *parts)
+
+
+def encode_username(username):
+    """사용자 이름을 파일 이름에 쓸 수 있는 문자열로 바꿉니다. (같은 이름은 항상 같은 결과)"""
+    encoded = quote(username, safe='').replace('.', '%2E')
+    if len(encoded) > MAX_ENCODED_NAME_LENGTH: # 아주 긴 이름은 앞부분 + 전체 해시로 구분
+        encoded = f"{encoded[:MAX_ENCODED_NAME_LENGTH - 41]}~{hashlib.sha1(username.encode('utf-8')).hexdigest()}"
+    return encoded
+
+
+def decode_username(encoded):
+    """encode_username()의 결과를 원래 이름으로 되돌립니다. (잘린 긴 이름은 되돌릴 수 없음)"""
+    return unquote(encoded)
+
+
+def user_shard_dir(username, root=None):
+    """사용자 파일이 들어갈 하위 폴더 경로입니다."""
+    digest = hashlib.sha1(username.encode('utf-8')).hexdigest()
+    return data_path(USER_DATA_SUBDIR, digest[:2], digest[2:4], root=root)
+
+
+def user_file(username, suffix, root=None):
+    """사용자별 파일 경로입니다. (예: suffix='_records.jsonl')"""
+    return os.path.join(user_shard_dir(username, root), encode_username(username) + suffix)
+
+
+def legacy_user_file(username, suffix, root=None):
+    """예전 배치(데이터 폴더에 바로 저장)의 사용자별 파일 경로입니다. 경로로 쓸 수 없는 이름이면 None입니다."""
+    if not username or os.path.basename(username) != username or username in ('.', '..'):
+        return None
+    return data_path(username + suffix, root=root)
+
+
+def iter_legacy_user_files(root=None):
+    """데이터 폴더에 바로 있는 예전 사용자 기록 파일을 (사용자 이름, 경로)로 돌려줍니다."""
+    with os.scandir(DATA_DIR if root is None else root) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            for suffix in (RECORD_LOG_SUFFIX, RECORDS_FILE_SUFFIX):
+                if entry.name.endswith(suffix) and len(entry.name) > len(suffix):
+                    yield entry.name[:-len(suffix)], entry.path
+                    break
+
+
+def iter_user_files(suffix, root=None):
+    """나눠 담은 폴더에 있는 사용자 파일을 (사용자 이름, 경로)로 돌려줍니다."""
+    base = data_path(USER_DATA_SUBDIR, root=root)
+    if not os.path.isdir(base):
+        return
+    for first in sorted(os.listdir(base)):
+        for second in sorted(os.listdir(os.path.join(base, first))):
+            with os.scandir(os.path.join(base, first, second)) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(suffix):
+                        yield decode_username(entry.name[:-len(suffix)]), entry.path
+
+
+def move_file(src, dst):
+    """src를 dst로 옮깁니다. 다른 파일 시스템이면 복사 후 바꿔치기하고 원본을 지웁니다.
+
+    도중에 중단되어 dst와 src가 모두 남아 있어도, 내용이 같으면 다시 실행했을 때 src만 지우고 끝납니다.
+    dst에 다른 내용이 이미 있으면 FileExistsError가 발생합니다.
+    """
+    if os.path.exists(dst):
+        if filecmp.cmp(src, dst, shallow=False):
+            os.remove(src)
+            return
+        raise FileExistsError(f"{dst}에 이미 다른 파일이 있습니다.")
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    try:
+        os.link(src, dst) # 같은 파일 시스템: 덮어쓰지 않고 새 이름을 붙인 뒤 옛 이름을 지움
+    except OSError:
+        tmp_path = f"{dst}.{os.getpid()}.tmp"
+        shutil.copy2(src, tmp_path)
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, dst)
+    os.remove(src)
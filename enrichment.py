@@ -0,0 +1,325 @@
+"""직접 입력해서 포스터/표지, 감독/저자, 개봉일/출판일이 비어 있는 기록을 TMDB / Google Books 정보로 채웁니다.
+
+사용법:
+    python enrichment.py [--user 이름 ...] [--loop 초] [--concurrency 4] [--rate 5]
+
+- 사용자별로 빈 칸이 있는 기록을 ENRICH_BATCH_SIZE개씩 모아, 같은 (종류, 제목)은 한 번만 찾아봅니다.
+- 조회는 --concurrency개까지 동시에 하고, API마다 초당 --rate회를 넘지 않도록 토큰 버킷으로 제한합니다. (캐시 적중은 제외)
+- 검색 결과는 앱의 검색 캐시(search_cache.py, 앱과 같은 키)를 거치므로 앱에서 이미 찾아본 작품은 다시 요청하지 않습니다.
+  감독 정보는 TMDB credits API로 따로 찾아봅니다.
+- 제목이 정확히 (공백/대소문자 무시) 일치하는 결과만 쓰고, 비어 있는 칸만 채웁니다. 사용자가 입력한 값은 바꾸지 않습니다.
+- 채운 기록은 배치마다 저장소의 update_user_records()로 한 번에 쓰고, 검색 색인과 공유방 스냅샷도 함께 고칩니다.
+- 기록마다 시도 결과를 RECORD_APP_ENRICH_DB(기본값: 데이터 폴더의 enrichment.db)에 남기므로 중간에 멈춰도
+  다시 실행하면 남은 기록부터 이어서 합니다. 일치하는 결과가 없던 기록은 ENRICH_RETRY_DAYS일 뒤에 다시 시도하고,
+  네트워크 오류가 난 기록은 다음 실행 때 다시 시도합니다.
+- RECORD_APP_ENRICH_INTERVAL(초)을 지정하면 test.py가 같은 작업을 백그라운드 스레드에서 주기적으로 실행합니다.
+
+로컬 테스트 서버(stub_search_server.py)로 확인할 때는 TMDB_API_BASE, GOOGLE_BOOKS_API_BASE를 바꿔서 실행합니다.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import streamlit as st
+
+import record_changes
+from data_layout import data_path
+from http_client import get_http_client
+from popularity import work_key
+from search_cache import BOOK_RESULT_FIELDS, get_search_cache, normalize_key, slim_movie_results
+from storage import get_storage
+
+TMDB_API_BASE = os.environ.get("TMDB_API_BASE", "https://api.themoviedb.org/3")
+GOOGLE_BOOKS_API_BASE = os.environ.get("GOOGLE_BOOKS_API_BASE", "https://www.googleapis.com/books/v1")
+GOOGLE_BOOKS_KEY_PLACEHOLDER = "YOUR_GOOGLE_BOOKS_API_KEY_HERE_IF_NOT_SET" # test.py에서 키가 없을 때 쓰는 기본값
+TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w200" # 검색 결과로 기록할 때와 같은 크기
+
+ENRICH_DB_FILE = os.environ.get('RECORD_APP_ENRICH_DB', data_path('enrichment.db'))
+ENRICH_INTERVAL_SECONDS = float(os.environ.get('RECORD_APP_ENRICH_INTERVAL', '0')) # 0이면 앱에서 실행하지 않음
+ENRICH_CONCURRENCY = int(os.environ.get('RECORD_APP_ENRICH_CONCURRENCY', '4'))
+ENRICH_RATE_PER_SECOND = float(os.environ.get('RECORD_APP_ENRICH_RATE', '5')) # API별 초당 최대 요청 수
+ENRICH_BATCH_SIZE = 100
+ENRICH_RETRY_DAYS = 7
+ENRICH_FIELDS = ('image_url', 'director_author', 'release_pub_date')
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    record_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL, -- 'enriched', 'no_match', 'error'
+    attempted_at REAL NOT NULL
+);
+"""
+
+
+class RateLimiter:
+    """토큰 버킷 방식으로 초당 요청 수를 제한합니다. 여러 스레드에서 같이 씁니다."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 기다립니다."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def missing_fields(record):
+    """채울 수 있는데 비어 있는 필드 목록입니다."""
+    return [field for field in ENRICH_FIELDS if not record.get(field)]
+
+
+def _get_json(url, params, results_key, limiter):
+    """API를 호출해 (결과, 오류 메시지)를 반환합니다. 검색 캐시에 넣을 수 있는 형태입니다."""
+    limiter.acquire() # 캐시에 없어 실제로 요청할 때만 토큰을 씀
+    try:
+        response = get_http_client().get(url, params=params, timeout=5)
+    except requests.exceptions.RequestException as e:
+        return [], f"요청 중 오류 발생: {e}"
+    if response.status_code != 200:
+        return [], f"요청에 실패했습니다 (코드: {response.status_code})"
+    return response.json().get(results_key, []), None
+
+
+def _slim(fetched):
+    results, error = fetched
+    return slim_movie_results(results), error
+
+
+def _lookup_movie(title, limiter):
+    """제목이 일치하는 영화의 정보를 (채울 값, 상태)로 반환합니다."""
+    # 앱의 _cached_movie_search와 같은 키와 요청이므로 캐시를 함께 씀
+    results, error = get_search_cache().get_or_fetch(
+        normalize_key('영화', title, 'ko-KR'),
+        lambda: _slim(_get_json(f"{TMDB_API_BASE}/search/movie", {"query": title, "language": "ko-KR"}, 'results', limiter))
+    )
+    if error:
+        return {}, 'error'
+    movie = next((m for m in results if work_key('영화', m.get('title')) == work_key('영화', title)), None)
+    if movie is None:
+        return {}, 'no_match'
+    crew, error = get_search_cache().get_or_fetch(
+        normalize_key('영화 감독', str(movie.get('id')), 'ko-KR'),
+        lambda: _get_json(f"{TMDB_API_BASE}/movie/{movie.get('id')}/credits", {"language": "ko-KR"}, 'crew', limiter)
+    )
+    directors = [person.get('name') for person in crew if person.get('job') == 'Director']
+    return {
+        'image_url': f"{TMDB_IMAGE_BASE}{movie['poster_path']}" if movie.get('poster_path') else '',
+        'director_author': ', '.join(directors),
+        'release_pub_date': movie.get('release_date') or '',
+    }, 'error' if error else 'enriched' # 감독 정보를 못 가져왔으면 나머지만 채우고 다음에 다시 시도
+
+
+def google_books_api_key():
+    """앱(test.py)과 같이 Streamlit secrets에서 Google Books API 키를 읽습니다. 없으면 GOOGLE_BOOKS_API_KEY 환경 변수를 씁니다."""
+    try:
+        key = st.secrets.get("GOOGLE_BOOKS_API_KEY", "")
+    except FileNotFoundError: # secrets.toml 없이 명령줄에서 실행
+        key = ""
+    key = key or os.environ.get("GOOGLE_BOOKS_API_KEY", "")
+    return "" if key == GOOGLE_BOOKS_KEY_PLACEHOLDER else key
+
+
+def _lookup_book(title, limiter):
+    """제목이 일치하는 책의 정보를 (채울 값, 상태)로 반환합니다."""
+    params = {"q": title, "langRestrict": "ko", "fields": BOOK_RESULT_FIELDS}
+    api_key = google_books_api_key()
+    if api_key:
+        params["key"] = api_key
+    results, error = get_search_cache().get_or_fetch(
+        normalize_key('책', title, 'ko'),
+        lambda: _get_json(f"{GOOGLE_BOOKS_API_BASE}/volumes", params, 'items', limiter)
+    )
+    if error:
+        return {}, 'error'
+    volume = next(
+        (b.get('volumeInfo', {}) for b in results if work_key('책', b.get('volumeInfo', {}).get('title')) == work_key('책', title)),
+        None
+    )
+    if volume is None:
+        return {}, 'no_match'
+    return {
+        'image_url': volume.get('imageLinks', {}).get('thumbnail') or '',
+        'director_author': ', '.join(volume.get('authors', [])),
+        'release_pub_date': volume.get('publishedDate') or '',
+    }, 'enriched'
+
+
+_LOOKUPS = {'영화': _lookup_movie, '책': _lookup_book}
+
+
+class Enricher:
+    """기록 정보 채우기 작업입니다. 시도 결과는 SQLite에 남깁니다. (연결은 스레드별)"""
+
+    def __init__(self, path=ENRICH_DB_FILE, concurrency=ENRICH_CONCURRENCY, rate=ENRICH_RATE_PER_SECOND,
+                 batch_size=ENRICH_BATCH_SIZE, retry_days=ENRICH_RETRY_DAYS):
+        self.path = path
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retry_seconds = retry_days * 86400
+        self._limiters = {record_type: RateLimiter(rate) for record_type in _LOOKUPS}
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def pending_records(self, records):
+        """records 중 이번에 찾아볼 기록 목록입니다. (빈 칸이 있고, 최근에 시도해 끝난 기록이 아닌 것)"""
+        candidates = [r for r in records if r.get('type') in _LOOKUPS and r.get('title') and missing_fields(r)]
+        if not candidates:
+            return []
+        cutoff = time.time() - self.retry_seconds
+        conn = self._conn()
+        done = set()
+        for i in range(0, len(candidates), 500): # SQLite 변수 개수 제한
+            ids = [r['id'] for r in candidates[i:i + 500]]
+            done.update(row[0] for row in conn.execute(
+                f"SELECT record_id FROM attempts WHERE record_id IN ({','.join('?' * len(ids))}) "
+                "AND status != 'error' AND attempted_at > ?", ids + [cutoff]
+            ))
+        return [r for r in candidates if r['id'] not in done]
+
+    def _lookup(self, record_type, title):
+        return _LOOKUPS[record_type](title, self._limiters[record_type])
+
+    def _enrich_batch(self, username, batch, pool):
+        keys = list(dict.fromkeys((r['type'], ' '.join(r['title'].split())) for r in batch)) # 같은 작품은 한 번만
+        found = dict(zip(keys, pool.map(lambda key: self._lookup(*key), keys)))
+
+        storage = get_storage()
+        current = {r['id']: r for r in storage.load_user_records(username)} # 찾는 동안 바뀐 내용을 덮어쓰지 않도록
+        updated, attempts = [], []
+        for record in batch:
+            values, status = found[(record['type'], ' '.join(record['title'].split()))]
+            attempts.append((record['id'], status, time.time()))
+            latest = current.get(record['id'])
+            if latest is None:
+                continue
+            fills = {field: values[field] for field in missing_fields(latest) if values.get(field)}
+            if fills:
+                updated.append(dict(latest, **fills))
+
+        if updated:
+            record_changes.update_user_records(username, updated) # 검색 색인, 공유방 스냅샷 등에도 반영
+        conn = self._conn()
+        with conn: # 저장한 뒤에 기록하므로 중간에 멈추면 이 배치는 다음에 다시 시도 (이미 채운 칸은 건너뜀)
+            conn.executemany("INSERT OR REPLACE INTO attempts (record_id, status, attempted_at) VALUES (?, ?, ?)", attempts)
+        return len(updated), attempts
+
+    def enrich_user(self, username, pool):
+        """사용자 한 명의 기록을 채우고 {'checked', 'enriched', 'no_match', 'error'} 개수를 반환합니다."""
+        counts = {'checked': 0, 'enriched': 0, 'no_match': 0, 'error': 0}
+        pending = self.pending_records(get_storage().load_user_records(username))
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            enriched, attempts = self._enrich_batch(username, batch, pool)
+            counts['checked'] += len(batch)
+            counts['enriched'] += enriched
+            for _, status, _ in attempts:
+                if status != 'enriched':
+                    counts[status] += 1
+        return counts
+
+    def run(self, usernames=None, progress=None):
+        """사용자들의 기록을 채우고 합계를 반환합니다. progress(username, counts)는 사용자마다 불립니다."""
+        usernames = sorted(get_storage().load_users()) if usernames is None else usernames
+        totals = {'users': 0, 'checked': 0, 'enriched': 0, 'no_match': 0, 'error': 0}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='enrichment') as pool:
+            for username in usernames:
+                counts = self.enrich_user(username, pool)
+                totals['users'] += 1
+                for key, value in counts.items():
+                    totals[key] += value
+                if progress:
+                    progress(username, counts)
+        return totals
+
+
+_enricher = None
+_enricher_lock = threading.Lock()
+_background = None
+
+
+def get_enricher():
+    """프로세스 전체에서 공유하는 작업 객체를 반환합니다."""
+    global _enricher
+    if _enricher is None:
+        with _enricher_lock:
+            if _enricher is None:
+                _enricher = Enricher()
+    return _enricher
+
+
+def _background_loop(interval):
+    while True:
+        try:
+            get_enricher().run()
+        except Exception: # 예상하지 못한 API 응답 등으로 스레드가 멈추지 않도록, 기록만 남기고 다음 주기에 다시 시도
+            logger.exception("기록 정보 채우기에 실패했습니다. %s초 뒤에 다시 시도합니다.", interval)
+        time.sleep(interval)
+
+
+def start_background_enricher(interval=ENRICH_INTERVAL_SECONDS):
+    """interval초마다 모든 사용자의 기록을 채우는 백그라운드 스레드를 한 번만 띄웁니다. (interval이 0이면 아무것도 안 함)"""
+    global _background
+    if interval <= 0:
+        return
+    with _enricher_lock:
+        if _background is None:
+            _background = threading.Thread(target=_background_loop, args=(interval,), name='record-enricher', daemon=True)
+            _background.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="빈 칸이 있는 기록을 영화/책 검색 정보로 채웁니다.")
+    parser.add_argument('--user', action='append', help="이 사용자만 처리 (여러 번 지정 가능)")
+    parser.add_argument('--loop', type=float, default=0, help="0보다 크면 이 간격(초)으로 계속 반복")
+    parser.add_argument('--concurrency', type=int, default=ENRICH_CONCURRENCY, help="동시에 보낼 최대 조회 수")
+    parser.add_argument('--rate', type=float, default=ENRICH_RATE_PER_SECOND, help="API별 초당 최대 요청 수")
+    args = parser.parse_args()
+
+    enricher = Enricher(concurrency=args.concurrency, rate=args.rate)
+
+    def report(username, counts):
+        if counts['checked']:
+            print(f"  {username}: {counts['checked']}건 확인, {counts['enriched']}건 채움, "
+                  f"일치 없음 {counts['no_match']}건, 오류 {counts['error']}건")
+
+    while True:
+        started = time.perf_counter()
+        totals = enricher.run(args.user, report)
+        print(f"사용자 {totals['users']}명, 기록 {totals['checked']}건 확인, {totals['enriched']}건 채움 "
+              f"(일치 없음 {totals['no_match']}건, 오류 {totals['error']}건, {time.perf_counter() - started:.1f}초)")
+        if args.loop <= 0:
+            break
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""외부 API 호출에 공통으로 쓰는 HTTP 클라이언트입니다.
+
+- 하나의 requests.Session을 프로세스 전체에서 공유해 TCP/TLS 연결을 재사용합니다. (keep-alive, 연결 풀 크기 제한)
+- 429나 5xx 응답, 연결 오류가 나면 지터(jitter)를 섞은 지수 백오프로 몇 번 더 시도합니다.
+- 호스트별 서킷 브레이커: 연속으로 여러 번 실패한 호스트는 잠시 동안 바로 실패 처리해 5초 타임아웃을 반복하지 않습니다.
+- run_concurrently()로 여러 요청을 동시에 실행할 수 있습니다. (전체 시간 = 가장 느린 요청의 시간)
+  run_in_background()는 결과를 기다리지 않고 같은 스레드 풀에서 실행합니다. (다음 쪽 미리 가져오기 등)
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import timed
+
+HTTP_POOL_SIZE = int(os.environ.get('RECORD_APP_HTTP_POOL_SIZE', '10')) # 호스트별 최대 연결 수
+HTTP_MAX_RETRIES = int(os.environ.get('RECORD_APP_HTTP_MAX_RETRIES', '2')) # 처음 요청 이후 추가로 시도할 횟수
+HTTP_BACKOFF_BASE_SECONDS = 0.3
+HTTP_BACKOFF_MAX_SECONDS = 3.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+CIRCUIT_FAILURE_THRESHOLD = 5 # 이만큼 연속으로 실패하면 서킷을 엽니다.
+CIRCUIT_RESET_SECONDS = 30 # 서킷을 연 뒤 이 시간이 지나면 요청 하나를 다시 시도해 봅니다.
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않았을 때 발생합니다."""
+
+
+class CircuitBreaker:
+    """호스트 하나의 연속 실패 횟수를 세고 요청을 보내도 되는지 판단합니다."""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.opened_at = time.monotonic() # 시험 요청 하나만 통과시키고 다시 기다림 (half-open)
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def _backoff_seconds(attempt, response=None):
+    """attempt번째 재시도 전에 기다릴 시간입니다. (full jitter, 429의 Retry-After 존중)"""
+    if response is not None and response.headers.get('Retry-After', '').isdigit():
+        return min(float(response.headers['Retry-After']), HTTP_BACKOFF_MAX_SECONDS)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+class HttpClient:
+    """연결 풀, 재시도, 서킷 브레이커를 갖춘 GET 전용 클라이언트입니다."""
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES):
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+    def _breaker(self, url):
+        host = urlsplit(url).netloc
+        with self._breakers_lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker()
+        return breaker
+
+    @timed('http.get')
+    def get(self, url, params=None, timeout=5, allow_redirects=True):
+        """GET 요청을 보내고 마지막 응답을 반환합니다. 실패하면 requests의 예외가 발생합니다.
+
+        allow_redirects=False이면 3xx 응답을 그대로 반환하므로 호출하는 쪽에서 이동할 주소를 확인할 수 있습니다.
+        """
+        breaker = self._breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{urlsplit(url).netloc} 서버가 계속 응답하지 않아 잠시 요청을 멈췄습니다.")
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.get(url, params=params, timeout=timeout, allow_redirects=allow_redirects)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last_attempt:
+                    breaker.record_failure()
+                    raise
+                time.sleep(_backoff_seconds(attempt))
+                continue
+            if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                time.sleep(_backoff_seconds(attempt, response))
+                continue
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return response
+
+
+_client = None
+_client_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix='http-client')
+
+
+def get_http_client():
+    """프로세스 전체에서 공유하는 HTTP 클라이언트를 반환합니다."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+
+def run_concurrently(*functions):
+    """인자 없는 함수들을 동시에 실행하고 결과를 같은 순서의 리스트로 반환합니다.
+
+    Streamlit 명령(st.*)은 스크립트 스레드에서만 쓸 수 있으므로 functions 안에서는 호출하지 마세요.
+    """
+    futures = [_executor.submit(function) for function in functions]
+    return [future.result() for future in futures]
+
+
+def run_in_background(function):
+    """인자 없는 함수를 스레드 풀에서 실행하고 기다리지 않습니다. concurrent.futures.Future를 반환합니다.
+
+    run_concurrently와 마찬가지로 function 안에서 Streamlit 명령(st.*)을 호출하지 마세요.
+    """
+    return _executor.submit(function)
@@ -0,0 +1,266 @@
+"""기록의 포스터/표지 이미지를 한 번만 내려받아 작게 줄여 디스크에 보관하는 이미지 캐시입니다.
+
+- 원격 image_url은 처음 한 번만 내려받고, 화면에 쓰는 폭(IMAGE_DISPLAY_WIDTH)에 맞게 줄여 저장합니다.
+- image_url은 사용자가 직접 넣거나 가져오기로 들어올 수 있으므로, 서버는 IMAGE_ALLOWED_HOSTS(TMDB/Google Books 이미지 서버)의
+  http(s) 주소만 내려받습니다. 리다이렉트도 한 번씩 같은 검사를 거치고, 이미지가 아닌 응답은 저장하지 않습니다.
+- get()은 기다리지 않습니다. 캐시에 없으면 백그라운드 내려받기만 걸어 두고 None을 반환합니다.
+- 저장소는 내용 주소 방식(content-addressed)입니다.
+    objects/<sha256 앞 2자리>/<sha256>  : 줄인 이미지 바이트 (같은 이미지는 한 번만 저장)
+    urls/<url의 sha256>                 : 해당 URL의 이미지 sha256
+- 전체 크기가 IMAGE_CACHE_MAX_BYTES를 넘으면 가장 오래 쓰지 않은 이미지부터 지웁니다. (접근할 때 mtime 갱신)
+  지운 이미지를 가리키던 urls/ 항목도 함께 지웁니다.
+- prefetch_image()로 기록을 저장할 때 미리 백그라운드에서 내려받아 둘 수 있습니다.
+- Pillow가 없으면 줄이지 않고 원본 바이트를 저장합니다. (파일 앞부분으로 이미지 형식인지는 확인)
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from data_layout import data_path
+from http_client import get_http_client
+from locking import atomic_writer
+
+try:
+    from PIL import Image
+except ImportError: # Pillow가 없으면 크기 조절 없이 저장
+    Image = None
+
+IMAGE_CACHE_DIR = os.environ.get('RECORD_APP_IMAGE_CACHE_DIR', data_path('image_cache'))
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get('RECORD_APP_IMAGE_CACHE_MB', '200')) * 1024 * 1024
+IMAGE_DISPLAY_WIDTH = 200 # 기록 목록과 공유방에서 st.image에 쓰는 폭
+IMAGE_FETCH_TIMEOUT = 5
+IMAGE_FAILURE_TTL_SECONDS = 300 # 내려받기에 실패한 URL은 이 시간 동안 다시 시도하지 않음
+# 서버가 내려받아도 되는 이미지 호스트 (하위 도메인 포함, 쉼표로 구분)
+IMAGE_ALLOWED_HOSTS = tuple(
+    host.strip().lower() for host in os.environ.get(
+        'RECORD_APP_IMAGE_HOSTS', 'image.tmdb.org,books.google.com,books.googleusercontent.com'
+    ).split(',') if host.strip()
+)
+IMAGE_MAX_REDIRECTS = 3
+# 이미지 형식별 파일 앞부분 (WEBP는 RIFF....WEBP)
+_IMAGE_SIGNATURES = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n', b'GIF87a', b'GIF89a')
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_remote_url(url):
+    """http(s) 주소인지 확인합니다. (브라우저가 직접 읽어도 되는 주소)"""
+    return isinstance(url, str) and url.lower().startswith(('http://', 'https://'))
+
+
+def is_allowed_image_url(url):
+    """서버가 내려받아도 되는 이미지 주소(허용된 호스트의 http/https)인지 확인합니다."""
+    try:
+        parts = urlsplit(url or '')
+        host = (parts.hostname or '').lower()
+    except ValueError:
+        return False
+    if parts.scheme not in ('http', 'https') or parts.username or parts.password:
+        return False
+    return any(host == allowed or host.endswith('.' + allowed) for allowed in IMAGE_ALLOWED_HOSTS)
+
+
+def looks_like_image(data):
+    """바이트가 JPEG/PNG/GIF/WEBP 이미지로 시작하는지 확인합니다."""
+    return data.startswith(_IMAGE_SIGNATURES) or (data[:4] == b'RIFF' and data[8:12] == b'WEBP')
+
+
+def resize_image(data, width=IMAGE_DISPLAY_WIDTH):
+    """이미지를 width 폭에 맞게 줄입니다. 이미 작거나 Pillow가 없으면 원본을 그대로 반환합니다."""
+    if Image is None:
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width <= width:
+            return data
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        if resized.mode in ('RGBA', 'LA', 'P'):
+            resized.save(out, format='PNG', optimize=True)
+        else:
+            resized.convert('RGB').save(out, format='JPEG', quality=85, optimize=True)
+        return out.getvalue()
+
+
+class ImageCache:
+    """이미지를 내려받아 디스크에 보관합니다. 여러 세션이 같은 인스턴스를 공유합니다."""
+
+    def __init__(self, root=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inflight = {} # url -> Future (같은 URL을 동시에 두 번 내려받지 않도록)
+        self._failures = {} # url -> 실패 시각
+        self._writing = set() # 지금 저장 중인 이미지 sha256 (다른 URL의 같은 이미지를 두 번 세지 않도록)
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='image-cache')
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'urls'), exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._objects())
+
+    def _url_path(self, url):
+        return os.path.join(self.root, 'urls', _sha256(url.encode('utf-8')))
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def _objects(self):
+        """(경로, 크기, 마지막 사용 시각) 목록을 반환합니다. 폴더가 아닌 항목과 쓰는 중인 임시 파일은 건너뜁니다."""
+        with os.scandir(os.path.join(self.root, 'objects')) as prefixes:
+            prefix_dirs = [prefix.path for prefix in prefixes if prefix.is_dir()]
+        for prefix_dir in prefix_dirs:
+            with os.scandir(prefix_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.is_file():
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError: # 그 사이 지워짐
+                        continue
+                    yield entry.path, st.st_size, st.st_mtime
+
+    def _read_cached(self, url):
+        url_path = self._url_path(url)
+        try:
+            with open(url_path, 'r') as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            return None
+        path = self._object_path(digest)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError: # 이미지가 지워졌으면 가리키던 항목도 지워 다시 내려받게 함
+            self._remove_quietly(url_path)
+            return None
+        os.utime(path) # LRU용 마지막 사용 시각 갱신
+        return data
+
+    def _fetch(self, url):
+        """허용된 주소만 따라가며 이미지를 내려받아 원본 바이트를 반환합니다."""
+        for _ in range(IMAGE_MAX_REDIRECTS + 1):
+            if not is_allowed_image_url(url):
+                raise ValueError(f"허용되지 않은 이미지 주소입니다: {url}")
+            response = get_http_client().get(url, timeout=IMAGE_FETCH_TIMEOUT, allow_redirects=False)
+            if response.is_redirect:
+                url = urljoin(url, response.headers['location'])
+                continue
+            if response.status_code != 200:
+                raise ValueError(f"status {response.status_code}")
+            if not looks_like_image(response.content):
+                raise ValueError("이미지가 아닌 응답입니다.")
+            return response.content
+        raise ValueError("리다이렉트가 너무 많습니다.")
+
+    def _download(self, url):
+        try:
+            data = resize_image(self._fetch(url))
+        except Exception: # 허용되지 않은 주소, 네트워크 오류, 이미지가 아닌 응답 등
+            with self._lock:
+                self._failures[url] = time.monotonic()
+            return None
+
+        digest = _sha256(data)
+        path = self._object_path(digest)
+        with self._lock: # 같은 이미지를 다른 URL로 동시에 내려받았으면 한 스레드만 저장하고 크기를 셈
+            created = digest not in self._writing and not os.path.exists(path)
+            if created:
+                self._writing.add(digest)
+        if created:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with atomic_writer(path, 'wb') as f:
+                    f.write(data)
+                with self._lock:
+                    self._total_bytes += len(data)
+            finally:
+                with self._lock:
+                    self._writing.discard(digest)
+        with atomic_writer(self._url_path(url)) as f:
+            f.write(digest)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        return data
+
+    def _evict(self):
+        """가장 오래 쓰지 않은 이미지부터 지워 한도의 90%까지 줄이고, 지운 이미지를 가리키던 urls/ 항목도 지웁니다."""
+        target = self.max_bytes * 0.9
+        removed = set()
+        for path, size, _ in sorted(self._objects(), key=lambda item: item[2]):
+            with self._lock:
+                if self._total_bytes <= target:
+                    break
+                self._total_bytes -= size
+            self._remove_quietly(path)
+            removed.add(os.path.basename(path))
+        if not removed:
+            return
+        with os.scandir(os.path.join(self.root, 'urls')) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    with open(entry.path, 'r') as f:
+                        digest = f.read().strip()
+                except FileNotFoundError:
+                    continue
+                if digest in removed:
+                    self._remove_quietly(entry.path)
+
+    @staticmethod
+    def _remove_quietly(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _submit(self, url):
+        if not is_allowed_image_url(url):
+            return None
+        with self._lock:
+            failed_at = self._failures.get(url)
+            if failed_at is not None and time.monotonic() - failed_at < IMAGE_FAILURE_TTL_SECONDS:
+                return None
+            future = self._inflight.get(url)
+            if future is None:
+                future = self._inflight[url] = self._executor.submit(self._download, url)
+                future.add_done_callback(lambda _: self._forget(url))
+            return future
+
+    def _forget(self, url):
+        with self._lock:
+            self._inflight.pop(url, None)
+
+    def get(self, url):
+        """url의 줄인 이미지 바이트를 반환합니다.
+
+        캐시에 없으면 기다리지 않고 백그라운드 내려받기를 걸어 둔 뒤 None을 반환합니다. (다음에 그릴 때 캐시에서 읽음)
+        """
+        data = self._read_cached(url)
+        if data is None:
+            self._submit(url)
+        return data
+
+    def prefetch(self, url):
+        """url을 백그라운드에서 미리 내려받아 둡니다. 기다리지 않고 바로 반환합니다."""
+        if url and not os.path.exists(self._url_path(url)):
+            self._submit(url)
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """프로세스 전체에서 공유하는 이미지 캐시를 반환합니다."""
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                _image_cache = ImageCache()
+    return _image_cache
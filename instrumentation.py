@@ -0,0 +1,253 @@
+"""Streamlit 앱(test.py, main.py)의 한 번의 실행(rerun) 중 어디에서 시간이 걸리는지 측정하는 계측 도구입니다.
+
+RECORD_APP_PROFILE=1 로 켤 때만 동작합니다. 꺼져 있으면 timed()는 함수를 그대로 돌려주고 span()은 빈 컨텍스트라서
+비용이 거의 없습니다.
+
+- span(name) / @timed(name): 구간의 실행 시간을 재서 이름별 히스토그램에 더합니다.
+  저장소 호출(instrument()로 감싼 get_storage()), HTTP 요청, 페이지 렌더링 함수에 붙어 있습니다.
+- begin_rerun()을 스크립트 맨 앞에서 부르면 그 실행(스크립트 스레드)에서 지나간 구간 목록을 rerun_spans()로 볼 수 있습니다.
+- prometheus_text()는 Prometheus 텍스트 형식(OpenMetrics와 호환)의 히스토그램을 반환합니다.
+  RECORD_APP_METRICS_PORT를 지정하면 http://<서버>:<포트>/metrics 로, RECORD_APP_METRICS_FILE을 지정하면
+  파일로도 내보냅니다. (파일은 METRICS_FILE_INTERVAL_SECONDS마다 한 번만 다시 씀)
+- test.py의 계측 패널은 RECORD_APP_ADMIN_USERS(쉼표로 구분)에 적은 사용자에게만 보입니다. (비어 있으면 아무에게도 안 보임)
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from locking import atomic_writer
+
+PROFILING_ENABLED = os.environ.get('RECORD_APP_PROFILE', '').lower() not in ('', '0', 'false', 'no')
+METRICS_PORT = int(os.environ.get('RECORD_APP_METRICS_PORT', '0')) # 0이면 /metrics 서버를 띄우지 않음
+METRICS_FILE = os.environ.get('RECORD_APP_METRICS_FILE', '') # 비어 있으면 파일로 내보내지 않음
+METRICS_FILE_INTERVAL_SECONDS = 10
+ADMIN_USERS = {name.strip() for name in os.environ.get('RECORD_APP_ADMIN_USERS', '').split(',') if name.strip()}
+
+# 히스토그램 구간 상한 (초)
+HISTOGRAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_RERUN_SPANS = 200 # 한 번의 실행에서 기억할 최대 구간 수
+
+
+class Histogram:
+    """고정 구간 히스토그램입니다. 잠금은 Recorder가 잡습니다."""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(HISTOGRAM_BUCKETS) + 1) # 마지막 칸은 +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect.bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """q 분위수가 들어 있는 구간의 상한을 반환합니다. (마지막 구간이면 최댓값)"""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BUCKETS, self.bucket_counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class Recorder:
+    """구간 이름별 히스토그램과 스레드별 이번 실행 구간 목록을 보관합니다."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_file_write = 0.0
+
+    def observe(self, name, seconds, depth=0):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+        spans = getattr(self._local, 'spans', None)
+        if spans is not None and len(spans) < MAX_RERUN_SPANS:
+            spans.append((name, seconds, depth))
+
+    def begin_rerun(self):
+        self._local.spans = []
+        self._local.depth = 0
+
+    def rerun_spans(self):
+        """이번 실행에서 끝난 구간 목록 [(이름, 초, 중첩 깊이), ...]을 끝난 순서대로 반환합니다."""
+        return list(getattr(self._local, 'spans', None) or ())
+
+    def summary(self):
+        """구간 이름별 통계 목록을 반환합니다. (총 시간이 큰 순서)"""
+        with self._lock:
+            rows = [
+                {
+                    'span': name,
+                    'count': h.count,
+                    'total_ms': h.total * 1000,
+                    'avg_ms': h.total / h.count * 1000,
+                    'p50_ms': h.quantile(0.5) * 1000,
+                    'p95_ms': h.quantile(0.95) * 1000,
+                    'max_ms': h.max * 1000,
+                }
+                for name, h in self._histograms.items()
+            ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 형식으로 히스토그램을 내보냅니다."""
+        lines = [
+            "# HELP record_app_span_seconds Time spent in instrumented spans.",
+            "# TYPE record_app_span_seconds histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self._histograms.items()):
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for bound, count in zip(HISTOGRAM_BUCKETS, h.bucket_counts):
+                    cumulative += count
+                    lines.append(f'record_app_span_seconds_bucket{{span="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'record_app_span_seconds_bucket{{span="{label}",le="+Inf"}} {h.count}')
+                lines.append(f'record_app_span_seconds_sum{{span="{label}"}} {h.total:.6f}')
+                lines.append(f'record_app_span_seconds_count{{span="{label}"}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def maybe_write_file(self, path=METRICS_FILE):
+        """path가 있으면 일정 간격마다 Prometheus 텍스트를 파일로 씁니다."""
+        now = time.monotonic()
+        if not PROFILING_ENABLED or not path or now - self._last_file_write < METRICS_FILE_INTERVAL_SECONDS:
+            return
+        self._last_file_write = now
+        with atomic_writer(path) as f:
+            f.write(self.prometheus_text())
+
+
+_recorder = Recorder()
+
+
+def get_recorder():
+    return _recorder
+
+
+class _Span:
+    __slots__ = ('name', 'started', 'depth')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        local = _recorder._local
+        self.depth = getattr(local, 'depth', 0)
+        local.depth = self.depth + 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _recorder._local.depth = self.depth
+        _recorder.observe(self.name, time.perf_counter() - self.started, self.depth)
+        return False # 예외(st.rerun 포함)는 그대로 전달
+
+
+_NULL_SPAN = nullcontext()
+
+
+def span(name):
+    """구간 실행 시간을 재는 컨텍스트 관리자입니다. (계측이 꺼져 있으면 아무것도 하지 않음)"""
+    return _Span(name) if PROFILING_ENABLED else _NULL_SPAN
+
+
+def timed(name=None):
+    """함수 실행 시간을 재는 데코레이터입니다. 계측이 꺼져 있으면 함수를 그대로 반환합니다."""
+    def decorator(fn):
+        if not PROFILING_ENABLED:
+            return fn
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _InstrumentedProxy:
+    """객체의 메서드 호출마다 '<prefix>.<메서드 이름>' 구간을 잽니다."""
+
+    def __init__(self, target, prefix):
+        self._target = target
+        self._prefix = prefix
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if not callable(value) or attr.startswith('_'):
+            return value
+        span_name = f'{self._prefix}.{attr}'
+
+        @functools.wraps(value)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name):
+                return value(*args, **kwargs)
+        return wrapper
+
+
+def instrument(target, prefix):
+    """계측이 켜져 있으면 target의 공개 메서드 호출을 재는 프록시를, 아니면 target을 그대로 반환합니다."""
+    return _InstrumentedProxy(target, prefix) if PROFILING_ENABLED else target
+
+
+def begin_rerun():
+    """스크립트 맨 앞에서 부릅니다. 이번 실행의 구간 목록을 비우고, 필요하면 /metrics 서버를 띄웁니다."""
+    if not PROFILING_ENABLED:
+        return
+    _recorder.begin_rerun()
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+
+
+def is_admin(username):
+    """계측 패널을 볼 수 있는 사용자인지 확인합니다. (RECORD_APP_ADMIN_USERS가 비어 있으면 아무도 볼 수 없음)"""
+    return PROFILING_ENABLED and username in ADMIN_USERS
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = _recorder.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port):
+    """/metrics 를 제공하는 HTTP 서버를 백그라운드 스레드로 한 번만 띄웁니다."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(('0.0.0.0', port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server
@@ -0,0 +1,79 @@
+"""데이터 파일을 안전하게 저장하기 위한 파일 잠금과 원자적 쓰기 도구입니다.
+
+- file_lock(path): path 옆의 "<path>.lock" 파일에 fcntl.flock 잠금을 겁니다.
+  다른 프로세스와 다른 스레드(세션) 모두를 막으므로 읽고-고치고-쓰는 작업을 이 안에서 하면 수정 내용이 사라지지 않습니다.
+  fcntl이 없는 환경(Windows)에서는 같은 프로세스 안의 스레드끼리만 막습니다.
+- atomic_writer(path): 같은 디렉터리의 임시 파일에 쓰고 fsync 한 뒤 os.replace로 바꿔치기합니다.
+  쓰는 도중 죽어도 기존 파일은 온전히 남고, 읽는 쪽은 항상 완성된 파일만 보게 됩니다.
+- lock_stats(): 잠금을 얻기까지 기다린 시간 통계를 반환합니다.
+"""
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+_thread_locks = {} # fcntl이 없을 때 사용할 경로별 스레드 잠금
+_thread_locks_guard = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"acquisitions": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+
+def _record_wait(seconds):
+    with _stats_lock:
+        _stats["acquisitions"] += 1
+        _stats["total_wait_seconds"] += seconds
+        _stats["max_wait_seconds"] = max(_stats["max_wait_seconds"], seconds)
+
+
+def lock_stats():
+    """지금까지 잠금을 얻은 횟수와 기다린 시간(초)을 반환합니다."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["avg_wait_seconds"] = stats["total_wait_seconds"] / stats["acquisitions"] if stats["acquisitions"] else 0.0
+    return stats
+
+
+@contextmanager
+def file_lock(path):
+    """path에 대한 배타적 잠금을 잡습니다."""
+    started = time.perf_counter()
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+        with lock:
+            _record_wait(time.perf_counter() - started)
+            yield
+        return
+
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        _record_wait(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def atomic_writer(path, mode='w'):
+    """임시 파일에 쓴 내용을 with 블록이 끝날 때 path로 바꿔치기합니다. 예외가 나면 기존 파일을 그대로 둡니다."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        encoding = None if 'b' in mode else 'utf-8'
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,84 @@
+"""예전처럼 한 폴더에 바로 쌓인 사용자 기록 파일을 하위 폴더로 나눠 담는 배치(data_layout.py)로 옮기는 도구입니다.
+
+사용법:
+    python migrate_layout.py [--source-dir .] [--data-dir RECORD_APP_DATA_DIR] [--workers 4]
+
+- {username}_records.jsonl 로그는 해시 하위 폴더로 옮기고, 예전 JSON 리스트 파일은 로그로 바꿔 씁니다. (원본은 .bak)
+- --source-dir과 --data-dir이 다르면 users.json, sharing_rooms.json, room_snapshots/도 (대상에 없을 때) 옮깁니다.
+- 사용자 단위로 --workers개씩 동시에 옮기며, 사용자마다 기록 로그 잠금을 잡으므로 앱이 실행 중이어도 됩니다.
+- 중간에 멈춰도 다시 실행하면 됩니다. 다 옮긴 사용자의 원본은 이미 없으므로 남은 파일만 다시 찾아 옮기고,
+  복사 도중 멈춰 양쪽에 같은 파일이 남았으면 원본만 지웁니다.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from data_layout import DATA_DIR, iter_legacy_user_files, move_file
+from storage import ROOM_SNAPSHOTS_DIR, SHARING_ROOMS_FILE, USER_DATA_FILE, JsonStorage
+
+PROGRESS_EVERY = 1000 # 이만큼 옮길 때마다 진행 상황 출력
+
+
+def _move_shared_files(source_dir, data_dir):
+    """사용자 파일이 아닌 공용 파일/폴더를 옮기고 옮긴 이름 목록을 반환합니다."""
+    moved = []
+    for name in (USER_DATA_FILE, SHARING_ROOMS_FILE, ROOM_SNAPSHOTS_DIR):
+        src, dst = os.path.join(source_dir, name), os.path.join(data_dir, name)
+        if os.path.exists(src) and not os.path.exists(dst):
+            os.makedirs(data_dir, exist_ok=True)
+            if os.path.isdir(src):
+                os.replace(src, dst)
+            else:
+                move_file(src, dst)
+            moved.append(name)
+    return moved
+
+
+def migrate(source_dir, data_dir, workers=4, progress=None):
+    """source_dir의 예전 사용자 기록 파일을 data_dir의 나눠 담는 배치로 옮기고 결과 개수를 반환합니다."""
+    storage = JsonStorage(data_dir=data_dir)
+    counts = {'moved': 0, 'converted': 0, 'none': 0, 'failed': 0}
+    errors = []
+    shared = _move_shared_files(source_dir, data_dir) if os.path.abspath(source_dir) != os.path.abspath(data_dir) else []
+    # 같은 사용자에게 로그와 JSON 리스트가 모두 있을 수 있으므로 사용자 이름으로 묶어 한 번씩만 처리
+    usernames = sorted({username for username, _ in iter_legacy_user_files(source_dir)})
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(storage.adopt_legacy_records, username, source_dir): username for username in usernames}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                counts[future.result()] += 1
+            except (OSError, ValueError) as e: # 대상에 다른 내용이 있음, 손상된 JSON 등
+                counts['failed'] += 1
+                errors.append(f"{futures[future]}: {e}")
+            if progress and done % PROGRESS_EVERY == 0:
+                progress(done, len(usernames))
+    return {'users': len(usernames), 'shared_files': shared, 'errors': errors, **counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="사용자 기록 파일을 하위 폴더로 나눠 담는 배치로 옮깁니다.")
+    parser.add_argument('--source-dir', default=DATA_DIR, help="예전 파일이 있는 폴더 (기본값: 데이터 폴더)")
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f"옮길 데이터 폴더 (기본값: {DATA_DIR})")
+    parser.add_argument('--workers', type=int, default=4, help="동시에 옮길 사용자 수")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = migrate(args.source_dir, args.data_dir, args.workers,
+                     progress=lambda done, total: print(f"  {done}/{total}명 처리"))
+    elapsed = time.perf_counter() - started
+    if result['shared_files']:
+        print(f"공용 파일을 옮겼습니다: {', '.join(result['shared_files'])}")
+    print(f"사용자 {result['users']}명: 로그 이동 {result['moved']}, JSON 변환 {result['converted']}, "
+          f"실패 {result['failed']} ({elapsed:.2f}초)")
+    for error in result['errors']:
+        print(f"  ❌ {error}")
+    if result['failed']:
+        print("실패한 사용자는 원인을 해결한 뒤 다시 실행하면 이어서 옮깁니다.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""기존 JSON 파일 데이터를 SQLite 데이터베이스로 한 번에 옮기는 도구입니다.
+
+사용법:
+    python migrate_to_sqlite.py [--source-dir .] [--db records.db]
+
+users.json, sharing_rooms.json과 사용자별 기록 파일(하위 폴더에 나눠 담은 것과 예전처럼 바로 있는 것 모두)을 읽어
+SQLite 백엔드에 저장합니다.
+여러 번 실행해도 같은 결과가 되도록 기존 행은 덮어씁니다.
+이후 RECORD_APP_STORAGE=sqlite 로 앱을 실행하면 옮긴 데이터를 사용합니다.
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+
+from data_layout import RECORD_LOG_SUFFIX, iter_legacy_user_files, iter_user_files
+from record_log import RecordLog
+from storage import SQLITE_DB_FILE, SHARING_ROOMS_FILE, USER_DATA_FILE, SqliteStorage
+
+def _read_json(path, default):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return default
+
+
+def migrate(source_dir, db_path):
+    """source_dir의 JSON 파일들을 db_path의 SQLite 데이터베이스로 옮기고 옮긴 개수를 반환합니다."""
+    target = SqliteStorage(db_path)
+
+    users = _read_json(os.path.join(source_dir, USER_DATA_FILE), {})
+    existing_users = target.load_users()
+    existing_users.update(users)
+    target.save_users(existing_users)
+
+    rooms = _read_json(os.path.join(source_dir, SHARING_ROOMS_FILE), {})
+    existing_rooms = target.load_sharing_rooms()
+    existing_rooms.update(rooms)
+    target.save_sharing_rooms(existing_rooms)
+
+    record_count = 0
+    # 같은 사용자에게 여러 파일이 있으면 예전 JSON 리스트 < 예전 위치의 로그 < 하위 폴더의 로그 순서로 최신입니다.
+    legacy = sorted(iter_legacy_user_files(source_dir), key=lambda item: item[1].endswith(RECORD_LOG_SUFFIX))
+    sources = dict(legacy)
+    sources.update(iter_user_files(RECORD_LOG_SUFFIX, source_dir))
+    for username, path in sorted(sources.items()):
+        if path.endswith(RECORD_LOG_SUFFIX):
+            records = RecordLog(path).load()
+        else:
+            records = _read_json(path, [])
+        for record in records:
+            record.setdefault('id', str(uuid.uuid4())) # 예전 기록에 ID가 없을 경우 대비
+        target.save_user_records(username, records)
+        record_count += len(records)
+
+    return {
+        "users": len(users),
+        "sharing_rooms": len(rooms),
+        "record_files": len(sources),
+        "records": record_count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 데이터 파일을 SQLite 데이터베이스로 옮깁니다.")
+    parser.add_argument('--source-dir', default='.', help="users.json 등이 있는 디렉터리 (기본값: 현재 디렉터리)")
+    parser.add_argument('--db', default=SQLITE_DB_FILE, help=f"대상 SQLite 파일 (기본값: {SQLITE_DB_FILE})")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = migrate(args.source_dir, args.db)
+    elapsed = time.perf_counter() - started
+    print(f"사용자 {counts['users']}명, 공유방 {counts['sharing_rooms']}개, "
+          f"기록 파일 {counts['record_files']}개 (기록 {counts['records']}건)를 {args.db}로 옮겼습니다. ({elapsed:.2f}초)")
+
+
+if __name__ == "__main__":
+    main()
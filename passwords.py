@@ -0,0 +1,196 @@
+"""회원 비밀번호와 공유방 비밀번호를 해시로 저장하고 확인합니다.
+
+저장 형식 (알고리즘과 비용을 함께 저장하므로 설정을 바꿔도 예전 해시를 확인할 수 있습니다)
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<반복 횟수>$<salt>$<hash>
+salt와 hash는 base64입니다. 이 형식이 아닌 값은 예전에 평문으로 저장된 비밀번호로 봅니다.
+
+- 알고리즘과 비용은 환경 변수로 정합니다. (RECORD_APP_PASSWORD_SCHEME, RECORD_APP_SCRYPT_N, RECORD_APP_PBKDF2_ITERATIONS)
+- verify_password()는 (일치 여부, 다시 해시해야 하는지)를 반환합니다. 평문이거나 현재 설정과 비용이 다르면
+  로그인에 성공했을 때 새 설정으로 다시 해시해 저장합니다. (test.py의 authenticate_user)
+- 해시 계산은 일부러 느리므로 크기가 정해진 작업자 풀(RECORD_APP_KDF_WORKERS)에서 실행합니다.
+  로그인이 몰려도 CPU를 다 차지하지 않고, 대기 중인 작업이 KDF_MAX_PENDING개를 넘으면 PasswordBusyError를 냅니다.
+- 확인에 성공한 (해시, 비밀번호) 쌍은 잠시 기억해 같은 사용자가 다시 로그인할 때 해시 계산을 건너뜁니다.
+  이 캐시의 키는 프로세스마다 새로 만드는 비밀 키로 HMAC을 씌운 값이므로 비밀번호가 메모리에 그대로 남지 않습니다.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PASSWORD_SCHEME = os.environ.get('RECORD_APP_PASSWORD_SCHEME', 'scrypt') # "scrypt" 또는 "pbkdf2_sha256"
+SCRYPT_N = int(os.environ.get('RECORD_APP_SCRYPT_N', str(2 ** 14))) # 2의 거듭제곱
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = int(os.environ.get('RECORD_APP_PBKDF2_ITERATIONS', '600000'))
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+KDF_WORKERS = int(os.environ.get('RECORD_APP_KDF_WORKERS', '2')) # 동시에 해시를 계산할 최대 개수
+KDF_MAX_PENDING = 32 # 계산 중 + 대기 중인 작업의 최대 개수
+KDF_WAIT_SECONDS = 10 # 작업자 자리가 날 때까지 기다릴 최대 시간
+
+VERIFY_CACHE_SIZE = 1024
+VERIFY_CACHE_TTL_SECONDS = 600
+
+
+class PasswordBusyError(RuntimeError):
+    """해시 작업이 너무 많이 밀려 있을 때 발생합니다. 잠시 뒤 다시 시도하면 됩니다."""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem 기본값(32MB)은 n=2**15, r=8에서 부족하므로 필요한 만큼 넉넉히 줍니다.
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=HASH_BYTES)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, dklen=HASH_BYTES)
+
+
+def current_params(scheme=None):
+    """scheme(기본값은 설정된 알고리즘)의 현재 비용 설정을 반환합니다."""
+    scheme = scheme or PASSWORD_SCHEME
+    if scheme == 'scrypt':
+        return scheme, (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    if scheme == 'pbkdf2_sha256':
+        return scheme, (PBKDF2_ITERATIONS,)
+    raise ValueError(f"알 수 없는 비밀번호 해시 알고리즘입니다: {scheme}")
+
+
+def _compute(password, scheme, params, salt):
+    if scheme == 'scrypt':
+        return _scrypt(password, salt, *params)
+    return _pbkdf2(password, salt, *params)
+
+
+def _parse(stored):
+    """저장된 값을 (알고리즘, 비용, salt, hash)로 나눕니다. 해시 형식이 아니면 None입니다."""
+    parts = (stored or '').split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            params = tuple(int(x) for x in parts[1:4])
+        elif parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            params = (int(parts[1]),)
+        else:
+            return None
+        return parts[0], params, base64.b64decode(parts[-2]), base64.b64decode(parts[-1])
+    except ValueError: # 숫자나 base64가 아닌 값
+        return None
+
+
+def is_hashed(stored):
+    return _parse(stored) is not None
+
+
+def hash_password_sync(password, scheme=None, params=None):
+    """비밀번호를 해시합니다. (작업자 풀을 거치지 않음)"""
+    scheme, default_params = current_params(scheme)
+    params = tuple(params or default_params)
+    salt = os.urandom(SALT_BYTES)
+    digest = _compute(password, scheme, params, salt)
+    return '$'.join([scheme, *(str(x) for x in params), _b64(salt), _b64(digest)])
+
+
+def verify_password_sync(password, stored, current=None):
+    """비밀번호를 확인해 (일치 여부, 다시 해시해야 하는지)를 반환합니다. (작업자 풀을 거치지 않음)
+
+    current는 기준이 되는 (알고리즘, 비용)이며, 주지 않으면 설정된 값을 씁니다.
+    """
+    parsed = _parse(stored)
+    if parsed is None: # 예전 평문 비밀번호
+        ok = hmac.compare_digest((password or '').encode('utf-8'), (stored or '').encode('utf-8'))
+        return ok, ok
+    scheme, params, salt, expected = parsed
+    ok = hmac.compare_digest(_compute(password, scheme, params, salt), expected)
+    return ok, ok and (scheme, params) != (current or current_params())
+
+
+class PasswordHasher:
+    """작업자 풀과 확인 결과 캐시를 가진 비밀번호 해시기입니다. 여러 세션이 같은 인스턴스를 공유합니다."""
+
+    def __init__(self, scheme=None, params=None, workers=KDF_WORKERS, max_pending=KDF_MAX_PENDING,
+                 cache_size=VERIFY_CACHE_SIZE):
+        scheme, default_params = current_params(scheme)
+        self.current = (scheme, tuple(params or default_params)) # 새 해시에 쓰는 (알고리즘, 비용)
+        self.cache_size = cache_size # 0이면 확인 결과를 캐시하지 않음
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-kdf')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._cache_key = os.urandom(32) # 프로세스마다 새로 만듦
+        self._verified = OrderedDict() # HMAC(해시, 비밀번호) -> 확인한 시각
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.kdf_calls = 0
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=KDF_WAIT_SECONDS):
+            raise PasswordBusyError("로그인 요청이 많아 잠시 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
+        try:
+            with self._lock:
+                self.kdf_calls += 1
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _token(self, password, stored):
+        return hmac.new(self._cache_key, f'{stored}\0{password}'.encode('utf-8'), hashlib.sha256).digest()
+
+    def hash_password(self, password):
+        return self._run(hash_password_sync, password, *self.current)
+
+    def verify_password(self, password, stored):
+        """비밀번호를 확인해 (일치 여부, 다시 해시해야 하는지)를 반환합니다."""
+        if not is_hashed(stored):
+            return verify_password_sync(password, stored, self.current) # 평문 비교는 계산할 것이 없음
+        token = self._token(password, stored)
+        now = time.monotonic()
+        with self._lock:
+            verified_at = self._verified.get(token)
+            if verified_at is not None and now - verified_at < VERIFY_CACHE_TTL_SECONDS:
+                self._verified.move_to_end(token)
+                self.cache_hits += 1
+                return True, False # 캐시에는 현재 설정으로 확인에 성공한 해시만 들어 있음
+        ok, needs_rehash = self._run(verify_password_sync, password, stored, self.current)
+        if ok and not needs_rehash and self.cache_size:
+            with self._lock:
+                self._verified[token] = now
+                self._verified.move_to_end(token)
+                while len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        return ok, needs_rehash
+
+    def clear_cache(self):
+        with self._lock:
+            self._verified.clear()
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """프로세스 전체에서 공유하는 비밀번호 해시기를 반환합니다."""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+
+def hash_password(password):
+    """비밀번호를 현재 설정으로 해시합니다."""
+    return get_password_hasher().hash_password(password)
+
+
+def verify_password(password, stored):
+    """비밀번호를 확인해 (일치 여부, 다시 해시해야 하는지)를 반환합니다."""
+    return get_password_hasher().verify_password(password, stored)
@@ -0,0 +1,282 @@
+"""모든 사용자의 기록을 모아 작품별 인기(기록 수, 평점 합계)를 집계합니다. ('✨ 인기 작품 보기' 페이지)
+
+페이지를 열 때마다 모든 사용자의 기록을 읽지 않도록 집계 결과를 SQLite에 유지합니다.
+RECORD_APP_POPULARITY_DB 경로(기본값: 데이터 폴더의 popularity.db)에 저장합니다.
+
+- 평균 평점은 평점을 매긴 기록만으로 계산합니다. (평점 없이 가져온 기록은 기록 수에만 셈)
+- 작품은 (종류, 제목)으로 구분합니다. 제목은 공백/대소문자를 무시합니다. ("기생충", " 기생충 " -> 같은 작품)
+- add_record(): 기록을 저장할 때마다 그 기록 하나만 반영합니다. 같은 기록 ID는 한 번만 셉니다.
+- 기록 날짜별 집계(daily)와 기간별 합계(window_totals: 'day', 'week', 'all')를 함께 고칩니다.
+  합계 테이블에 (기간, 기록 수, 평점 합계) 인덱스가 있어 top_k()는 인덱스 앞부분 k개만 읽습니다.
+- 'day', 'week' 합계는 날짜가 바뀌면 처음 조회할 때 최근 7일치 daily에서 한 번 다시 계산합니다.
+- python popularity.py --rebuild 로 모든 사용자의 기록에서 집계를 새로 만들 수 있습니다. (복구용)
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+from data_layout import data_path
+from locking import file_lock
+from storage import get_storage
+
+POPULARITY_DB_FILE = os.environ.get('RECORD_APP_POPULARITY_DB', data_path('popularity.db'))
+POPULARITY_WINDOWS = {'day': 1, 'week': 7, 'all': None} # 기간 이름 -> 포함할 날짜 수 (None이면 전체)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    work_key TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL -- 처음 기록된 제목을 화면에 표시
+);
+CREATE TABLE IF NOT EXISTS counted_records ( -- 이미 센 기록 (중복 집계 방지, 삭제 시 되돌리기용)
+    record_id TEXT PRIMARY KEY,
+    work_key TEXT NOT NULL,
+    day TEXT NOT NULL,
+    rating INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily (
+    work_key TEXT NOT NULL,
+    day TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    rating_sum INTEGER NOT NULL,
+    PRIMARY KEY (work_key, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_daily_day ON daily(day);
+CREATE TABLE IF NOT EXISTS window_totals (
+    window TEXT NOT NULL,
+    work_key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    rating_sum INTEGER NOT NULL,
+    PRIMARY KEY (window, work_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_window_totals_rank ON window_totals(window, count DESC, rating_sum DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# _SCHEMA 다음에 적용할 마이그레이션 목록입니다. PRAGMA user_version에 적용된 개수를 기록합니다.
+_MIGRATIONS = [
+    """
+    -- 평점을 매긴 기록 수 (평균 평점의 분모)
+    ALTER TABLE daily ADD COLUMN rated_count INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE window_totals ADD COLUMN rated_count INTEGER NOT NULL DEFAULT 0;
+    UPDATE daily SET rated_count = (
+        SELECT COUNT(*) FROM counted_records AS c WHERE c.work_key = daily.work_key AND c.day = daily.day AND c.rating > 0
+    );
+    UPDATE window_totals SET rated_count = (
+        SELECT COALESCE(SUM(d.rated_count), 0) FROM daily AS d WHERE d.work_key = window_totals.work_key
+    ) WHERE window = 'all';
+    DELETE FROM meta WHERE name = 'windows_day'; -- 'day', 'week' 합계는 다음 조회 때 다시 계산
+    """,
+]
+
+
+def work_key(record_type, title):
+    """작품을 구분하는 키를 만듭니다. 제목의 공백/대소문자는 무시합니다."""
+    return f"{record_type}:{' '.join((title or '').split()).casefold()}"
+
+
+def _record_day(record):
+    return (record.get('recorded_date') or '')[:10] or date.today().isoformat()
+
+
+def _window_start(window, today):
+    days = POPULARITY_WINDOWS[window]
+    return None if days is None else (today - timedelta(days=days - 1)).isoformat()
+
+
+class PopularityIndex:
+    """작품별 인기 집계입니다. 연결은 스레드(세션)별로 만듭니다."""
+
+    def __init__(self, path=POPULARITY_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._migrate(self._conn())
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn):
+        if conn.execute("PRAGMA user_version").fetchone()[0] == len(_MIGRATIONS):
+            return
+        with file_lock(self.path): # 여러 프로세스가 같은 마이그레이션을 두 번 적용하지 않도록
+            with conn:
+                conn.executescript(_SCHEMA)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for i, script in enumerate(_MIGRATIONS[version:], start=version + 1):
+                with conn:
+                    conn.executescript(script)
+                    conn.execute(f"PRAGMA user_version={i}")
+
+    def _windows_for(self, conn, day):
+        """day에 기록된 항목이 들어가야 하는 기간 목록을 반환합니다. (day/week 합계가 오늘 기준일 때만)"""
+        windows = ['all']
+        row = conn.execute("SELECT value FROM meta WHERE name = 'windows_day'").fetchone()
+        if row is not None:
+            today = date.fromisoformat(row[0])
+            windows += [w for w in ('day', 'week') if day >= _window_start(w, today)]
+        return windows
+
+    def _apply(self, conn, key, day, rating, sign):
+        rated = sign if rating else 0 # 평점 없는 기록(0)은 평균의 분모에서 뺌
+        conn.execute(
+            "INSERT INTO daily (work_key, day, count, rating_sum, rated_count) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (work_key, day) DO UPDATE SET count = count + excluded.count, "
+            "rating_sum = rating_sum + excluded.rating_sum, rated_count = rated_count + excluded.rated_count",
+            (key, day, sign, sign * rating, rated)
+        )
+        for window in self._windows_for(conn, day):
+            conn.execute(
+                "INSERT INTO window_totals (window, work_key, count, rating_sum, rated_count) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (window, work_key) DO UPDATE SET count = count + excluded.count, "
+                "rating_sum = rating_sum + excluded.rating_sum, rated_count = rated_count + excluded.rated_count",
+                (window, key, sign, sign * rating, rated)
+            )
+        if sign < 0:
+            conn.execute("DELETE FROM daily WHERE work_key = ? AND day = ? AND count <= 0", (key, day))
+            conn.execute("DELETE FROM window_totals WHERE work_key = ? AND count <= 0", (key,))
+
+    def _add(self, conn, record):
+        key = work_key(record.get('type'), record.get('title'))
+        day = _record_day(record)
+        rating = record.get('rating') or 0
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO counted_records (record_id, work_key, day, rating) VALUES (?, ?, ?, ?)",
+            (record['id'], key, day, rating)
+        )
+        if cur.rowcount == 0:
+            return # 이미 센 기록
+        conn.execute(
+            "INSERT OR IGNORE INTO works (work_key, type, title) VALUES (?, ?, ?)",
+            (key, record.get('type') or '', (record.get('title') or '').strip())
+        )
+        self._apply(conn, key, day, rating, 1)
+
+    def add_record(self, record):
+        """기록 하나를 집계에 반영합니다."""
+        conn = self._conn()
+        with conn:
+            self._add(conn, record)
+
+    def add_records(self, records):
+        """기록 여러 개를 한 트랜잭션으로 집계에 반영합니다. (가져오기용)"""
+        conn = self._conn()
+        with conn:
+            for record in records:
+                self._add(conn, record)
+
+    def remove_record(self, record_id):
+        """기록 하나를 집계에서 뺍니다. 센 적 없는 기록이면 아무것도 하지 않습니다."""
+        conn = self._conn()
+        with conn:
+            row = conn.execute(
+                "SELECT work_key, day, rating FROM counted_records WHERE record_id = ?", (record_id,)
+            ).fetchone()
+            if row is None:
+                return
+            conn.execute("DELETE FROM counted_records WHERE record_id = ?", (record_id,))
+            self._apply(conn, *row, -1)
+
+    def _refresh_windows(self, conn, today):
+        """'day', 'week' 합계를 today 기준으로 daily에서 다시 계산합니다."""
+        for window in ('day', 'week'):
+            conn.execute("DELETE FROM window_totals WHERE window = ?", (window,))
+            conn.execute(
+                "INSERT INTO window_totals (window, work_key, count, rating_sum, rated_count) "
+                "SELECT ?, work_key, SUM(count), SUM(rating_sum), SUM(rated_count) FROM daily WHERE day >= ? GROUP BY work_key",
+                (window, _window_start(window, today))
+            )
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('windows_day', ?)", (today.isoformat(),))
+
+    def top_k(self, window='week', k=10, record_type=None, today=None):
+        """기간 안에서 기록 수가 많은 작품 k개를 반환합니다. (같으면 평점 합계 순)
+
+        반환값: [{'type', 'title', 'count', 'avg_rating'}, ...] (평점을 매긴 기록이 없으면 avg_rating은 None)
+        """
+        if window not in POPULARITY_WINDOWS:
+            raise ValueError(f"알 수 없는 기간입니다: {window}")
+        today = today or date.today()
+        conn = self._conn()
+        if window != 'all':
+            row = conn.execute("SELECT value FROM meta WHERE name = 'windows_day'").fetchone()
+            if row is None or row[0] != today.isoformat():
+                with conn:
+                    self._refresh_windows(conn, today)
+        query = (
+            "SELECT works.type, works.title, t.count, t.rating_sum, t.rated_count FROM window_totals AS t "
+            "JOIN works ON works.work_key = t.work_key WHERE t.window = ?"
+        )
+        params = [window]
+        if record_type:
+            query += " AND works.type = ?" # 종류별로 보면 인덱스를 따라 읽으며 다른 종류를 건너뜀
+            params.append(record_type)
+        query += " ORDER BY t.count DESC, t.rating_sum DESC LIMIT ?"
+        rows = conn.execute(query, params + [k])
+        return [
+            {'type': record_type_, 'title': title, 'count': count, 'avg_rating': rating_sum / rated if rated else None}
+            for record_type_, title, count, rating_sum, rated in rows
+        ]
+
+    def rebuild(self, records_by_user):
+        """집계를 모두 지우고 records_by_user ((username, records) 목록)에서 새로 만듭니다. 반영한 기록 수를 반환합니다."""
+        conn = self._conn()
+        total = 0
+        with conn:
+            for table in ('works', 'counted_records', 'daily', 'window_totals', 'meta'):
+                conn.execute(f"DELETE FROM {table}")
+            for _, records in records_by_user:
+                for record in records:
+                    self._add(conn, record)
+                    total += 1
+        return total
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_popularity_index():
+    """프로세스 전체에서 공유하는 인기 집계를 반환합니다."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PopularityIndex()
+    return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="인기 작품 집계 관리 도구")
+    parser.add_argument('--rebuild', action='store_true', help="모든 사용자의 기록에서 집계를 새로 만듭니다.")
+    parser.add_argument('--top', choices=list(POPULARITY_WINDOWS), help="해당 기간의 인기 작품을 출력합니다.")
+    parser.add_argument('-k', type=int, default=10, help="출력할 작품 수")
+    args = parser.parse_args()
+
+    index = get_popularity_index()
+    if args.rebuild:
+        storage = get_storage()
+        started = time.perf_counter()
+        total = index.rebuild((username, storage.load_user_records(username)) for username in storage.load_users())
+        print(f"기록 {total}건을 집계했습니다. ({time.perf_counter() - started:.2f}초)")
+    if args.top:
+        started = time.perf_counter()
+        works = index.top_k(args.top, args.k)
+        print(f"{len(works)}개 ({(time.perf_counter() - started) * 1000:.1f}ms)")
+        for rank, work in enumerate(works, start=1):
+            average = f"평균 {work['avg_rating']:.1f}점" if work['avg_rating'] is not None else "평점 없음"
+            print(f"{rank}. [{work['type']}] {work['title']} - {work['count']}건, {average}")
+
+
+if __name__ == "__main__":
+    main()
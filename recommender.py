@@ -0,0 +1,255 @@
+"""사용자들의 평점으로 "이 작품을 높게 평가한 사람들이 좋아한 작품"을 추천합니다.
+
+- 모든 사용자의 기록에서 사용자 x 작품 희소 행렬(scipy.sparse)을 만듭니다. 작품은 popularity.work_key로 구분합니다.
+  LIKE_THRESHOLD점 이상 평점만 '좋아함'으로 보고, 5점은 4점보다 조금 더 무겁게 셉니다.
+- 작품-작품 코사인 유사도를 행렬 곱으로 한 번에 계산합니다. 작품 수가 많아도 메모리가 넘치지 않도록
+  작품을 블록으로 나눠 (블록 x 전체 작품) 유사도를 희소 행렬 그대로 구하고, 정렬 한 번으로 작품마다 상위 k개를 고릅니다.
+  함께 좋아한 사람이 적은 쌍은 n / (n + SIMILARITY_SHRINKAGE)를 곱해 점수를 낮춥니다.
+- 작품마다 상위 RECOMMEND_TOP_K개 이웃을 RECORD_APP_RECOMMEND_FILE(기본값: 데이터 폴더의 recommendations.npz)에
+  저장합니다. 조회는 저장된 표에서 한 줄을 읽는 것뿐이라 수 밀리초 안에 끝납니다.
+  다른 프로세스가 파일을 새로 만들면 다음 조회 때 다시 읽습니다.
+- 기록이 추가되면 mark_changed()로 알려 주고, 바뀐 기록이 REBUILD_AFTER_CHANGES개를 넘었거나 바뀐 기록이 있는 채로
+  마지막으로 만든 지 REBUILD_INTERVAL_SECONDS가 지났으면 백그라운드 스레드에서 다시 계산합니다.
+  (바뀐 것이 없으면 다시 계산하지 않음) 계산하는 동안에는 이전 결과를 그대로 씁니다.
+  다시 계산하다 실패하면 오류를 기록하고 바뀐 기록 수를 되돌려 REBUILD_RETRY_SECONDS 뒤에 다시 시도합니다.
+- python recommender.py --rebuild 로 바로 다시 만들고, --similar "영화:기생충" 으로 결과를 확인할 수 있습니다.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+from data_cache import file_identity
+from data_layout import data_path
+from locking import file_lock
+from popularity import work_key
+from storage import get_storage
+
+RECOMMEND_FILE = os.environ.get('RECORD_APP_RECOMMEND_FILE', data_path('recommendations.npz'))
+REBUILD_INTERVAL_SECONDS = float(os.environ.get('RECORD_APP_RECOMMEND_REBUILD_SECONDS', '600'))
+REBUILD_AFTER_CHANGES = 50
+REBUILD_RETRY_SECONDS = 60 # 다시 만들기에 실패하면 이 시간 동안은 다시 시도하지 않음
+RECOMMEND_TOP_K = 20 # 작품마다 저장할 이웃 수
+LIKE_THRESHOLD = 4 # 이 점수 이상을 '좋아함'으로 봄
+SIMILARITY_SHRINKAGE = 2.0
+BLOCK_BYTES = 64 * 1024 * 1024 # 한 번에 만들 유사도 블록 크기 상한
+
+logger = logging.getLogger(__name__)
+
+
+def _like_weight(rating):
+    return (rating or 0) - LIKE_THRESHOLD + 1 if (rating or 0) >= LIKE_THRESHOLD else 0 # 4점 -> 1, 5점 -> 2
+
+
+def build_matrix(records_by_user):
+    """(username, records) 목록으로 (사용자 x 작품 CSR 행렬, 작품 키 목록, 작품 정보 목록)을 만듭니다."""
+    item_index = {}
+    items = [] # (종류, 제목)
+    rows, cols, values = [], [], []
+    for user_row, (_, records) in enumerate(records_by_user):
+        liked = {}
+        for record in records:
+            weight = _like_weight(record.get('rating'))
+            if not weight:
+                continue
+            key = work_key(record.get('type'), record.get('title'))
+            col = item_index.get(key)
+            if col is None:
+                col = item_index[key] = len(items)
+                items.append((record.get('type') or '', (record.get('title') or '').strip()))
+            liked[col] = max(liked.get(col, 0), weight) # 같은 작품을 여러 번 기록했으면 가장 높은 평점
+        rows.extend([user_row] * len(liked))
+        cols.extend(liked)
+        values.extend(liked.values())
+    shape = ((rows[-1] + 1) if rows else 0, len(items))
+    matrix = sparse.csr_matrix((np.asarray(values, dtype=np.float32), (rows, cols)), shape=shape)
+    return matrix, list(item_index), items
+
+
+def top_k_neighbors(matrix, k=RECOMMEND_TOP_K, shrinkage=SIMILARITY_SHRINKAGE, block_bytes=BLOCK_BYTES):
+    """작품마다 코사인 유사도가 높은 작품 k개의 (번호 배열, 점수 배열)을 반환합니다. 이웃이 부족하면 -1, 0으로 채웁니다."""
+    n_items = matrix.shape[1]
+    k = min(k, max(n_items - 1, 0))
+    neighbors = np.full((n_items, k), -1, dtype=np.int32)
+    scores = np.zeros((n_items, k), dtype=np.float32)
+    if n_items == 0 or k == 0:
+        return neighbors, scores
+
+    by_item = matrix.T.tocsr() # 작품 x 사용자
+    binary = by_item.copy()
+    binary.data[:] = 1
+    norms = np.sqrt(np.asarray(by_item.multiply(by_item).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    block = max(1, block_bytes // (n_items * 24)) # 최악의 경우(모든 쌍이 0이 아님)에도 블록이 block_bytes 안에 들어가도록
+    for start in range(0, n_items, block):
+        stop = min(start + block, n_items)
+        # 두 곱은 0이 아닌 위치가 같으므로 정렬하면 data가 같은 (작품, 작품) 쌍끼리 맞춰짐
+        dot = by_item[start:stop] @ by_item.T
+        together = binary[start:stop] @ binary.T # 두 작품을 함께 좋아한 사람 수
+        dot.sort_indices()
+        together.sort_indices()
+        rows = np.repeat(np.arange(start, stop), np.diff(dot.indptr))
+        cols = dot.indices
+        sim = dot.data / (norms[rows] * norms[cols]) * (together.data / (together.data + shrinkage))
+        keep = (cols != rows) & (sim > 0) # 자기 자신 제외
+        rows, cols, sim = rows[keep], cols[keep], sim[keep]
+        order = np.lexsort((-sim, rows)) # 작품별로, 점수 높은 순
+        rows, cols, sim = rows[order], cols[order], sim[order]
+        first = np.searchsorted(rows, rows) # 같은 작품 안에서의 순위 = 위치 - 그 작품의 첫 위치
+        rank = np.arange(len(rows)) - first
+        top = rank < k
+        neighbors[rows[top], rank[top]] = cols[top]
+        scores[rows[top], rank[top]] = sim[top]
+    return neighbors, scores
+
+
+class Recommender:
+    """저장된 이웃 표로 비슷한 작품을 찾고, 필요하면 백그라운드에서 표를 다시 만듭니다."""
+
+    def __init__(self, path=RECOMMEND_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._model = None # (파일 버전, 작품 번호 딕셔너리, 종류 배열, 제목 배열, 이웃, 점수, 만든 시각)
+        self._changes = 0
+        self._rebuilding = False
+        self._failed_at = None # 마지막으로 다시 만들기에 실패한 시각
+
+    def _load(self):
+        """파일이 바뀌었으면 다시 읽고 현재 모델을 반환합니다. 파일이 없으면 None입니다."""
+        version = file_identity(self.path)
+        model = self._model
+        if model is not None and model[0] == version:
+            return model
+        if version is None:
+            return None
+        with np.load(self.path) as data:
+            keys = data['keys'].tolist()
+            model = (version, {key: i for i, key in enumerate(keys)}, data['types'].tolist(), data['titles'].tolist(),
+                     data['neighbors'], data['scores'], float(data['built_at']))
+        self._model = model
+        return model
+
+    def similar_works(self, record_type, title, k=5, exclude=()):
+        """(종류, 제목) 작품과 비슷한 작품 목록 [{'type', 'title', 'score'}, ...]을 반환합니다.
+
+        exclude에 있는 work_key(이미 기록한 작품 등)는 빼고 고릅니다.
+        """
+        self.maybe_rebuild_async()
+        model = self._load()
+        if model is None:
+            return []
+        _, index, types, titles, neighbors, scores = model[:6]
+        row = index.get(work_key(record_type, title))
+        if row is None:
+            return []
+        exclude = set(exclude)
+        results = []
+        for neighbor, score in zip(neighbors[row].tolist(), scores[row].tolist()):
+            if neighbor < 0:
+                break
+            if work_key(types[neighbor], titles[neighbor]) in exclude:
+                continue
+            results.append({'type': types[neighbor], 'title': titles[neighbor], 'score': score})
+            if len(results) == k:
+                break
+        return results
+
+    def rebuild(self, records_by_user=None):
+        """모든 사용자의 기록으로 이웃 표를 새로 만들어 저장하고 (사용자 수, 작품 수)를 반환합니다."""
+        if records_by_user is None:
+            storage = get_storage()
+            records_by_user = ((username, storage.load_user_records(username)) for username in sorted(storage.load_users()))
+        matrix, keys, items = build_matrix(records_by_user)
+        neighbors, scores = top_k_neighbors(matrix)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp.npz" # np.savez는 .npz가 아니면 이름 뒤에 붙임
+        np.savez(
+            tmp_path,
+            keys=np.array(keys, dtype=str), types=np.array([t for t, _ in items], dtype=str),
+            titles=np.array([t for _, t in items], dtype=str), neighbors=neighbors, scores=scores,
+            built_at=np.float64(time.time()),
+        )
+        os.replace(tmp_path, self.path)
+        return matrix.shape
+
+    def mark_changed(self, count=1):
+        """기록이 추가/변경되었음을 알립니다."""
+        with self._lock:
+            self._changes += count
+
+    def _needs_rebuild(self):
+        if self._failed_at is not None and time.monotonic() - self._failed_at < REBUILD_RETRY_SECONDS:
+            return False
+        model = self._load()
+        if model is None:
+            return True
+        if self._changes >= REBUILD_AFTER_CHANGES:
+            return True
+        return self._changes > 0 and time.time() - model[6] >= REBUILD_INTERVAL_SECONDS
+
+    def maybe_rebuild_async(self):
+        """다시 만들 때가 되었으면 백그라운드 스레드에서 다시 만듭니다. (이미 만드는 중이면 아무것도 안 함)"""
+        with self._lock:
+            if self._rebuilding or not self._needs_rebuild():
+                return
+            self._rebuilding = True
+            changes, self._changes = self._changes, 0
+        threading.Thread(target=self._rebuild_in_background, args=(changes,), name='recommender-rebuild',
+                         daemon=True).start()
+
+    def _rebuild_in_background(self, changes):
+        try:
+            with file_lock(self.path): # 여러 프로세스가 동시에 만들지 않도록 함
+                model = self._load()
+                if model is None or time.time() - model[6] >= 1: # 기다리는 동안 다른 프로세스가 방금 만들었으면 건너뜀
+                    self.rebuild()
+        except Exception: # 데이터 오류 등 어떤 실패든 다음 시도를 미루고 바뀐 기록 수를 되돌림
+            logger.exception("추천 표를 다시 만들지 못했습니다. %s초 뒤에 다시 시도합니다.", REBUILD_RETRY_SECONDS)
+            with self._lock:
+                self._changes += max(changes, 1) # 바뀐 기록 수를 되돌려 다시 시도 조건을 유지
+                self._failed_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+
+_recommender = None
+_recommender_lock = threading.Lock()
+
+
+def get_recommender():
+    """프로세스 전체에서 공유하는 추천기를 반환합니다."""
+    global _recommender
+    if _recommender is None:
+        with _recommender_lock:
+            if _recommender is None:
+                _recommender = Recommender()
+    return _recommender
+
+
+def main():
+    parser = argparse.ArgumentParser(description="비슷한 작품 추천 관리 도구")
+    parser.add_argument('--rebuild', action='store_true', help="모든 사용자의 기록으로 추천 표를 새로 만듭니다.")
+    parser.add_argument('--similar', help="'종류:제목' 작품과 비슷한 작품을 출력합니다. (예: 영화:기생충)")
+    parser.add_argument('-k', type=int, default=10, help="출력할 작품 수")
+    args = parser.parse_args()
+
+    recommender = Recommender()
+    if args.rebuild:
+        started = time.perf_counter()
+        users, items = recommender.rebuild()
+        print(f"사용자 {users}명, 작품 {items}개로 추천 표를 만들었습니다. ({time.perf_counter() - started:.2f}초)")
+    if args.similar:
+        record_type, _, title = args.similar.partition(':')
+        started = time.perf_counter()
+        works = recommender.similar_works(record_type, title, args.k)
+        print(f"{len(works)}개 ({(time.perf_counter() - started) * 1000:.2f}ms)")
+        for rank, work in enumerate(works, start=1):
+            print(f"{rank}. [{work['type']}] {work['title']} ({work['score']:.3f})")
+
+
+if __name__ == "__main__":
+    main()
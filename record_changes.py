@@ -0,0 +1,61 @@
+"""기록을 추가/수정/삭제할 때 저장소와 그 기록에서 파생된 색인·집계를 함께 고칩니다.
+
+화면(test.py), 가져오기 도구(record_io.py), 정보 채우기(enrichment.py)가 모두 이 함수들을 거치므로
+파생 데이터를 하나 더 만들 때는 여기만 고치면 됩니다.
+- 저장소: 바뀐 기록만 로그에 추가 (전체를 다시 쓰지 않음)
+- 통계(record_stats): 추가된 기록만 캐시된 통계에 더함. 수정/삭제는 묶음 버전이 바뀌어 다음에 다시 계산
+- 검색 색인(record_search), 인기 집계(popularity), 자동 완성(title_index): 바뀐 기록만 반영
+- 공유방 스냅샷(room_snapshots): 고친 기록이 들어 있는 공유방만 다시 만듦 (지운 기록은 저장소가 함께 뺌)
+- 추천 표(recommender): 바뀐 기록 수만 세어 두고 충분히 쌓이면 백그라운드에서 다시 계산
+"""
+import record_stats
+from popularity import get_popularity_index
+from recommender import get_recommender
+from record_search import get_record_index
+from room_snapshots import update_shared_records
+from storage import get_storage
+from title_index import get_title_index
+
+
+def add_user_records(username, records):
+    """기록 여러 개를 추가합니다. 저장소, 통계, 색인, 집계를 각각 한 번에 처리합니다."""
+    if not records:
+        return
+    versions = get_storage().append_user_records(username, records)
+    record_stats.add_records(username, records, *versions) # 통계도 추가된 기록만 더함
+    get_record_index().add_records(username, records)
+    get_popularity_index().add_records(records)
+    get_title_index().add_records(records)
+    get_recommender().mark_changed(len(records))
+
+
+def update_user_records(username, records):
+    """같은 ID의 기록을 고칩니다. 실제로 고친 기록 수를 반환합니다. (없는 ID는 건너뜀)"""
+    storage = get_storage()
+    updated = storage.update_user_records(username, records)
+    if not updated:
+        return 0
+    if updated < len(records): # 없는 ID가 섞여 있었으면 그 기록은 색인에 넣지 않음
+        records = [record for record in records if storage.get_user_record(username, record['id']) is not None]
+    get_record_index().add_records(username, records) # 같은 ID의 예전 색인은 바뀜
+    popularity = get_popularity_index()
+    for record in records: # 작품이나 평점이 바뀌었을 수 있으므로 빼고 다시 셈
+        popularity.remove_record(record['id'])
+    popularity.add_records(records)
+    get_title_index().add_records(records)
+    update_shared_records(records) # 이 기록이 들어 있는 공유방 스냅샷만 고침
+    get_recommender().mark_changed(updated)
+    return updated
+
+
+def delete_user_records(username, record_ids):
+    """기록을 지웁니다. 이 기록을 공유한 공유방에서도 함께 빠집니다. 실제로 지운 기록 수를 반환합니다."""
+    deleted = get_storage().delete_user_records(username, record_ids) # 공유방 스냅샷에서도 같은 잠금 안에서 뺌
+    if not deleted:
+        return 0
+    index, popularity = get_record_index(), get_popularity_index()
+    for record_id in record_ids:
+        index.remove_record(record_id)
+        popularity.remove_record(record_id)
+    get_recommender().mark_changed(deleted)
+    return deleted
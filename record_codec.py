@@ -0,0 +1,272 @@
+"""기록 리스트를 파일에 저장하는 형식(직렬화)을 고를 수 있게 합니다.
+
+RecordLog(record_log.py)는 압축(compaction)할 때 살아 있는 기록 전체를 여기 있는 형식 중 하나로 스냅샷 파일에 씁니다.
+RECORD_APP_RECORD_FORMAT 환경 변수로 고르며, 기본값 'json'은 예전처럼 스냅샷 없이 JSON Lines 로그만 씁니다.
+
+- 'json': 한 줄 JSON 배열. 사람이 읽을 수 있고 다른 도구로 내보내기 좋습니다.
+- 'columnar': 이 모듈의 열(column) 단위 바이너리 형식. 기록이 많을수록 작고 빨리 읽힙니다.
+- 'msgpack': msgpack 패키지가 설치되어 있을 때만 사용할 수 있습니다.
+
+columnar 형식 (모든 정수는 리틀 엔디안, 각 구역은 8바이트 경계에 맞춤)
+    헤더: b'RCOL', 버전(u8), 빈칸 3바이트, 기록 수(u32), 열 수(u32)
+    열마다: 이름 길이(u32), 이름(UTF-8), 종류(u8), 플래그(u8), 값 개수(u32),
+            [플래그에 상태가 있으면] 기록마다 상태 1바이트 (0: 키 없음, 1: None, 2: 값 있음)
+            종류별 값 데이터
+    - 'str': 문자 오프셋(u32, 값 개수+1개) + 모든 값을 이어 붙인 UTF-8 텍스트
+    - 'dict': 고유 값 개수(u32) + 고유 값의 'str' 데이터 + 값마다 고유 값 번호(u16 또는 u32)
+      (type, genre, director_author처럼 같은 값이 반복되는 열. 같은 문자열 객체를 공유하므로 메모리도 덜 씀)
+    - 'int': i64 배열, 'float': f64 배열
+    - 'json': 섞인 타입 등 나머지 값은 값마다 JSON 텍스트로 'str'처럼 저장
+읽을 때는 파일을 mmap으로 열고 오프셋/번호/숫자 배열은 복사하지 않고 memoryview로 바로 읽습니다.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+try:
+    import msgpack
+except ImportError: # msgpack이 없으면 'msgpack' 형식만 쓸 수 없음
+    msgpack = None
+
+RECORD_FORMAT = os.environ.get('RECORD_APP_RECORD_FORMAT', 'json')
+
+_MAGIC = b'RCOL'
+_VERSION = 1
+_HEADER = struct.Struct('<4sB3xII')
+_COLUMN_HEADER = struct.Struct('<BBxxI')
+_U32 = struct.Struct('<I')
+
+_KIND_STR, _KIND_DICT, _KIND_INT, _KIND_FLOAT, _KIND_JSON = range(5)
+_FLAG_STATES = 1 # 모든 기록에 값이 있지 않아 상태 바이트가 있음
+_FLAG_WIDE_CODES = 2 # 고유 값 번호가 u32
+
+_STATE_MISSING, _STATE_NONE, _STATE_VALUE = 0, 1, 2
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+_MISSING = object()
+
+
+class JsonSerializer:
+    name = 'json'
+
+    def dumps(self, records):
+        return json.dumps(records, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(bytes(data))
+
+
+class MsgpackSerializer:
+    name = 'msgpack'
+
+    def dumps(self, records):
+        return msgpack.packb(records, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False) # mmap/memoryview를 그대로 받음
+
+
+# --- columnar ---
+def _pad(out):
+    out.extend(b'\0' * (-len(out) % 8))
+
+
+def _le_array(typecode, values):
+    """values를 리틀 엔디안 바이트로 만듭니다."""
+    arr = array(typecode, values)
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _write_strings(out, values):
+    """문자열 목록을 문자 단위 오프셋 + 이어 붙인 UTF-8 텍스트로 씁니다."""
+    offsets = [0]
+    for value in values:
+        offsets.append(offsets[-1] + len(value))
+    text = ''.join(values).encode('utf-8')
+    out += _le_array('I', offsets)
+    out += _U32.pack(len(text))
+    out += text
+    _pad(out)
+
+
+def _column_kind(values):
+    """값 목록(None 제외)을 저장할 종류를 고릅니다."""
+    if all(type(v) is str for v in values):
+        # 고유 값이 절반 이하이면 사전 압축이 이득
+        return _KIND_DICT if len(set(values)) <= max(1, len(values) // 2) else _KIND_STR
+    if all(type(v) is int and _INT64_MIN <= v <= _INT64_MAX for v in values): # bool은 제외됨
+        return _KIND_INT
+    if all(type(v) is float for v in values):
+        return _KIND_FLOAT
+    return _KIND_JSON
+
+
+class ColumnarSerializer:
+    name = 'columnar'
+
+    def dumps(self, records):
+        names = {}
+        for record in records: # 처음 나온 순서대로 열을 정해 키 순서를 유지
+            for key in record:
+                names.setdefault(key, None)
+        out = bytearray(_HEADER.pack(_MAGIC, _VERSION, len(records), len(names)))
+        for name in names:
+            column = [record.get(name, _MISSING) for record in records]
+            states = bytes(
+                _STATE_MISSING if v is _MISSING else _STATE_NONE if v is None else _STATE_VALUE for v in column
+            )
+            values = [v for v in column if v is not _MISSING and v is not None]
+            kind = _column_kind(values)
+            flags = 0 if len(values) == len(records) else _FLAG_STATES
+
+            if kind == _KIND_DICT:
+                uniques = list(dict.fromkeys(values))
+                if len(uniques) > 0xFFFF:
+                    flags |= _FLAG_WIDE_CODES
+            encoded_name = name.encode('utf-8')
+            out += _U32.pack(len(encoded_name)) + encoded_name
+            _pad(out)
+            out += _COLUMN_HEADER.pack(kind, flags, len(values))
+            if flags & _FLAG_STATES:
+                out += states
+                _pad(out)
+
+            if kind == _KIND_STR:
+                _write_strings(out, values)
+            elif kind == _KIND_DICT:
+                out += _U32.pack(len(uniques))
+                _pad(out)
+                _write_strings(out, uniques)
+                index = {value: i for i, value in enumerate(uniques)}
+                out += _le_array('I' if flags & _FLAG_WIDE_CODES else 'H', [index[v] for v in values])
+                _pad(out)
+            elif kind == _KIND_INT:
+                out += _le_array('q', values)
+            elif kind == _KIND_FLOAT:
+                out += _le_array('d', values)
+            else:
+                _write_strings(out, [json.dumps(v, ensure_ascii=False, separators=(',', ':')) for v in values])
+        return bytes(out)
+
+    def loads(self, data):
+        views = [] # mmap을 닫을 수 있도록 끝나면 모두 놓아줌
+        try:
+            return self._decode(data, views)
+        finally:
+            for view in reversed(views):
+                view.release()
+
+    def _decode(self, data, views):
+        buf = memoryview(data)
+        views.append(buf)
+        magic, version, count, column_count = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("columnar 형식이 아니거나 지원하지 않는 버전입니다.")
+        pos = _HEADER.size
+
+        def take(size):
+            nonlocal pos
+            view = buf[pos:pos + size]
+            views.append(view)
+            pos += size
+            return view
+
+        def align():
+            nonlocal pos
+            pos += -pos % 8
+
+        def numbers(typecode, n):
+            size = array(typecode).itemsize
+            view = take(size * n)
+            if sys.byteorder == 'little':
+                numbers = view.cast(typecode) # 복사 없이 mmap을 그대로 읽음
+                views.append(numbers)
+                return numbers
+            arr = array(typecode, view.tobytes())
+            arr.byteswap()
+            return arr
+
+        def strings(n):
+            offsets = numbers('I', n + 1)
+            (size,) = _U32.unpack_from(buf, pos)
+            take(_U32.size)
+            text = str(take(size), 'utf-8')
+            align()
+            return [text[offsets[i]:offsets[i + 1]] for i in range(n)]
+
+        columns = []
+        for _ in range(column_count):
+            (name_size,) = _U32.unpack_from(buf, pos)
+            take(_U32.size)
+            name = str(take(name_size), 'utf-8')
+            align()
+            kind, flags, value_count = _COLUMN_HEADER.unpack_from(buf, pos)
+            take(_COLUMN_HEADER.size)
+            states = None
+            if flags & _FLAG_STATES:
+                states = take(count)
+                align()
+
+            if kind == _KIND_STR:
+                values = strings(value_count)
+            elif kind == _KIND_DICT:
+                (unique_count,) = _U32.unpack_from(buf, pos)
+                take(_U32.size)
+                align()
+                uniques = strings(unique_count)
+                codes = numbers('I' if flags & _FLAG_WIDE_CODES else 'H', value_count)
+                values = list(map(uniques.__getitem__, codes))
+                align()
+            elif kind == _KIND_INT:
+                values = numbers('q', value_count).tolist()
+            elif kind == _KIND_FLOAT:
+                values = numbers('d', value_count).tolist()
+            elif kind == _KIND_JSON:
+                values = [json.loads(v) for v in strings(value_count)]
+            else:
+                raise ValueError(f"알 수 없는 열 종류입니다: {kind}")
+
+            if states is not None:
+                it = iter(values)
+                values = [
+                    next(it) if state == _STATE_VALUE else None if state == _STATE_NONE else _MISSING
+                    for state in states
+                ]
+            columns.append((name, values, states is not None and _STATE_MISSING in states))
+
+        names = [name for name, _, _ in columns]
+        records = [dict(zip(names, row)) for row in zip(*(values for _, values, _ in columns))]
+        if not columns:
+            records = [{} for _ in range(count)]
+        for name, values, has_missing in columns:
+            if has_missing: # 원래 키가 없던 기록에서는 키를 지움
+                for record, value in zip(records, values):
+                    if value is _MISSING:
+                        del record[name]
+        return records
+
+
+SERIALIZERS = {'json': JsonSerializer(), 'columnar': ColumnarSerializer()}
+if msgpack is not None:
+    SERIALIZERS['msgpack'] = MsgpackSerializer()
+
+
+def get_serializer(name=None):
+    """이름에 해당하는 직렬화 형식을 반환합니다. (기본값: RECORD_APP_RECORD_FORMAT)"""
+    name = name or RECORD_FORMAT
+    if name not in SERIALIZERS:
+        raise ValueError(f"사용할 수 없는 기록 형식입니다: {name} (가능한 형식: {', '.join(SERIALIZERS)})")
+    return SERIALIZERS[name]
+
+
+def load_file(path, serializer):
+    """파일을 mmap으로 열어 기록 리스트를 읽습니다."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return serializer.loads(mm)
@@ -0,0 +1,306 @@
+"""기록을 파일에서 한꺼번에 가져오고(import) 파일로 내보냅니다(export).
+
+가져오기 형식
+- 'csv': 이 앱의 내보내기 CSV (RECORD_FIELDS 열)
+- 'jsonl': 한 줄에 기록 하나인 JSON Lines
+- 'letterboxd': Letterboxd 내보내기의 diary.csv / ratings.csv / reviews.csv / watched.csv (영화)
+- 'goodreads': Goodreads 'Export Library' CSV (책, to-read 책장은 건너뜀)
+내보내기 형식: 'csv', 'jsonl'
+
+가져오기는 파일을 한 줄(한 행)씩 읽고 IMPORT_BATCH_SIZE개씩 모아 저장하므로 파일 크기와 상관없이 메모리 사용량이 일정합니다.
+내보내기(iter_export)는 바이트 조각을 차례로 돌려주므로 명령줄 도구는 조각마다 파일에 바로 씁니다.
+화면의 내려받기 버튼은 Streamlit이 내려받을 내용 전체를 메모리에 두는 방식이라, 누를 때 파일 전체를 한 번에 만듭니다.
+이미 있는 기록이나 파일 안에서 (종류, 제목)이 같은 작품은 중복으로 세고 건너뜁니다. (popularity.work_key와 같은 정규화)
+"""
+import argparse
+import csv
+import html
+import io
+import json
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import record_changes
+from popularity import work_key
+from storage import get_storage
+
+IMPORT_FORMATS = ('csv', 'jsonl', 'letterboxd', 'goodreads')
+EXPORT_FORMATS = ('csv', 'jsonl')
+IMPORT_BATCH_SIZE = 500 # 한 번에 저장(한 트랜잭션/한 번의 fsync)할 기록 수
+MAX_REPORTED_ERRORS = 20 # 결과에 남길 오류 줄 수
+RECORD_FIELDS = ['id', 'type', 'title', 'director_author', 'release_pub_date', 'genre', 'image_url',
+                 'rating', 'review', 'recorded_date']
+RECORD_TYPES = {'영화': '영화', '책': '책', 'movie': '영화', 'film': '영화', 'book': '책'}
+_DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d')
+_HTML_BREAK = re.compile(r'<br\s*/?>', re.IGNORECASE)
+
+
+class ImportResult:
+    """가져오기 진행 상황과 결과입니다."""
+
+    def __init__(self):
+        self.rows = 0 # 읽은 행 수
+        self.imported = 0
+        self.duplicates = 0
+        self.skipped = 0 # 형식 오류, 읽을 필요 없는 행 (to-read 등)
+        self.errors = [] # "N행: 이유" (최대 MAX_REPORTED_ERRORS개)
+
+    def skip(self, reason):
+        self.skipped += 1
+        if reason and len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"{self.rows}행: {reason}")
+
+
+def _text(value):
+    """행의 값을 앞뒤 공백을 뺀 문자열로 바꿉니다. JSON 숫자 등은 글자로 바꾸고, 객체/리스트면 ValueError입니다."""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        raise ValueError(f"글자가 와야 할 자리에 {type(value).__name__} 값이 있습니다: {json.dumps(value, ensure_ascii=False)[:40]}")
+    return str(value).strip()
+
+
+def _normalize_date(text):
+    """여러 날짜 형식을 'YYYY-MM-DD HH:MM:SS'로 바꿉니다. 비어 있으면 None, 알 수 없는 형식이면 ValueError."""
+    text = _text(text)
+    if not text:
+        return None
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    raise ValueError(f"날짜 형식을 알 수 없습니다: {text}")
+
+
+def _parse_rating(value, scale_max=5):
+    """평점을 1~5 정수로 바꿉니다. 비어 있거나 0이면 None입니다. (Letterboxd 반 별점은 반올림)"""
+    if value in (None, ''):
+        return None
+    try:
+        rating = float(value) * 5 / scale_max
+    except TypeError:
+        raise ValueError(f"평점은 숫자여야 합니다: {value!r}") from None
+    if rating <= 0:
+        return None
+    if rating > 5:
+        raise ValueError(f"평점은 5점 이하여야 합니다: {value}")
+    return max(1, int(rating + 0.5))
+
+
+def _make_record(record_type, title, recorded_date=None, rating=None, **fields):
+    """가져온 값으로 기록을 만듭니다. fields의 값(감독/저자, 감상 등)은 모두 글자로 바꿉니다."""
+    title = _text(title)
+    if not title:
+        raise ValueError("제목이 없습니다.")
+    record = {
+        "id": str(uuid.uuid4()),
+        "type": record_type,
+        "title": title,
+        "director_author": '',
+        "release_pub_date": '',
+        "genre": '',
+        "image_url": '',
+        "rating": rating,
+        "review": '',
+        "recorded_date": recorded_date or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    record.update({key: text for key, text in ((key, _text(value)) for key, value in fields.items()) if text})
+    return record
+
+
+# --- 형식별 행 -> 기록 변환 (None을 반환하면 건너뛸 행) ---
+def _from_app_row(row):
+    record_type = RECORD_TYPES.get(_text(row.get('type')).lower())
+    if record_type is None:
+        raise ValueError(f"종류는 '영화' 또는 '책'이어야 합니다: {row.get('type')}")
+    return _make_record(
+        record_type, row.get('title'), _normalize_date(row.get('recorded_date')),
+        director_author=row.get('director_author'),
+        release_pub_date=row.get('release_pub_date'),
+        genre=row.get('genre'),
+        image_url=row.get('image_url'),
+        rating=_parse_rating(row.get('rating')),
+        review=row.get('review'),
+    )
+
+
+def _from_letterboxd_row(row):
+    return _make_record(
+        '영화', row.get('Name'), _normalize_date(row.get('Watched Date') or row.get('Date')),
+        release_pub_date=row.get('Year'),
+        rating=_parse_rating(row.get('Rating')),
+        review=row.get('Review'),
+        genre=row.get('Tags'),
+    )
+
+
+def _from_goodreads_row(row):
+    if _text(row.get('Exclusive Shelf')) == 'to-read':
+        return None # 아직 읽지 않은 책
+    review = _HTML_BREAK.sub('\n', _text(row.get('My Review')))
+    return _make_record(
+        '책', row.get('Title'), _normalize_date(row.get('Date Read') or row.get('Date Added')),
+        director_author=row.get('Author'),
+        release_pub_date=row.get('Original Publication Year') or row.get('Year Published'),
+        rating=_parse_rating(row.get('My Rating')),
+        review=html.unescape(review),
+    )
+
+
+_ROW_CONVERTERS = {'csv': _from_app_row, 'jsonl': _from_app_row, 'letterboxd': _from_letterboxd_row,
+                   'goodreads': _from_goodreads_row}
+
+
+def _iter_rows(text_stream, fmt):
+    """형식에 맞게 한 행씩 딕셔너리로 읽습니다. 깨진 JSON 줄은 ValueError 대신 None을 돌려줍니다."""
+    if fmt == 'jsonl':
+        for line in text_stream:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            yield row if isinstance(row, dict) else None
+    else:
+        yield from csv.DictReader(text_stream)
+
+
+def _stream_fraction(binary_stream, total):
+    if not total:
+        return None
+    try:
+        return min(1.0, binary_stream.tell() / total)
+    except (OSError, ValueError):
+        return None
+
+
+def import_records(binary_stream, fmt, existing_records, add_batch, progress=None, batch_size=IMPORT_BATCH_SIZE):
+    """binary_stream(바이트 파일)의 기록을 가져와 batch_size개씩 add_batch(기록 리스트)로 저장합니다.
+
+    existing_records는 이미 있는 기록으로, 같은 (종류, 제목)의 작품은 가져오지 않습니다.
+    progress(result, fraction)는 배치를 저장할 때마다 불립니다. fraction은 읽은 비율(0~1, 알 수 없으면 None)입니다.
+    ImportResult를 반환합니다.
+    """
+    if fmt not in _ROW_CONVERTERS:
+        raise ValueError(f"지원하지 않는 가져오기 형식입니다: {fmt}")
+    convert = _ROW_CONVERTERS[fmt]
+    total = None
+    if binary_stream.seekable():
+        start = binary_stream.tell()
+        total = binary_stream.seek(0, io.SEEK_END)
+        binary_stream.seek(start)
+    # BOM이 붙은 엑셀 CSV도 읽음. newline=''이어야 따옴표 안의 줄바꿈(여러 줄 감상)을 그대로 읽음
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    seen = {work_key(record.get('type'), record.get('title')) for record in existing_records}
+    result = ImportResult()
+    batch = []
+
+    def flush():
+        if batch:
+            add_batch(list(batch))
+            result.imported += len(batch)
+            batch.clear()
+        if progress:
+            progress(result, _stream_fraction(binary_stream, total))
+
+    try:
+        for row in _iter_rows(text_stream, fmt):
+            result.rows += 1
+            if row is None:
+                result.skip("JSON 형식이 아닙니다.")
+                continue
+            try:
+                record = convert(row)
+            except ValueError as e:
+                result.skip(str(e))
+                continue
+            if record is None:
+                result.skip(None)
+                continue
+            key = work_key(record['type'], record['title'])
+            if key in seen:
+                result.duplicates += 1
+                continue
+            seen.add(key)
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+    except (UnicodeDecodeError, csv.Error) as e:
+        result.skip(f"파일을 더 읽을 수 없습니다: {e}")
+    finally:
+        text_stream.detach() # 호출한 쪽의 파일은 닫지 않음
+    flush()
+    return result
+
+
+def iter_export(records, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """기록을 fmt 형식의 바이트 조각으로 batch_size개씩 나눠 돌려줍니다. (CSV는 엑셀에서 열 수 있도록 BOM 포함)
+
+    조각을 받는 대로 파일에 쓰면 내보낼 파일 전체를 메모리에 만들지 않습니다. (main의 export 참고)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 내보내기 형식입니다: {fmt}")
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        buffer.write('\ufeff')
+        writer = csv.DictWriter(buffer, fieldnames=RECORD_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+    for i, record in enumerate(records, start=1):
+        if writer:
+            writer.writerow(record)
+        else:
+            buffer.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if i % batch_size == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록 가져오기/내보내기 도구")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="파일에서 기록을 가져옵니다.")
+    import_parser.add_argument('username')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--format', choices=IMPORT_FORMATS, default='csv')
+    export_parser = subparsers.add_parser('export', help="기록을 파일로 내보냅니다.")
+    export_parser.add_argument('username')
+    export_parser.add_argument('path', help="'-'이면 표준 출력")
+    export_parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    args = parser.parse_args()
+
+    storage = get_storage()
+    if args.command == 'export':
+        output = sys.stdout.buffer if args.path == '-' else open(args.path, 'wb')
+        with output:
+            for chunk in iter_export(storage.load_user_records(args.username), args.format):
+                output.write(chunk)
+        return
+
+    def add_batch(records):
+        record_changes.add_user_records(args.username, records) # 화면에서 가져올 때와 같이 통계, 색인, 집계에도 반영
+
+    def report(result, fraction):
+        done = f"{fraction * 100:.0f}%, " if fraction is not None else ""
+        print(f"  {done}{result.rows}행 읽음, {result.imported}건 저장", file=sys.stderr)
+
+    started = time.perf_counter()
+    with open(args.path, 'rb') as f:
+        result = import_records(f, args.format, storage.load_user_records(args.username), add_batch, report)
+    print(f"{result.imported}건을 가져왔습니다. (중복 {result.duplicates}건, 건너뜀 {result.skipped}건, "
+          f"{time.perf_counter() - started:.2f}초)")
+    for error in result.errors:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""사용자별 기록을 JSON Lines 형식의 추가 전용(append-only) 로그로 저장합니다.
+
+한 줄이 하나의 변경 사항이며 형식은 다음과 같습니다.
+    <crc32 16진수 8자리> <{"op": "put", "record": {...}}>   기록 추가/수정 (같은 ID는 나중 값이 이김)
+    <crc32 16진수 8자리> <{"op": "del", "id": "..."}>        기록 삭제
+
+- 새 기록 저장, 수정, 삭제는 로그 끝에 한 줄을 쓰고 fsync 하는 것으로 끝납니다. (기록 수와 상관없이 일정한 비용)
+- 쓰는 도중 프로그램이 죽어 줄이 잘리거나 체크섬이 맞지 않는 줄은 읽을 때 건너뜁니다.
+- 쓸모없는 줄이 쌓이면 백그라운드 스레드가 주기적으로 로그를 새로 써서 압축(compaction)합니다.
+- 모든 쓰기는 locking.file_lock 안에서 이루어지므로 여러 프로세스가 같은 로그를 써도 줄이 섞이지 않습니다.
+- RECORD_APP_RECORD_FORMAT이 'json'이 아니면 전체를 다시 쓸 때(압축, 전체 저장) 기록을 그 형식(record_codec.py)의
+  스냅샷 파일 <로그>.<토큰>.snap 에 쓰고, 로그에는 스냅샷을 가리키는 첫 줄 {"op": "snapshot", ...}만 남깁니다.
+  읽을 때는 스냅샷을 읽은 뒤 그 뒤에 추가된 줄을 적용합니다. 스냅샷을 먼저 쓰고 로그를 바꿔치기하므로
+  중간에 죽어도 로그는 항상 온전한 스냅샷을 가리킵니다. 잠금 없이 읽는 도중 다른 프로세스가 이전 스냅샷을 지우면
+  잠금을 잡고 로그부터 다시 읽습니다.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+
+from locking import atomic_writer, file_lock
+from record_codec import get_serializer, load_file
+
+COMPACT_INTERVAL_SECONDS = 30 # 백그라운드 압축 스레드가 깨어나는 주기
+COMPACT_MIN_GARBAGE_LINES = 100 # 이보다 적은 쓸모없는 줄은 압축하지 않고 둡니다.
+
+
+def _encode_line(entry):
+    payload = json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return b'%08x ' % zlib.crc32(payload) + payload + b'\n'
+
+
+def _decode_line(line):
+    """로그 한 줄을 해석합니다. 손상된 줄이면 None을 반환합니다."""
+    if not line.endswith(b'\n') or len(line) < 10 or line[8:9] != b' ':
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+class RecordLog:
+    """기록 로그 파일 하나를 다룹니다. 같은 경로에 대해서는 하나의 인스턴스를 공유해야 합니다."""
+
+    def __init__(self, path, record_format=None):
+        self.path = path
+        self.serializer = get_serializer(record_format) # 전체를 다시 쓸 때 쓰는 형식
+        self.lock = threading.RLock()
+        self.garbage_lines = 0 # 마지막으로 읽은 뒤 알게 된, 압축하면 사라질 줄 수
+        self.snapshot_size = 0 # 마지막으로 읽거나 쓴 스냅샷 파일 크기 (캐시 크기 계산용)
+        self._lock_depth = 0 # locked()가 겹쳐 불린 횟수 (파일 잠금은 한 번만 잡음)
+
+    @contextmanager
+    def locked(self):
+        """이 로그에 대한 스레드 잠금과 파일 잠금을 함께 잡습니다. 여러 번 겹쳐 잡아도 됩니다."""
+        with self.lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with file_lock(self.path):
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """로그를 한 줄씩 읽으며 기록 리스트를 만듭니다. 같은 ID가 다시 나오면 나중 값이 이깁니다."""
+        records = self._read()
+        if self.garbage_lines >= COMPACT_MIN_GARBAGE_LINES:
+            schedule_compaction(self)
+        return records
+
+    def _read(self):
+        try:
+            return self._read_once()
+        except FileNotFoundError:
+            # 읽는 사이 다른 프로세스가 로그를 새로 쓰면서 이전 스냅샷을 지운 경우. 잠금을 잡고 새 로그를 다시 읽음
+            with self.locked():
+                return self._read_once()
+
+    def _read_once(self):
+        records = {}
+        garbage = 0
+        with self.lock:
+            if not self.exists():
+                return []
+            self.snapshot_size = 0
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    entry = _decode_line(line)
+                    if entry is None:
+                        garbage += 1
+                        continue
+                    if entry.get('op') == 'snapshot' and not records:
+                        snapshot_path = os.path.join(os.path.dirname(self.path), entry['file'])
+                        for record in load_file(snapshot_path, get_serializer(entry['format'])):
+                            records[record['id']] = record
+                        self.snapshot_size = os.path.getsize(snapshot_path)
+                        continue
+                    record = entry.get('record')
+                    if entry.get('op') == 'put' and record is not None:
+                        if record['id'] in records:
+                            garbage += 1 # 덮어써진 예전 값
+                        records[record['id']] = record
+                    elif entry.get('op') == 'del':
+                        garbage += 2 if records.pop(entry.get('id'), None) is not None else 1 # 지운 값과 삭제 줄
+            self.garbage_lines = garbage
+        return list(records.values())
+
+    def append(self, record):
+        """기록 하나를 로그 끝에 추가하고 디스크에 반영될 때까지 기다립니다."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """기록 여러 개를 로그 끝에 추가합니다. 모두 쓴 뒤 한 번만 fsync 합니다."""
+        self._append_entries([{"op": "put", "record": record} for record in records])
+
+    def delete_many(self, record_ids):
+        """기록 여러 개를 지웠다고 로그 끝에 씁니다. (압축할 때 실제로 사라짐)"""
+        self._append_entries([{"op": "del", "id": record_id} for record_id in record_ids])
+
+    def _append_entries(self, entries):
+        data = b''.join(_encode_line(entry) for entry in entries)
+        with self.locked():
+            with open(self.path, 'ab') as f:
+                if f.tell() > 0 and not self._ends_with_newline():
+                    f.write(b'\n') # 이전에 잘린 줄과 섞이지 않도록
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def rewrite(self, records):
+        """기록 전체로 로그를 새로 씁니다. 임시 파일에 쓴 뒤 교체하므로 중간에 죽어도 기존 로그가 남습니다."""
+        with self.locked():
+            if self.serializer.name == 'json':
+                with atomic_writer(self.path, 'wb') as f:
+                    for record in records:
+                        f.write(_encode_line({"op": "put", "record": record}))
+                snapshot_name = None
+                self.snapshot_size = 0
+            else:
+                snapshot_name = f"{os.path.basename(self.path)}.{uuid.uuid4().hex[:12]}.snap"
+                data = self.serializer.dumps(records)
+                with atomic_writer(os.path.join(os.path.dirname(self.path), snapshot_name), 'wb') as f:
+                    f.write(data)
+                with atomic_writer(self.path, 'wb') as f:
+                    f.write(_encode_line({"op": "snapshot", "file": snapshot_name, "format": self.serializer.name}))
+                self.snapshot_size = len(data)
+            self._remove_snapshots(keep=snapshot_name)
+            self.garbage_lines = 0
+
+    def _remove_snapshots(self, keep=None):
+        """이 로그의 스냅샷 파일 중 keep이 아닌 것(이전 스냅샷, 중간에 죽어 남은 파일)을 지웁니다."""
+        prefix = os.path.basename(self.path) + '.'
+        with os.scandir(os.path.dirname(self.path) or '.') as entries:
+            stale = [e.path for e in entries if e.name.startswith(prefix) and e.name.endswith('.snap') and e.name != keep]
+        for path in stale:
+            os.remove(path)
+
+    def compact(self):
+        """살아있는 기록만 남기도록 로그를 다시 씁니다."""
+        with self.locked():
+            self.rewrite(self._read())
+
+
+# --- 백그라운드 압축 ---
+_pending = {} # path -> RecordLog
+_pending_lock = threading.Lock()
+_compactor = None
+
+
+def schedule_compaction(log):
+    """다음 압축 주기에 로그를 압축하도록 예약합니다."""
+    global _compactor
+    with _pending_lock:
+        _pending[log.path] = log
+        if _compactor is None:
+            _compactor = threading.Thread(target=_compaction_loop, name='record-log-compactor', daemon=True)
+            _compactor.start()
+
+
+def _compaction_loop():
+    while True:
+        time.sleep(COMPACT_INTERVAL_SECONDS)
+        with _pending_lock:
+            logs = list(_pending.values())
+            _pending.clear()
+        for log in logs:
+            try:
+                log.compact()
+            except OSError:
+                schedule_compaction(log) # 다음 주기에 다시 시도
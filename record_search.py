@@ -0,0 +1,224 @@
+"""사용자 기록(제목, 감독/저자, 장르, 감상)을 검색하는 전문 검색(full-text) 인덱스입니다.
+
+SQLite FTS5 테이블을 사용하며 RECORD_APP_SEARCH_INDEX 경로(기본값: 데이터 폴더의 search_index.db)에 저장합니다.
+
+한국어는 조사가 붙으면("사랑을", "사랑이") 단어 단위 검색이 잘 맞지 않으므로,
+단어를 글자 2개씩 겹쳐 자른 n-gram("사랑을" -> "사랑", "랑을")으로 색인하고 검색어도 같은 방식으로 잘라
+모든 n-gram이 들어있는 기록을 찾습니다. 검색어 끝에 붙은 조사는 먼저 떼어 내므로("영화가" -> "영화")
+조사 없이 "영화"라고만 쓴 기록도 찾습니다.
+
+- add_record(): 기록을 저장할 때마다 해당 기록만 색인에 추가합니다.
+- search(): 아직 색인되지 않은 사용자라면 처음 검색할 때 그 사용자의 기록 전체를 한 번 색인합니다.
+- python record_search.py --rebuild 로 모든 사용자의 색인을 새로 만들 수 있습니다.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from data_layout import data_path
+from storage import get_storage
+
+SEARCH_INDEX_FILE = os.environ.get('RECORD_APP_SEARCH_INDEX', data_path('search_index.db'))
+NGRAM_SIZE = 2
+INDEXED_FIELDS = ('title', 'director_author', 'genre', 'review')
+
+_WORD_RE = re.compile(r'\w+')
+# 검색어 끝에서 떼어 낼 조사 (긴 것부터 확인)
+_PARTICLES = sorted((
+    '은', '는', '이', '가', '을', '를', '의', '에', '도', '만', '와', '과', '로', '랑', '께',
+    '으로', '에서', '에게', '한테', '까지', '부터', '처럼', '보다', '하고', '이랑', '이나', '라는', '이라는',
+    '에서는', '으로는', '에게서', '까지는', '부터는', '에서도',
+), key=len, reverse=True)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    rowid INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    record_id TEXT NOT NULL UNIQUE,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_docs_username ON docs(username);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(title, director_author, genre, review, tokenize='unicode61');
+CREATE TABLE IF NOT EXISTS indexed_users (username TEXT PRIMARY KEY); -- 기록 전체가 색인된 사용자
+"""
+
+
+def ngrams(text):
+    """텍스트를 글자 n-gram 목록으로 바꿉니다. n보다 짧은 단어는 그대로 둡니다."""
+    grams = []
+    for word in _WORD_RE.findall((text or '').casefold()):
+        if len(word) <= NGRAM_SIZE:
+            grams.append(word)
+        else:
+            grams.extend(word[i:i + NGRAM_SIZE] for i in range(len(word) - NGRAM_SIZE + 1))
+    return grams
+
+
+def strip_particle(word):
+    """한글 검색어 끝에 붙은 조사를 하나 떼어 냅니다. ("영화가" -> "영화")
+
+    떼고 남는 글자가 NGRAM_SIZE보다 짧으면 ("포도" -> "포", "아이" -> "아") 조사가 아니라 단어의 일부일
+    가능성이 높으므로 그대로 둡니다.
+    """
+    for particle in _PARTICLES:
+        if len(word) - len(particle) >= NGRAM_SIZE and word.endswith(particle) and '가' <= word[-len(particle) - 1] <= '힣':
+            return word[:-len(particle)]
+    return word
+
+
+def build_match_query(query, strip=True):
+    """검색어를 FTS5 MATCH 식으로 바꿉니다. 검색할 글자가 없으면 None입니다.
+
+    단어마다 n-gram을 모두 요구합니다. strip이면 먼저 단어 끝의 조사를 뗍니다. 조사를 떼도 원래 단어의 n-gram
+    일부만 남으므로 조사까지 그대로 쓴 기록도 계속 찾습니다.
+    """
+    terms = []
+    words = _WORD_RE.findall((query or '').casefold())
+    for word in map(strip_particle, words) if strip else words:
+        if len(word) < NGRAM_SIZE:
+            terms.append(f'"{word}"*') # 한 글자 검색어는 그 글자로 시작하는 n-gram과 매칭
+        else:
+            terms.extend(f'"{gram}"' for gram in ngrams(word))
+    return ' AND '.join(dict.fromkeys(terms)) or None
+
+
+class RecordSearchIndex:
+    """기록 검색 인덱스입니다. 연결은 스레드(세션)별로 만듭니다."""
+
+    def __init__(self, path=SEARCH_INDEX_FILE):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _index(self, conn, username, record):
+        conn.execute("DELETE FROM docs_fts WHERE rowid = (SELECT rowid FROM docs WHERE record_id = ?)", (record['id'],))
+        conn.execute("DELETE FROM docs WHERE record_id = ?", (record['id'],))
+        cur = conn.execute(
+            "INSERT INTO docs (username, record_id, record) VALUES (?, ?, ?)",
+            (username, record['id'], json.dumps(record, ensure_ascii=False))
+        )
+        conn.execute(
+            "INSERT INTO docs_fts (rowid, title, director_author, genre, review) VALUES (?, ?, ?, ?, ?)",
+            (cur.lastrowid, *(' '.join(ngrams(record.get(field))) for field in INDEXED_FIELDS))
+        )
+
+    def add_record(self, username, record):
+        """기록 하나를 색인에 추가(또는 갱신)합니다."""
+        conn = self._conn()
+        with conn:
+            self._index(conn, username, record)
+
+    def add_records(self, username, records):
+        """기록 여러 개를 한 트랜잭션으로 색인에 추가합니다. (가져오기용)"""
+        conn = self._conn()
+        with conn:
+            for record in records:
+                self._index(conn, username, record)
+
+    def remove_record(self, record_id):
+        """기록 하나를 색인에서 지웁니다."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM docs_fts WHERE rowid = (SELECT rowid FROM docs WHERE record_id = ?)", (record_id,))
+            conn.execute("DELETE FROM docs WHERE record_id = ?", (record_id,))
+
+    def reindex_user(self, username, records):
+        """사용자의 색인을 records로 새로 만듭니다."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM docs_fts WHERE rowid IN (SELECT rowid FROM docs WHERE username = ?)", (username,))
+            conn.execute("DELETE FROM docs WHERE username = ?", (username,))
+            for record in records:
+                self._index(conn, username, record)
+            conn.execute("INSERT OR IGNORE INTO indexed_users (username) VALUES (?)", (username,))
+
+    def is_indexed(self, username):
+        row = self._conn().execute("SELECT 1 FROM indexed_users WHERE username = ?", (username,)).fetchone()
+        return row is not None
+
+    def search(self, username, query, limit=50, load_records=None):
+        """사용자의 기록 중 검색어와 맞는 기록을 최근에 색인된 순서로 반환합니다.
+
+        관련도(bm25) 정렬은 흔한 검색어일 때 일치하는 모든 기록의 점수를 계산해야 해서 느려지므로,
+        rowid 역순으로 읽다가 limit개를 채우면 바로 멈추는 방식을 사용합니다.
+
+        검색어를 쓴 그대로 먼저 찾고, 맞는 기록이 없을 때만 조사를 뗀 검색어로 다시 찾습니다.
+        ("어린이"를 찾을 때 "어린이" 기록이 있으면 "어린 왕자"는 나오지 않습니다.)
+
+        load_records(username)을 넘기면, 아직 색인되지 않은 사용자일 때 그 결과로 먼저 색인을 만듭니다.
+        """
+        exact = build_match_query(query, strip=False)
+        if exact is None:
+            return []
+        if load_records is not None and not self.is_indexed(username):
+            self.reindex_user(username, load_records(username))
+        results = self._match(username, exact, limit)
+        stripped = build_match_query(query)
+        if not results and stripped != exact:
+            results = self._match(username, stripped, limit)
+        return results
+
+    def _match(self, username, match, limit):
+        rows = self._conn().execute(
+            "SELECT docs.record FROM docs_fts JOIN docs ON docs.rowid = docs_fts.rowid "
+            "WHERE docs_fts MATCH ? AND docs.username = ? ORDER BY docs_fts.rowid DESC LIMIT ?",
+            (match, username, limit)
+        )
+        return [json.loads(record) for (record,) in rows]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_record_index():
+    """프로세스 전체에서 공유하는 기록 검색 인덱스를 반환합니다."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RecordSearchIndex()
+    return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록 검색 인덱스 관리 도구")
+    parser.add_argument('--rebuild', action='store_true', help="모든 사용자의 색인을 새로 만듭니다.")
+    parser.add_argument('--search', nargs=2, metavar=('USERNAME', 'QUERY'), help="색인에서 검색해 봅니다.")
+    args = parser.parse_args()
+
+    storage = get_storage()
+    index = get_record_index()
+    if args.rebuild:
+        started = time.perf_counter()
+        total = 0
+        for username in storage.load_users():
+            records = storage.load_user_records(username)
+            index.reindex_user(username, records)
+            total += len(records)
+        print(f"기록 {total}건을 색인했습니다. ({time.perf_counter() - started:.2f}초)")
+    if args.search:
+        username, query = args.search
+        started = time.perf_counter()
+        results = index.search(username, query, load_records=storage.load_user_records)
+        print(f"{len(results)}건 ({(time.perf_counter() - started) * 1000:.1f}ms)")
+        for record in results:
+            print(f"- {record.get('title')} ({record.get('recorded_date')})")
+
+
+if __name__ == "__main__":
+    main()
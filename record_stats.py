@@ -0,0 +1,169 @@
+"""내 기록 통계(평점 분포, 종류/장르별 개수, 월별 기록 수, 감독·저자별 평균 평점)를 계산합니다.
+
+- 기록 리스트를 필요한 열만 뽑아 pandas DataFrame(열 단위)으로 바꾸고 value_counts/groupby로 한 번에 집계합니다.
+- 결과(RecordStats)는 기록 묶음의 버전(storage.records_version)으로 데이터 캐시(data_cache)에 넣어 두므로,
+  기록이 그대로이면 화면을 다시 그려도(rerun) 다시 계산하지 않습니다.
+- 모든 집계가 더할 수 있는 값(개수, 평점 합)이라 기록을 추가할 때는 추가한 기록만 집계해서 더합니다. (add_records)
+  기록을 고치거나 통째로 다시 저장하면 버전이 바뀌어 다음에 볼 때 새로 계산합니다.
+- 장르와 감독/저자는 쉼표로 나눠 각각 셉니다. (원래 문자열별로 먼저 집계한 뒤 고유한 값만 나눔)
+- python record_stats.py <사용자> [--repeat 5] 로 계산 시간을 확인할 수 있습니다.
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from data_cache import get_cache
+from storage import get_storage
+
+RATING_LEVELS = [1, 2, 3, 4, 5]
+STAT_FIELDS = ['type', 'genre', 'director_author', 'rating', 'recorded_date'] # 통계에 쓰는 기록 필드
+
+
+def _counts(values):
+    return values[values != ''].value_counts()
+
+
+def _split_keys(aggregated):
+    """'드라마, 스릴러'처럼 쉼표로 구분된 인덱스를 나눠 같은 값끼리 다시 더합니다.
+
+    기록마다 나누지 않고 먼저 원래 문자열별로 집계한 뒤 고유한 문자열만 나누므로 기록 수와 상관없이 빠릅니다.
+    """
+    frame = pd.DataFrame({'key': aggregated.index.str.split(','), 'value': aggregated.to_numpy()}).explode('key')
+    frame['key'] = frame['key'].str.strip()
+    frame = frame[frame['key'] != '']
+    return frame.groupby('key')['value'].sum().rename_axis(None).astype(aggregated.dtype)
+
+
+class RecordStats:
+    """한 사용자의 기록 집계입니다. 여러 세션이 캐시에서 함께 보므로 고치지 말고 merge()로 새로 만드세요."""
+
+    def __init__(self, total, rating_counts, type_counts, genre_counts, monthly_counts, creator_sums, creator_counts):
+        self.total = total
+        self.rating_counts = rating_counts # 평점(1~5) -> 기록 수
+        self.type_counts = type_counts # 종류 -> 기록 수
+        self.genre_counts = genre_counts # 장르 -> 기록 수
+        self.monthly_counts = monthly_counts # 'YYYY-MM' -> 기록 수
+        self.creator_sums = creator_sums # 감독/저자 -> 평점 합
+        self.creator_counts = creator_counts # 감독/저자 -> 평점을 매긴 기록 수
+
+    @classmethod
+    def from_records(cls, records):
+        frame = pd.DataFrame.from_records(records, columns=STAT_FIELDS) # 필요한 열만 한 번에 변환
+        frame['rating'] = pd.to_numeric(frame['rating'], errors='coerce')
+        text = ['type', 'genre', 'director_author', 'recorded_date']
+        frame[text] = frame[text].fillna('').astype(str)
+        frame['month'] = frame['recorded_date'].str.slice(0, 7)
+        rated = frame[frame['rating'].between(1, 5)]
+        creators = rated.groupby('director_author')['rating']
+        return cls(
+            total=len(frame),
+            rating_counts=rated['rating'].astype(int).value_counts(),
+            type_counts=_counts(frame['type']),
+            genre_counts=_split_keys(frame['genre'].value_counts()),
+            monthly_counts=_counts(frame['month']),
+            creator_sums=_split_keys(creators.sum()),
+            creator_counts=_split_keys(creators.count()),
+        )
+
+    def merge(self, other):
+        """두 집계를 더한 새 RecordStats를 반환합니다."""
+        def add(a, b):
+            return a.add(b, fill_value=0).astype(a.dtype if len(a) else b.dtype)
+        return RecordStats(
+            self.total + other.total,
+            add(self.rating_counts, other.rating_counts),
+            add(self.type_counts, other.type_counts),
+            add(self.genre_counts, other.genre_counts),
+            add(self.monthly_counts, other.monthly_counts),
+            add(self.creator_sums, other.creator_sums),
+            add(self.creator_counts, other.creator_counts),
+        )
+
+    @property
+    def nbytes(self):
+        """캐시 크기 계산용 대략적인 바이트 수"""
+        return sum(
+            series.memory_usage(deep=True)
+            for series in (self.rating_counts, self.type_counts, self.genre_counts, self.monthly_counts,
+                           self.creator_sums, self.creator_counts)
+        )
+
+    # 화면에 그대로 넘길 수 있는 형태
+    def rating_distribution(self):
+        """평점 1~5점별 기록 수 (평점 없는 기록 제외)"""
+        return self.rating_counts.reindex(RATING_LEVELS, fill_value=0).rename(index=lambda rating: f"{rating}점")
+
+    def average_rating(self):
+        rated = self.rating_counts.sum()
+        return float((self.rating_counts.index * self.rating_counts).sum() / rated) if rated else None
+
+    def records_per_month(self):
+        """첫 기록 달부터 마지막 기록 달까지 월별 기록 수 (기록이 없는 달은 0)"""
+        months = self.monthly_counts[self.monthly_counts > 0].sort_index()
+        if months.empty:
+            return months
+        periods = pd.period_range(months.index[0], months.index[-1], freq='M').strftime('%Y-%m')
+        return months.reindex(periods, fill_value=0)
+
+    def top_genres(self, limit=15):
+        return self.genre_counts.sort_values(ascending=False, kind='stable').head(limit)
+
+    def creator_ratings(self, limit=20, min_count=1):
+        """감독/저자별 평균 평점과 기록 수를 평균, 기록 수 순으로 limit개 반환합니다."""
+        table = pd.DataFrame({'평균 평점': self.creator_sums / self.creator_counts, '기록 수': self.creator_counts.astype(int)})
+        table = table[table['기록 수'] >= min_count]
+        return table.sort_values(['평균 평점', '기록 수'], ascending=False).head(limit)
+
+
+def _cache_name(username):
+    return f'stats:{username}'
+
+
+def load_record_stats(username):
+    """사용자의 기록 통계를 반환합니다. 기록 묶음의 버전이 캐시와 같으면 다시 계산하지 않습니다."""
+    storage = get_storage()
+    cache = get_cache()
+    version = storage.records_version(username)
+    stats = cache.get(_cache_name(username), version)
+    if stats is None:
+        stats = RecordStats.from_records(storage.load_user_records(username))
+        if storage.records_version(username) == version: # 계산하는 동안 기록이 바뀌었으면 캐시하지 않음
+            cache.put(_cache_name(username), version, stats, stats.nbytes)
+    return stats
+
+
+def add_records(username, records, old_version, new_version):
+    """old_version 통계가 캐시에 있으면 추가한 기록만 집계해 더하고 new_version으로 저장합니다.
+
+    old_version, new_version은 storage.append_user_records가 돌려준 값입니다.
+    합치는 계산은 캐시 잠금 밖에서 하고, 캐시 크기에는 합친 뒤 늘어난 바이트 수를 더합니다.
+    """
+    cache = get_cache()
+    name = _cache_name(username)
+    stats = cache.get(name, old_version)
+    if stats is None:
+        cache.invalidate(name) # 예전 버전 통계는 더 쓸 일이 없음
+        return
+    merged = stats.merge(RecordStats.from_records(records))
+    cache.update(name, old_version, new_version, lambda _: merged, merged.nbytes - stats.nbytes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록 통계 계산 시간 확인")
+    parser.add_argument('username')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    records = get_storage().load_user_records(args.username)
+    best = float('inf')
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        stats = RecordStats.from_records(records)
+        best = min(best, time.perf_counter() - started)
+    print(f"기록 {stats.total}개 집계: {best * 1000:.1f}ms (캐시 없이 {args.repeat}번 중 최솟값)")
+    print(stats.rating_distribution().to_string())
+
+
+if __name__ == "__main__":
+    main()
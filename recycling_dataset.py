@@ -0,0 +1,132 @@
+"""재활용 도우미(main.py)의 품목 데이터를 파일에서 읽어오고, 파일이 바뀌면 자동으로 다시 읽습니다.
+
+데이터 파일 형식 (RECYCLING_DATA_FILE, 기본값 recycling_data.json)
+- JSON: {"version": "...", "items": {품목 이름: 배출 방법}, "aliases": {별칭: 품목 이름}}
+- CSV: name,guide,aliases 열 (aliases는 "|"로 구분, 버전은 파일 수정 시각)
+
+- 읽은 데이터는 검증한 뒤 검색 색인(RecyclingLookup)까지 만들어 하나의 읽기 전용 RecyclingDataset으로 묶습니다.
+- DatasetStore.current()는 항상 완성된 데이터셋을 바로 반환합니다. 파일 수정 시각이 바뀌면
+  백그라운드 스레드가 새 데이터셋을 만든 뒤 참조 하나만 바꿔치기하므로 읽는 쪽은 기다리지 않습니다.
+- 새 파일이 검증에 실패하면 이전 데이터셋을 계속 쓰고 오류를 last_error에 남깁니다.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from recycling_search import RecyclingLookup
+
+RECYCLING_DATA_FILE = os.environ.get(
+    'RECYCLING_DATA_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recycling_data.json')
+)
+RELOAD_CHECK_INTERVAL_SECONDS = 2 # 파일 수정 시각을 확인하는 최소 간격
+
+
+class DatasetError(ValueError):
+    """데이터 파일의 형식이 잘못되었을 때 발생합니다."""
+
+
+class RecyclingDataset:
+    """검증이 끝난 읽기 전용 품목 데이터입니다."""
+
+    def __init__(self, version, items, aliases, mtime):
+        self.version = version
+        self.items = MappingProxyType(items) # 품목 이름 -> 배출 방법
+        self.aliases = MappingProxyType(aliases) # 별칭 -> 품목 이름
+        self.lookup = RecyclingLookup(items, aliases)
+        self.mtime = mtime
+        self.load_seconds = 0.0 # 파일 읽기 + 검증 + 색인 생성에 걸린 시간
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('items'), dict):
+        raise DatasetError("JSON 데이터에는 'items' 딕셔너리가 있어야 합니다.")
+    return str(data.get('version', '')), data['items'], data.get('aliases', {})
+
+
+def _read_csv(path):
+    items, aliases = {}, {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        if not {'name', 'guide'} <= set(reader.fieldnames or ()):
+            raise DatasetError("CSV 데이터에는 name, guide 열이 있어야 합니다.")
+        for line_number, row in enumerate(reader, start=2):
+            name = (row.get('name') or '').strip()
+            if name in items:
+                raise DatasetError(f"{line_number}번째 줄: '{name}' 품목이 중복되었습니다.")
+            items[name] = row.get('guide') or ''
+            for alias in (row.get('aliases') or '').split('|'):
+                if alias.strip():
+                    aliases[alias.strip()] = name
+    return '', items, aliases
+
+
+def _validate(items, aliases):
+    for name, guide in items.items():
+        if not isinstance(name, str) or not name.strip():
+            raise DatasetError("품목 이름이 비어 있습니다.")
+        if not isinstance(guide, str) or not guide.strip():
+            raise DatasetError(f"'{name}' 품목의 배출 방법이 비어 있습니다.")
+    for alias, name in aliases.items():
+        if name not in items:
+            raise DatasetError(f"별칭 '{alias}'이(가) 없는 품목 '{name}'을(를) 가리킵니다.")
+
+
+def load_dataset(path):
+    """데이터 파일을 읽고 검증해 RecyclingDataset을 만듭니다. 형식이 잘못되면 DatasetError가 발생합니다."""
+    started = time.perf_counter()
+    mtime = os.stat(path).st_mtime_ns
+    if path.endswith('.csv'):
+        version, items, aliases = _read_csv(path)
+    else:
+        version, items, aliases = _read_json(path)
+    _validate(items, aliases)
+    dataset = RecyclingDataset(version or str(mtime), items, aliases, mtime)
+    dataset.load_seconds = time.perf_counter() - started
+    return dataset
+
+
+class DatasetStore:
+    """현재 데이터셋을 들고 있다가 파일이 바뀌면 백그라운드에서 새로 읽어 교체합니다."""
+
+    def __init__(self, path=RECYCLING_DATA_FILE):
+        self.path = path
+        self._dataset = load_dataset(path) # 처음 한 번은 기다려서 읽음
+        self._last_check = time.monotonic()
+        self._reload_lock = threading.Lock()
+        self._failed_mtime = None # 검증에 실패한 파일 버전 (다시 바뀔 때까지 재시도하지 않음)
+        self.last_error = None
+
+    def current(self):
+        """현재 데이터셋을 반환합니다. 필요하면 백그라운드 재로딩을 시작하지만 기다리지는 않습니다."""
+        now = time.monotonic()
+        if now - self._last_check >= RELOAD_CHECK_INTERVAL_SECONDS:
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                changed = mtime not in (self._dataset.mtime, self._failed_mtime)
+            except FileNotFoundError:
+                changed = False
+            if changed and self._reload_lock.acquire(blocking=False):
+                threading.Thread(target=self._reload, name='recycling-dataset-reload', daemon=True).start()
+        return self._dataset
+
+    def _reload(self):
+        try:
+            self._dataset = load_dataset(self.path) # 참조 하나만 바꾸므로 읽는 쪽은 옛것 또는 새것 중 하나를 봄
+            self.last_error = None
+        except (OSError, ValueError) as e: # DatasetError, JSON/CSV 파싱 오류 포함
+            self.last_error = str(e)
+            try:
+                self._failed_mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                pass
+        finally:
+            self._reload_lock.release()
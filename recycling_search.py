@@ -0,0 +1,130 @@
+"""재활용 도우미(main.py)의 품목 이름 검색 엔진입니다.
+
+- 띄어쓰기/대소문자를 무시합니다. ("페트 병" -> "페트병")
+- 한글을 자모 단위로 나눠 비교하므로 "패트병"처럼 모음 하나가 틀린 오타도 가까운 품목으로 찾습니다.
+- 자모 n-gram 역색인으로 후보를 먼저 좁힌 뒤, 후보에 대해서만 편집 거리(최대 거리 제한)를 계산해 순위를 매깁니다.
+  그래서 품목이 수만 개여도 전체를 훑지 않습니다.
+- 별칭(동의어)을 등록하면 별칭으로 검색해도 원래 품목을 찾습니다. ("배터리" -> "건전지")
+
+색인은 한 번 만들어 두고 여러 번 재사용하도록 설계했습니다. (main.py에서는 st.cache_resource 사용)
+"""
+from collections import Counter, defaultdict
+
+# 한글 음절 = 0xAC00 + (초성 * 21 + 중성) * 28 + 종성
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_JUNGSEONG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+_JONGSEONG = ' ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ' # 첫 칸은 받침 없음
+
+NGRAM_SIZE = 2
+MAX_CANDIDATES = 50 # 편집 거리를 계산할 최대 후보 수
+
+
+def normalize(text):
+    """비교용으로 공백을 없애고 소문자로 바꿉니다."""
+    return ''.join(text.split()).casefold()
+
+
+def decompose(text):
+    """한글 음절을 자모로 풀어 씁니다. ("병" -> "ㅂㅕㅇ") 한글이 아닌 글자는 그대로 둡니다."""
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            out.append(_CHOSEONG[offset // 588])
+            out.append(_JUNGSEONG[(offset % 588) // 28])
+            if offset % 28:
+                out.append(_JONGSEONG[offset % 28])
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+def _ngrams(jamo):
+    if len(jamo) <= NGRAM_SIZE:
+        return {jamo}
+    return {jamo[i:i + NGRAM_SIZE] for i in range(len(jamo) - NGRAM_SIZE + 1)}
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """a와 b의 편집 거리를 계산합니다. max_distance를 넘으면 계산을 멈추고 max_distance + 1을 반환합니다."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+class RecyclingLookup:
+    """품목 이름 -> 품목 키 검색기입니다."""
+
+    def __init__(self, items, aliases=None):
+        """items: 품목 이름 목록(또는 딕셔너리), aliases: {별칭: 품목 이름}"""
+        self._names = {} # 정규화한 이름 -> 품목 이름 (별칭 포함)
+        self._jamo = [] # 색인 번호 -> (자모 문자열, 품목 이름)
+        self._postings = defaultdict(list) # 자모 n-gram -> 색인 번호 목록
+        indexed = set() # 색인된 품목 이름 (별칭이 가리키는 품목이 있는지 바로 확인)
+        for name in items:
+            if self._add(name, name):
+                indexed.add(name)
+        for alias, name in (aliases or {}).items():
+            if name in indexed:
+                self._add(alias, name)
+
+    def _add(self, text, name):
+        """text를 name의 이름으로 색인합니다. 비었거나 이미 있는 이름이면 False입니다."""
+        key = normalize(text)
+        if not key or key in self._names:
+            return False
+        self._names[key] = name
+        jamo = decompose(key)
+        doc_id = len(self._jamo)
+        self._jamo.append((jamo, name))
+        for gram in _ngrams(jamo):
+            self._postings[gram].append(doc_id)
+        return True
+
+    def __len__(self):
+        return len(self._jamo)
+
+    def lookup(self, query):
+        """이름이나 별칭이 정확히 일치하는 품목 이름을 반환합니다. (공백/대소문자 무시) 없으면 None입니다."""
+        return self._names.get(normalize(query))
+
+    def suggest(self, query, k=5, max_distance=None):
+        """query와 비슷한 품목 이름을 가까운 순서로 최대 k개 반환합니다.
+
+        같은 품목이 이름과 별칭으로 여러 번 걸리면 가장 가까운 것 하나만 남깁니다.
+        """
+        jamo = decompose(normalize(query))
+        if not jamo:
+            return []
+        if max_distance is None:
+            max_distance = max(1, len(jamo) // 3) # 자모 세 개당 오타 하나까지 허용
+
+        overlap = Counter()
+        for gram in _ngrams(jamo):
+            overlap.update(self._postings.get(gram, ()))
+
+        best = {} # 품목 이름 -> (순위 기준, 거리)
+        for doc_id, shared in overlap.most_common(MAX_CANDIDATES):
+            candidate, name = self._jamo[doc_id]
+            if jamo in candidate or candidate in jamo:
+                distance = 0 # 한쪽이 다른 쪽을 포함하면 ("병" -> "페트병") 가장 가까운 것으로 취급
+                rank = (0, abs(len(candidate) - len(jamo)))
+            else:
+                distance = bounded_edit_distance(jamo, candidate, max_distance)
+                if distance > max_distance:
+                    continue
+                rank = (1, distance, -shared)
+            if name not in best or rank < best[name]:
+                best[name] = rank
+        return sorted(best, key=best.get)[:k]
@@ -0,0 +1,77 @@
+"""공유방 화면에서 보여줄 기록을 미리 모아 둔 스냅샷(room snapshot)을 만들고 최신 상태로 유지합니다.
+
+공유방 화면은 만든 사람의 기록 전체를 읽어 거르지 않고, 공유방 ID로 스냅샷 하나만 읽습니다.
+- create_sharing_room()에서 publish_room_snapshot()으로 공유된 기록을 모아 저장합니다.
+- 기록이 바뀌면 sync_creator_rooms() / update_shared_records()로 해당 기록이 들어 있는 공유방만 다시 만듭니다.
+  (저장소의 기록 ID -> 공유방 역색인 사용) 기록을 지울 때는 저장소의 delete_user_records()가 같은 잠금(트랜잭션) 안에서
+  스냅샷에서도 함께 뺍니다.
+- 스냅샷의 etag는 공유된 기록 내용의 해시입니다. 내용이 그대로면 etag도 그대로이므로 다시 저장하지 않고,
+  저장소의 공유 캐시도 etag가 같은 동안 같은 값을 돌려줍니다.
+- 이 기능보다 먼저 만들어진 공유방은 처음 열 때 스냅샷을 만듭니다.
+"""
+from datetime import datetime
+
+from storage import compute_etag, get_storage
+
+
+def _make_snapshot(room_id, creator_username, shared_records):
+    return {
+        "room_id": room_id,
+        "creator_username": creator_username,
+        "etag": compute_etag(shared_records),
+        "records": shared_records,
+        "built_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def build_snapshot(room_id, room_data, records):
+    """만든 사람의 기록 records 중 공유된 기록만 (기록 순서대로) 모아 스냅샷을 만듭니다."""
+    shared_ids = set(room_data['shared_record_ids']) # 리스트로 확인하면 기록 수 x 공유 수만큼 비교하게 됨
+    shared_records = [record for record in records if record['id'] in shared_ids]
+    return _make_snapshot(room_id, room_data['creator_username'], shared_records)
+
+
+def _save_if_changed(storage, room_id, snapshot):
+    current = storage.get_room_snapshot(room_id)
+    if current is not None and current['etag'] == snapshot['etag']:
+        return current
+    storage.save_room_snapshot(room_id, snapshot)
+    return snapshot
+
+
+def publish_room_snapshot(room_id, room_data, records=None):
+    """공유방 스냅샷을 만들어 저장하고 반환합니다. records를 주지 않으면 만든 사람의 기록을 읽습니다."""
+    storage = get_storage()
+    if records is None:
+        records = storage.load_user_records(room_data['creator_username'])
+    return _save_if_changed(storage, room_id, build_snapshot(room_id, room_data, records))
+
+
+def get_room_snapshot(room_id, room_data):
+    """공유방 스냅샷을 반환합니다. 아직 없으면 (예전에 만든 공유방) 지금 만듭니다."""
+    snapshot = get_storage().get_room_snapshot(room_id)
+    if snapshot is None:
+        snapshot = publish_room_snapshot(room_id, room_data)
+    return snapshot
+
+
+def sync_creator_rooms(username, records):
+    """사용자의 기록 전체가 바뀌었을 때 그 사용자가 만든 공유방의 스냅샷을 모두 다시 만듭니다."""
+    storage = get_storage()
+    for room_id in storage.room_ids_for_creator(username):
+        room_data = storage.get_sharing_room(room_id)
+        if room_data is not None:
+            _save_if_changed(storage, room_id, build_snapshot(room_id, room_data, records))
+
+
+def update_shared_records(changed_records=(), deleted_ids=()):
+    """기록 일부가 고쳐지거나 지워졌을 때, 그 기록이 들어 있는 공유방의 스냅샷만 고칩니다."""
+    storage = get_storage()
+    changed = {record['id']: record for record in changed_records}
+    deleted = set(deleted_ids)
+    for room_id in storage.room_ids_for_records(list(changed) + list(deleted)):
+        snapshot = storage.get_room_snapshot(room_id)
+        if snapshot is None:
+            continue
+        shared_records = [changed.get(r['id'], r) for r in snapshot['records'] if r['id'] not in deleted]
+        _save_if_changed(storage, room_id, _make_snapshot(room_id, snapshot['creator_username'], shared_records))
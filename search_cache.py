@@ -0,0 +1,186 @@
+"""외부 작품 검색(TMDB / Google Books) 결과를 보관하는 TTL + LRU 캐시입니다.
+
+- 키는 (종류, 정규화한 검색어, 언어) 입니다. 검색어는 앞뒤/중복 공백을 정리하고 대소문자를 무시합니다.
+  2쪽부터는 키 끝에 쪽 번호가 붙습니다. (1쪽 키는 예전과 같아서 기록 정보 채우기(enrichment.py)와 캐시를 함께 씀)
+- 결과는 화면과 정보 채우기에서 쓰는 필드만 남겨서 보관합니다. (MOVIE_RESULT_FIELDS, Google Books는 BOOK_RESULT_FIELDS로 요청)
+- 성공한 결과는 SEARCH_CACHE_TTL초, 실패(오류 응답/네트워크 오류)는 더 짧은 SEARCH_CACHE_NEGATIVE_TTL초 동안 보관합니다.
+- 항목 수가 SEARCH_CACHE_MAX_ENTRIES를 넘으면 가장 오래 쓰지 않은 항목부터 버립니다.
+- RECORD_APP_SEARCH_CACHE_FILE을 지정하면 SQLite 파일에 저장해 서버를 다시 시작해도 캐시가 유지됩니다.
+- 같은 키를 여러 스레드가 동시에 요청하면 한 번만 가져옵니다. prefetch()는 다음 쪽을 백그라운드에서 미리 가져옵니다.
+- 적중률과 캐시 덕분에 아낀 시간(원래 요청에 걸렸던 시간의 합)을 stats()로 확인할 수 있습니다.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from http_client import run_in_background
+
+SEARCH_CACHE_TTL = float(os.environ.get('RECORD_APP_SEARCH_TTL', '3600')) # 성공 결과 보관 시간 (초)
+SEARCH_CACHE_NEGATIVE_TTL = float(os.environ.get('RECORD_APP_SEARCH_NEGATIVE_TTL', '60')) # 실패 결과 보관 시간 (초)
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('RECORD_APP_SEARCH_CACHE_SIZE', '512'))
+SEARCH_CACHE_FILE = os.environ.get('RECORD_APP_SEARCH_CACHE_FILE', '') # 비어 있으면 디스크에 저장하지 않음
+MOVIE_RESULT_FIELDS = ('id', 'title', 'overview', 'release_date', 'poster_path') # TMDB 검색 결과에서 남길 필드
+BOOK_RESULT_FIELDS = 'items(id,volumeInfo(title,authors,description,publishedDate,imageLinks/thumbnail))' # Google Books fields=
+
+
+def normalize_key(search_type, query, language, page=1):
+    """검색 종류, 검색어, 언어(, 쪽 번호)로 캐시 키를 만듭니다."""
+    key = (search_type, ' '.join(query.split()).casefold(), language)
+    return key if page == 1 else key + (page,)
+
+
+def slim_movie_results(results):
+    """TMDB 검색 결과에서 MOVIE_RESULT_FIELDS만 남깁니다. (Google Books는 fields=로 서버에서 줄여서 받음)"""
+    return [{field: movie.get(field) for field in MOVIE_RESULT_FIELDS} for movie in results]
+
+
+class SearchCache:
+    """검색 결과 캐시입니다. 값은 (결과 리스트, 오류 메시지) 쌍입니다."""
+
+    def __init__(self, ttl=SEARCH_CACHE_TTL, negative_ttl=SEARCH_CACHE_NEGATIVE_TTL,
+                 max_entries=SEARCH_CACHE_MAX_ENTRIES, path=SEARCH_CACHE_FILE):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict() # key -> (results, error, expires_at, fetch_seconds)
+        self._pending = {} # 지금 가져오는 중인 key -> threading.Event
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        if path:
+            self._load_from_disk()
+
+    # 디스크 저장 (선택 사항)
+    def _db(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            "key TEXT PRIMARY KEY, results TEXT NOT NULL, error TEXT, expires_at REAL NOT NULL, fetch_seconds REAL NOT NULL)"
+        )
+        return conn
+
+    def _load_from_disk(self):
+        now = time.time()
+        with self._db() as conn:
+            conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+            rows = conn.execute(
+                "SELECT key, results, error, expires_at, fetch_seconds FROM search_cache ORDER BY expires_at"
+            ).fetchall()
+        for key, results, error, expires_at, fetch_seconds in rows[-self.max_entries:]:
+            self._entries[tuple(json.loads(key))] = (json.loads(results), error, expires_at, fetch_seconds)
+
+    def _save_to_disk(self, key, entry, evicted):
+        with self._db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, results, error, expires_at, fetch_seconds) VALUES (?, ?, ?, ?, ?)",
+                (json.dumps(key, ensure_ascii=False), json.dumps(entry[0], ensure_ascii=False), entry[1], entry[2], entry[3])
+            )
+            conn.executemany(
+                "DELETE FROM search_cache WHERE key = ?",
+                [(json.dumps(k, ensure_ascii=False),) for k in evicted]
+            )
+
+    # 캐시 사용
+    def get(self, key):
+        """만료되지 않은 (결과, 오류) 쌍을 반환합니다. 없으면 None입니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.time():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if entry[1]:
+                self.negative_hits += 1
+            self.saved_seconds += entry[3]
+            return entry[0], entry[1]
+
+    def put(self, key, results, error, fetch_seconds):
+        """결과를 저장합니다. error가 있으면 실패 결과로 보고 짧게 보관합니다."""
+        ttl = self.negative_ttl if error else self.ttl
+        entry = (results, error, time.time() + ttl, fetch_seconds)
+        evicted = []
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+        if self.path:
+            self._save_to_disk(key, entry, evicted)
+
+    def get_or_fetch(self, key, fetch):
+        """캐시에 있으면 그 값을, 없으면 fetch()를 호출해 (결과, 오류)를 얻고 저장한 뒤 반환합니다.
+
+        다른 스레드가 같은 키를 가져오는 중이면(미리 가져오기 등) 다시 요청하지 않고 그 결과를 기다립니다.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = threading.Event()
+        if pending is not None:
+            pending.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0], entry[1]
+            return self.get_or_fetch(key, fetch) # 먼저 가져오던 쪽이 실패(예외)했으면 직접 가져옴
+        try:
+            started = time.perf_counter()
+            results, error = fetch()
+            self.put(key, results, error, time.perf_counter() - started)
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+        return results, error
+
+    def prefetch(self, key, fetch):
+        """key가 캐시에 없고 가져오는 중도 아니면 백그라운드에서 get_or_fetch(key, fetch)를 실행합니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None and entry[2] > time.time()) or key in self._pending:
+                return
+        run_in_background(lambda: self.get_or_fetch(key, fetch))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            with self._db() as conn:
+                conn.execute("DELETE FROM search_cache")
+
+    def stats(self):
+        """캐시 적중률과 아낀 시간을 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """프로세스 전체에서 공유하는 검색 캐시를 반환합니다."""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache()
+    return _search_cache
@@ -0,0 +1,829 @@
+"""나만의 기록 앱(test.py)의 데이터 저장소 백엔드입니다.
+
+RECORD_APP_STORAGE 환경 변수로 저장소를 고를 수 있습니다.
+- "json" (기본값): users.json / sharing_rooms.json 파일과 사용자별 {username}_records.jsonl 로그를 사용합니다.
+  공유방 스냅샷은 room_snapshots/ 폴더에 방마다 하나씩 저장합니다.
+  RECORD_APP_RECORD_FORMAT으로 기록 로그를 압축할 때 쓸 형식을 고를 수 있습니다. (record_codec.py 참고)
+  파일은 RECORD_APP_DATA_DIR 아래에 두며, 사용자별 파일은 하위 폴더에 나눠 담습니다. (data_layout.py 참고)
+- "sqlite": RECORD_APP_DB 경로의 SQLite 데이터베이스를 사용합니다. (WAL 모드, 인덱스 사용)
+
+두 백엔드는 같은 메서드를 제공하므로 test.py의 load/save/create/get 함수는 백엔드와 상관없이 동작합니다.
+읽은 데이터는 data_cache의 공유 캐시에 보관하므로, load_* 가 반환한 값은 읽기 전용으로 다뤄야 합니다.
+"""
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+from data_cache import file_identity, get_cache
+from data_layout import (
+    DATA_DIR, RECORD_LOG_SUFFIX, RECORDS_FILE_SUFFIX, data_path, legacy_user_file, move_file, user_file
+)
+from instrumentation import instrument
+from locking import atomic_writer, file_lock
+from record_log import RecordLog
+
+# --- Constants ---
+USER_DATA_FILE = 'users.json' # 사용자 정보를 저장할 파일 (로그인 정보)
+SHARING_ROOMS_FILE = 'sharing_rooms.json' # 공유방 정보를 저장할 파일
+ROOM_SNAPSHOTS_DIR = 'room_snapshots' # 공유방마다 공유된 기록을 미리 모아 둔 스냅샷 파일을 저장할 폴더
+SQLITE_DB_FILE = os.environ.get('RECORD_APP_DB', data_path('records.db')) # SQLite 백엔드에서 사용할 DB 파일
+STORAGE_BACKEND = os.environ.get('RECORD_APP_STORAGE', 'json') # "json" 또는 "sqlite"
+
+_MISSING = object() # 캐시에 값이 없음을 나타내는 표시
+
+# 기록 목록 정렬 방식: 이름 -> (정렬 기준 필드, 내림차순 여부)
+RECORD_SORTS = {
+    'recorded_desc': ('recorded_date', True),
+    'recorded_asc': ('recorded_date', False),
+    'rating_desc': ('rating', True),
+    'rating_asc': ('rating', False),
+    'title_asc': ('title', False),
+}
+
+
+def record_matches(record, record_type=None, min_rating=None, date_from=None):
+    """기록이 조회 조건(종류, 최소 평점, 이 날짜 이후 기록)에 맞는지 확인합니다."""
+    if record_type and record.get('type') != record_type:
+        return False
+    if min_rating and (record.get('rating') or 0) < min_rating:
+        return False
+    if date_from and (record.get('recorded_date') or '') < date_from:
+        return False
+    return True
+
+
+def _record_sort_key(field):
+    default = 0 if field == 'rating' else ''
+    return lambda record: record.get(field) or default
+
+
+def compute_etag(records):
+    """기록 목록의 내용으로 etag(버전 문자열)를 만듭니다. (공유방 스냅샷용)"""
+    payload = json.dumps(records, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def _snapshot_without(snapshot, record_ids):
+    """스냅샷에서 record_ids 기록을 뺀 새 스냅샷을 반환합니다. (snapshot은 고치지 않음)"""
+    records = [record for record in snapshot['records'] if record['id'] not in record_ids]
+    return {**snapshot, 'records': records, 'etag': compute_etag(records)}
+
+
+def _reindex_room(index, room_id, old_snapshot, snapshot):
+    """공유방 역색인에서 room_id 항목을 새 스냅샷에 맞게 고친 새 딕셔너리를 반환합니다. (index는 고치지 않음)"""
+    records = dict(index['records'])
+    old_ids = {r['id'] for r in old_snapshot['records']} if old_snapshot else set()
+    new_ids = {r['id'] for r in snapshot['records']}
+    for record_id in old_ids - new_ids:
+        room_ids = [other for other in records.get(record_id, ()) if other != room_id]
+        if room_ids:
+            records[record_id] = room_ids
+        else:
+            records.pop(record_id, None)
+    for record_id in new_ids - old_ids:
+        records[record_id] = records.get(record_id, []) + [room_id]
+    creators = dict(index['creators'])
+    creator = snapshot['creator_username']
+    if room_id not in creators.get(creator, ()):
+        creators[creator] = creators.get(creator, []) + [room_id]
+    return {'records': records, 'creators': creators}
+
+
+# --- JSON 파일 백엔드 (기존 방식) ---
+class JsonStorage:
+    """JSON 파일에 데이터를 저장하는 백엔드입니다.
+
+    모든 쓰기는 locking.file_lock으로 파일을 잠근 상태에서 임시 파일에 쓴 뒤 바꿔치기하므로,
+    여러 세션/프로세스가 동시에 저장해도 수정 내용이 사라지거나 파일이 깨지지 않습니다.
+    """
+
+    def __init__(self, users_file=None, rooms_file=None, snapshots_dir=None, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.users_file = users_file or data_path(USER_DATA_FILE, root=data_dir)
+        self.rooms_file = rooms_file or data_path(SHARING_ROOMS_FILE, root=data_dir)
+        self.snapshots_dir = snapshots_dir or data_path(ROOM_SNAPSHOTS_DIR, root=data_dir)
+        # 기록 ID -> 공유방 ID 목록, 만든 사람 -> 공유방 ID 목록 (스냅샷을 고칠 공유방을 바로 찾기 위한 역색인)
+        self.room_index_file = os.path.join(self.snapshots_dir, 'index.json')
+        self._logs = {} # username -> RecordLog (같은 파일에는 같은 잠금을 쓰기 위해 공유)
+        self._legacy_checked = set() # 예전 배치의 기록 파일을 이미 확인한 사용자 (기록이 없는 사용자도 한 번만 확인)
+        self._logs_lock = threading.Lock()
+
+    def _read_json(self, path, default):
+        """JSON 파일을 읽습니다. 파일이 바뀌지 않았으면 공유 캐시의 값을 그대로 반환합니다."""
+        version = file_identity(path)
+        if version is None:
+            return default
+        cache = get_cache()
+        data = cache.get(path, version, _MISSING)
+        if data is _MISSING:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            cache.put(path, version, data, version[2])
+        return data
+
+    def _write_json(self, path, data):
+        """JSON 파일을 원자적으로 씁니다. 호출하는 쪽에서 file_lock(path)을 잡고 있어야 합니다."""
+        with atomic_writer(path) as f:
+            json.dump(data, f, indent=4, ensure_ascii=False) # 한글 인코딩 문제 방지
+        version = file_identity(path)
+        get_cache().put(path, version, data, version[2]) # 저장한 값으로 캐시도 바로 갱신
+
+    # 사용자
+    def load_users(self):
+        return self._read_json(self.users_file, {})
+
+    def save_users(self, users):
+        with file_lock(self.users_file):
+            self._write_json(self.users_file, users)
+
+    def get_user(self, username):
+        return self.load_users().get(username)
+
+    def add_user(self, username, user_data):
+        """사용자를 추가합니다. 이미 존재하면 False를 반환합니다."""
+        with file_lock(self.users_file): # 읽고-고치고-쓰는 동안 다른 가입 요청이 끼어들지 않도록
+            users = dict(self.load_users()) # 캐시된 값은 건드리지 않도록 복사
+            if username in users:
+                return False
+            users[username] = user_data
+            self._write_json(self.users_file, users)
+        return True
+
+    def update_user(self, username, user_data):
+        """사용자 정보를 바꿉니다. 없는 사용자면 False를 반환합니다."""
+        with file_lock(self.users_file):
+            users = dict(self.load_users()) # 캐시된 값은 건드리지 않도록 복사
+            if username not in users:
+                return False
+            users[username] = user_data
+            self._write_json(self.users_file, users)
+        return True
+
+    # 기록
+    def get_user_records_file(self, username):
+        """사용자별 기록 로그 파일 경로를 반환합니다. (사용자 이름 해시로 나눈 하위 폴더 안)"""
+        return user_file(username, RECORD_LOG_SUFFIX, root=self.data_dir)
+
+    def get_legacy_user_records_file(self, username):
+        """예전 방식(JSON 리스트 하나)의 기록 파일 경로를 반환합니다."""
+        return legacy_user_file(username, RECORDS_FILE_SUFFIX, root=self.data_dir)
+
+    def _record_log(self, username):
+        with self._logs_lock:
+            log = self._logs.get(username)
+            if log is None:
+                path = self.get_user_records_file(username)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                log = self._logs[username] = RecordLog(path)
+        if username not in self._legacy_checked:
+            # 예전 파일은 배치를 바꾼 뒤에 새로 생기지 않으므로 프로세스마다 처음 한 번만 확인 (잠금을 매번 잡지 않도록)
+            if not log.exists():
+                self.adopt_legacy_records(username, log=log)
+            self._legacy_checked.add(username)
+        return log
+
+    def adopt_legacy_records(self, username, source_dir=None, log=None):
+        """예전 배치의 기록 파일을 지금 배치로 옮기고 무엇을 했는지 반환합니다.
+
+        - 데이터 폴더에 바로 있던 {username}_records.jsonl 로그는 하위 폴더로 옮깁니다. ('moved')
+        - 예전 JSON 리스트 파일은 로그로 바꿔 쓰고 원본은 .bak 으로 남깁니다. ('converted')
+        - 옮길 파일이 없으면 'none'입니다.
+        source_dir을 주면 데이터 폴더 대신 그 폴더에서 예전 파일을 찾습니다. (migrate_layout.py)
+        """
+        source_dir = source_dir or self.data_dir
+        log = log or self._record_log(username)
+        flat_log = legacy_user_file(username, RECORD_LOG_SUFFIX, root=source_dir)
+        legacy_file = legacy_user_file(username, RECORDS_FILE_SUFFIX, root=source_dir)
+        with log.locked():
+            if flat_log and os.path.exists(flat_log):
+                move_file(flat_log, log.path) # 로그가 이미 옮겨져 있고 내용이 같으면 원본만 지움
+                if os.path.exists(flat_log + '.lock'):
+                    os.remove(flat_log + '.lock')
+                get_cache().invalidate(log.path)
+                return 'moved'
+            if log.exists() or not legacy_file or not os.path.exists(legacy_file):
+                return 'none'
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            for record in records:
+                record.setdefault('id', str(uuid.uuid4())) # 로그는 ID로 기록을 구분합니다.
+            log.rewrite(records)
+            os.replace(legacy_file, legacy_file + '.bak')
+            return 'converted'
+
+    def records_version(self, username):
+        """사용자 기록 묶음의 버전을 반환합니다. 기록이 바뀌면 값도 바뀝니다. (기록이 없으면 None)"""
+        return file_identity(self._record_log(username).path)
+
+    def load_user_records(self, username):
+        log = self._record_log(username)
+        version = file_identity(log.path)
+        if version is None:
+            return []
+        cache = get_cache()
+        records = cache.get(log.path, version, _MISSING)
+        if records is _MISSING:
+            records = log.load()
+            cache.put(log.path, version, records, version[2] + log.snapshot_size)
+        return records
+
+    def _record_positions(self, log, records):
+        """records(지금 버전의 기록 리스트)에서 기록 ID -> 위치 딕셔너리를 반환합니다.
+
+        기록 묶음 버전별로 공유 캐시에 두므로 기록 하나를 찾거나 고칠 때 리스트 전체를 훑지 않습니다.
+        """
+        version = file_identity(log.path)
+        cache = get_cache()
+        name = log.path + '#positions'
+        positions = cache.get(name, version, _MISSING)
+        if positions is _MISSING:
+            positions = {record['id']: i for i, record in enumerate(records)}
+            cache.put(name, version, positions, 100 * len(positions))
+        return positions
+
+    def get_user_record(self, username, record_id):
+        """ID로 기록 하나를 찾아 반환합니다. 없으면 None입니다."""
+        log = self._record_log(username)
+        records = self.load_user_records(username)
+        i = self._record_positions(log, records).get(record_id)
+        if i is not None and i < len(records) and records[i]['id'] == record_id:
+            return records[i]
+        # 읽는 사이 다른 세션이 기록을 바꿨으면 위치가 어긋날 수 있으므로 직접 찾음
+        return next((record for record in records if record['id'] == record_id), None)
+
+    def query_user_records(self, username, record_type=None, min_rating=None, date_from=None,
+                           sort='recorded_desc', offset=0, limit=20):
+        """조건에 맞는 기록 중 한 페이지와 전체 개수를 (기록 리스트, 전체 개수)로 반환합니다.
+
+        전체를 정렬하지 않고 offset+limit개만 힙으로 골라내므로 페이지 크기만큼의 메모리만 더 씁니다.
+        """
+        field, descending = RECORD_SORTS[sort]
+        total = 0
+
+        def matching():
+            nonlocal total
+            for record in self.load_user_records(username):
+                if record_matches(record, record_type, min_rating, date_from):
+                    total += 1
+                    yield record
+
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        top = pick(offset + limit, matching(), key=_record_sort_key(field))
+        return top[offset:], total
+
+    def save_user_records(self, username, records):
+        log = self._record_log(username)
+        with log.locked():
+            log.rewrite(records)
+            version = file_identity(log.path)
+            get_cache().put(log.path, version, list(records), version[2] + log.snapshot_size)
+
+    def append_user_record(self, username, record):
+        """기록 하나를 추가합니다. 기존 기록을 다시 쓰지 않습니다."""
+        return self.append_user_records(username, [record])
+
+    def append_user_records(self, username, records):
+        """기록 여러 개를 한 번에 추가합니다. 로그에 이어 쓰고 fsync는 한 번만 합니다.
+
+        추가하기 전과 후의 기록 묶음 버전(records_version)을 (before, after)로 반환합니다.
+        """
+        records = list(records)
+        log = self._record_log(username)
+        with log.locked():
+            before = file_identity(log.path)
+            log.append_many(records)
+            after = file_identity(log.path)
+            # 캐시된 리스트는 다른 세션이 보고 있을 수 있으므로 새 리스트로 교체합니다.
+            get_cache().update(log.path, before, after, lambda cached: cached + records, after[2] - (before[2] if before else 0))
+        return before, after
+
+    def update_user_records(self, username, records):
+        """기록 여러 개를 ID로 찾아 한 번에 고칩니다. 없는 ID는 건너뛰고, 고친 기록 수를 반환합니다.
+
+        고친 기록을 로그 끝에 다시 쓰므로(같은 ID는 나중 값이 이김) 기존 기록 전체를 다시 쓰지 않습니다.
+        캐시된 리스트도 ID -> 위치 색인으로 고친 자리만 바꿉니다.
+        """
+        log = self._record_log(username)
+        with log.locked():
+            positions = self._record_positions(log, self.load_user_records(username))
+            changed = {record['id']: record for record in records if record['id'] in positions}
+            if not changed:
+                return 0
+            before = file_identity(log.path)
+            log.append_many(changed.values())
+            after = file_identity(log.path)
+
+            def patch(cached):
+                cached = list(cached) # 다른 세션이 보고 있을 수 있으므로 복사본을 고침
+                for record_id, record in changed.items():
+                    cached[positions[record_id]] = record
+                return cached
+
+            cache = get_cache()
+            cache.update(log.path, before, after, patch, after[2] - before[2])
+            cache.update(log.path + '#positions', before, after, lambda same: same, 0) # 위치는 그대로
+        return len(changed)
+
+    def delete_user_records(self, username, record_ids):
+        """기록 여러 개를 ID로 찾아 지우고 지운 기록 수를 반환합니다. 없는 ID는 건너뜁니다.
+
+        로그 끝에 삭제 줄만 쓰고(실제로는 압축할 때 사라짐), 지운 기록을 공유한 공유방은 역색인으로 찾아
+        스냅샷에서 함께 뺍니다. (로그 잠금을 잡은 채로 하므로 지운 기록이 공유방에 남아 보이는 때가 없음)
+        """
+        log = self._record_log(username)
+        with log.locked():
+            positions = self._record_positions(log, self.load_user_records(username))
+            deleted = {record_id for record_id in record_ids if record_id in positions}
+            if not deleted:
+                return 0
+            before = file_identity(log.path)
+            log.delete_many(deleted)
+            after = file_identity(log.path)
+            removed = sorted(positions[record_id] for record_id in deleted)
+
+            def splice(cached):
+                kept, start = [], 0
+                for i in removed:
+                    kept += cached[start:i]
+                    start = i + 1
+                return kept + cached[start:]
+
+            get_cache().update(log.path, before, after, splice, after[2] - before[2]) # 위치 색인은 다음에 다시 만듦
+            self._unshare_records(deleted)
+        return len(deleted)
+
+    def _unshare_records(self, record_ids):
+        """기록들을 그 기록이 들어 있는 공유방의 스냅샷에서 빼고 역색인을 고칩니다.
+
+        공유방마다 스냅샷 파일 하나와 역색인만 다시 쓰고, 모든 공유방이 든 sharing_rooms.json은 다시 쓰지 않습니다.
+        shared_record_ids에 남은 ID는 만든 사람의 기록에 더는 없으므로 스냅샷을 다시 만들어도 나오지 않습니다.
+        """
+        if not os.path.exists(self.room_index_file): # 스냅샷이 있는 공유방이 아직 없음
+            return
+        with file_lock(self.room_index_file): # save_room_snapshot과 같은 잠금
+            index = self._read_json(self.room_index_file, None)
+            if index is None:
+                return
+            room_ids = {room_id for record_id in record_ids for room_id in index['records'].get(record_id, ())}
+            for room_id in room_ids:
+                snapshot = self.get_room_snapshot(room_id)
+                if snapshot is None:
+                    continue
+                unshared = _snapshot_without(snapshot, record_ids)
+                self._write_json(self._room_snapshot_file(room_id), unshared)
+                index = _reindex_room(index, room_id, snapshot, unshared)
+            if room_ids:
+                self._write_json(self.room_index_file, index)
+
+    # 공유방
+    def load_sharing_rooms(self):
+        return self._read_json(self.rooms_file, {}) # {room_id: room_data, ...} 형태
+
+    def save_sharing_rooms(self, rooms):
+        with file_lock(self.rooms_file):
+            self._write_json(self.rooms_file, rooms)
+
+    def get_sharing_room(self, room_id):
+        return self.load_sharing_rooms().get(room_id)
+
+    def add_sharing_room(self, room_id, room_data):
+        with file_lock(self.rooms_file):
+            rooms = dict(self.load_sharing_rooms()) # 캐시된 값은 건드리지 않도록 복사
+            rooms[room_id] = room_data
+            self._write_json(self.rooms_file, rooms)
+
+    # 공유방 스냅샷
+    def _room_snapshot_file(self, room_id):
+        if not room_id or os.path.basename(room_id) != room_id or room_id.startswith('.'):
+            raise ValueError(f"잘못된 공유방 ID입니다: {room_id!r}")
+        return os.path.join(self.snapshots_dir, f'{room_id}.json')
+
+    def get_room_snapshot(self, room_id):
+        """공유방 스냅샷을 반환합니다. 아직 만들어지지 않았으면 None입니다."""
+        return self._read_json(self._room_snapshot_file(room_id), None)
+
+    def save_room_snapshot(self, room_id, snapshot):
+        """공유방 스냅샷을 저장하고 역색인을 함께 고칩니다."""
+        path = self._room_snapshot_file(room_id)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        with file_lock(self.room_index_file): # 스냅샷과 역색인이 어긋나지 않도록 함께 잠금
+            old_snapshot = self.get_room_snapshot(room_id)
+            self._write_json(path, snapshot)
+            index = self._read_json(self.room_index_file, {'records': {}, 'creators': {}})
+            self._write_json(self.room_index_file, _reindex_room(index, room_id, old_snapshot, snapshot))
+
+    def room_ids_for_records(self, record_ids):
+        """기록들 중 하나라도 들어 있는 공유방 ID 집합을 반환합니다."""
+        index = self._read_json(self.room_index_file, {'records': {}, 'creators': {}})
+        return {room_id for record_id in record_ids for room_id in index['records'].get(record_id, ())}
+
+    def room_ids_for_creator(self, username):
+        """사용자가 만든 공유방 중 스냅샷이 있는 공유방 ID 목록을 반환합니다."""
+        index = self._read_json(self.room_index_file, {'records': {}, 'creators': {}})
+        return list(index['creators'].get(username, ()))
+
+
+# --- SQLite 백엔드 ---
+# 스키마 마이그레이션 목록입니다. PRAGMA user_version에 적용된 개수를 기록하고, 새 버전은 뒤에 추가합니다.
+_SQLITE_MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS records (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT, -- 저장 순서 유지용
+        id TEXT NOT NULL,
+        username TEXT NOT NULL,
+        data TEXT NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_records_id ON records(id);
+    CREATE INDEX IF NOT EXISTS idx_records_username ON records(username, seq);
+    CREATE TABLE IF NOT EXISTS sharing_rooms (
+        room_id TEXT PRIMARY KEY,
+        creator_username TEXT NOT NULL,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_sharing_rooms_creator ON sharing_rooms(creator_username);
+    """,
+    """
+    -- 캐시 무효화용 버전 번호: 'users', 'rooms', 'records:<username>' 별로 쓰기마다 1씩 증가
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    );
+    """,
+    """
+    -- 기록 목록의 필터/정렬을 DB에서 처리하기 위한 컬럼과 인덱스
+    ALTER TABLE records ADD COLUMN type TEXT;
+    ALTER TABLE records ADD COLUMN title TEXT;
+    ALTER TABLE records ADD COLUMN rating INTEGER;
+    ALTER TABLE records ADD COLUMN recorded_date TEXT;
+    UPDATE records SET
+        type = json_extract(data, '$.type'),
+        title = json_extract(data, '$.title'),
+        rating = json_extract(data, '$.rating'),
+        recorded_date = json_extract(data, '$.recorded_date');
+    CREATE INDEX IF NOT EXISTS idx_records_user_date ON records(username, recorded_date);
+    CREATE INDEX IF NOT EXISTS idx_records_user_rating ON records(username, rating);
+    """,
+    """
+    -- 공유방 스냅샷(공유된 기록을 미리 모아 둔 것)과 기록 ID -> 공유방 역색인
+    CREATE TABLE IF NOT EXISTS room_snapshots (
+        room_id TEXT PRIMARY KEY,
+        creator_username TEXT NOT NULL,
+        etag TEXT NOT NULL,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_room_snapshots_creator ON room_snapshots(creator_username);
+    CREATE TABLE IF NOT EXISTS room_records (
+        record_id TEXT NOT NULL,
+        room_id TEXT NOT NULL,
+        PRIMARY KEY (record_id, room_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_room_records_room ON room_records(room_id);
+    """,
+]
+
+_INSERT_RECORD = (
+    "INSERT INTO records (id, username, type, title, rating, recorded_date, data) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _record_row(username, record):
+    """_INSERT_RECORD에 넣을 값 튜플을 만듭니다."""
+    return (
+        record['id'], username, record.get('type'), record.get('title'), record.get('rating'),
+        record.get('recorded_date'), json.dumps(record, ensure_ascii=False)
+    )
+
+
+class SqliteStorage:
+    """SQLite 데이터베이스에 데이터를 저장하는 백엔드입니다.
+
+    Streamlit은 세션마다 다른 스레드에서 스크립트를 실행하므로 연결은 스레드별로 하나씩 만듭니다.
+    """
+
+    def __init__(self, db_path=SQLITE_DB_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._migrate(self._conn())
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL") # 읽기와 쓰기가 서로 막지 않도록
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _cache_name(self, name):
+        return f'sqlite:{self.db_path}:{name}'
+
+    def _version(self, name):
+        row = self._conn().execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _bump_version(self, conn, name):
+        """트랜잭션 안에서 버전을 올리고 (이전 버전, 새 버전)을 반환합니다."""
+        row = conn.execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+        old = row[0] if row else 0
+        conn.execute("INSERT OR REPLACE INTO data_versions (name, version) VALUES (?, ?)", (name, old + 1))
+        return old, old + 1
+
+    def _cached_load(self, name, query, params, build):
+        """버전이 바뀌지 않았으면 캐시된 값을, 아니면 query 결과로 build 한 값을 반환합니다."""
+        cache = get_cache()
+        version = self._version(name)
+        value = cache.get(self._cache_name(name), version, _MISSING)
+        if value is _MISSING:
+            rows = self._conn().execute(query, params).fetchall()
+            value = build(rows)
+            cache.put(self._cache_name(name), version, value, sum(len(row[-1]) for row in rows))
+        return value
+
+    def _migrate(self, conn):
+        if conn.execute("PRAGMA user_version").fetchone()[0] == len(_SQLITE_MIGRATIONS):
+            return
+        # executescript()는 스크립트마다 커밋하므로, 여러 프로세스가 같은 마이그레이션을 두 번 적용하지 않도록 파일 잠금
+        with file_lock(self.db_path):
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for i, script in enumerate(_SQLITE_MIGRATIONS[version:], start=version + 1):
+                with conn:
+                    conn.executescript(script)
+                    conn.execute(f"PRAGMA user_version={i}")
+
+    # 사용자
+    def load_users(self):
+        return self._cached_load(
+            'users', "SELECT username, data FROM users", (),
+            lambda rows: {username: json.loads(data) for username, data in rows}
+        )
+
+    def save_users(self, users):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM users")
+            conn.executemany(
+                "INSERT INTO users (username, data) VALUES (?, ?)",
+                [(username, json.dumps(data, ensure_ascii=False)) for username, data in users.items()]
+            )
+            self._bump_version(conn, 'users')
+
+    def get_user(self, username):
+        row = self._conn().execute("SELECT data FROM users WHERE username = ?", (username,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add_user(self, username, user_data):
+        """사용자를 추가합니다. 이미 존재하면 False를 반환합니다."""
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO users (username, data) VALUES (?, ?)",
+                (username, json.dumps(user_data, ensure_ascii=False))
+            )
+            if cur.rowcount == 1:
+                self._bump_version(conn, 'users')
+        return cur.rowcount == 1
+
+    def update_user(self, username, user_data):
+        """사용자 정보를 바꿉니다. 없는 사용자면 False를 반환합니다."""
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                "UPDATE users SET data = ? WHERE username = ?", (json.dumps(user_data, ensure_ascii=False), username)
+            )
+            if cur.rowcount == 1:
+                self._bump_version(conn, 'users')
+        return cur.rowcount == 1
+
+    # 기록
+    def load_user_records(self, username):
+        return self._cached_load(
+            f'records:{username}', "SELECT data FROM records WHERE username = ? ORDER BY seq", (username,),
+            lambda rows: [json.loads(data) for (data,) in rows]
+        )
+
+    def get_user_record(self, username, record_id):
+        """ID로 기록 하나를 찾아 반환합니다. 없으면 None입니다."""
+        row = self._conn().execute(
+            "SELECT data FROM records WHERE id = ? AND username = ?", (record_id, username)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query_user_records(self, username, record_type=None, min_rating=None, date_from=None,
+                           sort='recorded_desc', offset=0, limit=20):
+        """조건에 맞는 기록 중 한 페이지와 전체 개수를 (기록 리스트, 전체 개수)로 반환합니다. 필터와 정렬은 DB에서 처리합니다."""
+        where, params = ["username = ?"], [username]
+        if record_type:
+            where.append("type = ?")
+            params.append(record_type)
+        if min_rating:
+            where.append("rating >= ?")
+            params.append(min_rating)
+        if date_from:
+            where.append("recorded_date >= ?")
+            params.append(date_from)
+        field, descending = RECORD_SORTS[sort] # field는 RECORD_SORTS의 고정된 값만 사용
+        where_sql = " AND ".join(where)
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM records WHERE {where_sql}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT data FROM records WHERE {where_sql} "
+            f"ORDER BY {field} {'DESC' if descending else 'ASC'}, seq LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return [json.loads(data) for (data,) in rows], total
+
+    def save_user_records(self, username, records):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM records WHERE username = ?", (username,))
+            conn.executemany(_INSERT_RECORD, [_record_row(username, r) for r in records])
+            self._bump_version(conn, f'records:{username}')
+
+    def records_version(self, username):
+        """사용자 기록 묶음의 버전 번호를 반환합니다. 기록이 바뀌면 값도 바뀝니다."""
+        return self._version(f'records:{username}')
+
+    def append_user_record(self, username, record):
+        """기록 하나를 추가합니다."""
+        return self.append_user_records(username, [record])
+
+    def append_user_records(self, username, records):
+        """기록 여러 개를 한 트랜잭션으로 추가하고, 추가하기 전과 후의 기록 묶음 버전을 (old, new)로 반환합니다."""
+        records = list(records)
+        conn = self._conn()
+        rows = [_record_row(username, record) for record in records]
+        with conn:
+            conn.executemany(_INSERT_RECORD, rows)
+            old, new = self._bump_version(conn, f'records:{username}')
+        cache = get_cache()
+        # 캐시된 리스트는 다른 세션이 보고 있을 수 있으므로 새 리스트로 교체합니다.
+        cache.update(self._cache_name(f'records:{username}'), old, new, lambda cached: cached + records,
+                     sum(len(row[-1]) for row in rows))
+        return old, new
+
+    def update_user_records(self, username, records):
+        """기록 여러 개를 ID로 찾아 한 트랜잭션으로 고칩니다. 없는 ID는 건너뛰고, 고친 기록 수를 반환합니다."""
+        changed = {record['id']: record for record in records}
+        rows = [_record_row(username, record) for record in changed.values()]
+        conn = self._conn()
+        with conn:
+            cur = conn.executemany(
+                "UPDATE records SET type = ?, title = ?, rating = ?, recorded_date = ?, data = ? "
+                "WHERE id = ? AND username = ?",
+                [(*row[2:], row[0], row[1]) for row in rows]
+            )
+            updated = cur.rowcount
+            if not updated:
+                return 0
+            old, new = self._bump_version(conn, f'records:{username}')
+        get_cache().update(self._cache_name(f'records:{username}'), old, new,
+                           lambda cached: [changed.get(r['id'], r) for r in cached], 0)
+        return updated
+
+    def delete_user_records(self, username, record_ids):
+        """기록 여러 개를 ID로 찾아 지우고 지운 기록 수를 반환합니다. 없는 ID는 건너뜁니다.
+
+        지운 기록을 공유한 공유방(room_records 역색인)의 shared_record_ids와 스냅샷, 역색인도 같은 트랜잭션에서 고칩니다.
+        """
+        conn = self._conn()
+        with conn:
+            deleted = set()
+            for record_id in set(record_ids):
+                cur = conn.execute("DELETE FROM records WHERE id = ? AND username = ?", (record_id, username))
+                if cur.rowcount:
+                    deleted.add(record_id)
+            if not deleted:
+                return 0
+            old, new = self._bump_version(conn, f'records:{username}')
+            placeholders = ', '.join('?' * len(deleted))
+            room_ids = [room_id for (room_id,) in conn.execute(
+                f"SELECT DISTINCT room_id FROM room_records WHERE record_id IN ({placeholders})", list(deleted)
+            )]
+            for room_id in room_ids:
+                row = conn.execute("SELECT data FROM sharing_rooms WHERE room_id = ?", (room_id,)).fetchone()
+                if row is not None:
+                    room = json.loads(row[0])
+                    room['shared_record_ids'] = [i for i in room['shared_record_ids'] if i not in deleted]
+                    conn.execute("UPDATE sharing_rooms SET data = ? WHERE room_id = ?",
+                                 (json.dumps(room, ensure_ascii=False), room_id))
+                row = conn.execute("SELECT data FROM room_snapshots WHERE room_id = ?", (room_id,)).fetchone()
+                if row is not None:
+                    snapshot = _snapshot_without(json.loads(row[0]), deleted)
+                    conn.execute("UPDATE room_snapshots SET etag = ?, data = ? WHERE room_id = ?",
+                                 (snapshot['etag'], json.dumps(snapshot, ensure_ascii=False), room_id))
+            conn.execute(f"DELETE FROM room_records WHERE record_id IN ({placeholders})", list(deleted))
+            if room_ids:
+                self._bump_version(conn, 'rooms')
+        get_cache().update(self._cache_name(f'records:{username}'), old, new,
+                           lambda cached: [r for r in cached if r['id'] not in deleted], 0)
+        return len(deleted)
+
+    # 공유방
+    def load_sharing_rooms(self):
+        return self._cached_load(
+            'rooms', "SELECT room_id, data FROM sharing_rooms", (),
+            lambda rows: {room_id: json.loads(data) for room_id, data in rows}
+        )
+
+    def save_sharing_rooms(self, rooms):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sharing_rooms")
+            conn.executemany(
+                "INSERT INTO sharing_rooms (room_id, creator_username, data) VALUES (?, ?, ?)",
+                [(room_id, room['creator_username'], json.dumps(room, ensure_ascii=False)) for room_id, room in rooms.items()]
+            )
+            self._bump_version(conn, 'rooms')
+
+    def get_sharing_room(self, room_id):
+        row = self._conn().execute("SELECT data FROM sharing_rooms WHERE room_id = ?", (room_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add_sharing_room(self, room_id, room_data):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sharing_rooms (room_id, creator_username, data) VALUES (?, ?, ?)",
+                (room_id, room_data['creator_username'], json.dumps(room_data, ensure_ascii=False))
+            )
+            self._bump_version(conn, 'rooms')
+
+    # 공유방 스냅샷
+    def get_room_snapshot(self, room_id):
+        """공유방 스냅샷을 반환합니다. 아직 만들어지지 않았으면 None입니다.
+
+        etag가 같으면 캐시에 있는 값을 그대로 쓰므로 JSON을 다시 파싱하지 않습니다.
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT etag FROM room_snapshots WHERE room_id = ?", (room_id,)).fetchone()
+        if row is None:
+            return None
+        cache = get_cache()
+        name = self._cache_name(f'room:{room_id}')
+        snapshot = cache.get(name, row[0], _MISSING)
+        if snapshot is _MISSING:
+            row = conn.execute("SELECT etag, data FROM room_snapshots WHERE room_id = ?", (room_id,)).fetchone()
+            if row is None:
+                return None
+            snapshot = json.loads(row[1])
+            cache.put(name, row[0], snapshot, len(row[1]))
+        return snapshot
+
+    def save_room_snapshot(self, room_id, snapshot):
+        """공유방 스냅샷을 저장하고 역색인을 함께 고칩니다."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO room_snapshots (room_id, creator_username, etag, data) VALUES (?, ?, ?, ?)",
+                (room_id, snapshot['creator_username'], snapshot['etag'], json.dumps(snapshot, ensure_ascii=False))
+            )
+            conn.execute("DELETE FROM room_records WHERE room_id = ?", (room_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO room_records (record_id, room_id) VALUES (?, ?)",
+                [(record['id'], room_id) for record in snapshot['records']]
+            )
+
+    def room_ids_for_records(self, record_ids):
+        """기록들 중 하나라도 들어 있는 공유방 ID 집합을 반환합니다."""
+        conn = self._conn()
+        room_ids = set()
+        for record_id in record_ids:
+            room_ids.update(room_id for (room_id,) in conn.execute(
+                "SELECT room_id FROM room_records WHERE record_id = ?", (record_id,)
+            ))
+        return room_ids
+
+    def room_ids_for_creator(self, username):
+        """사용자가 만든 공유방 중 스냅샷이 있는 공유방 ID 목록을 반환합니다."""
+        rows = self._conn().execute("SELECT room_id FROM room_snapshots WHERE creator_username = ?", (username,))
+        return [room_id for (room_id,) in rows]
+
+
+# --- 백엔드 선택 ---
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """설정된 저장소 백엔드를 반환합니다. 프로세스 전체에서 하나의 인스턴스를 공유합니다."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == 'sqlite':
+                    backend = SqliteStorage()
+                elif STORAGE_BACKEND == 'json':
+                    backend = JsonStorage()
+                else:
+                    raise ValueError(f"알 수 없는 저장소 백엔드입니다: {STORAGE_BACKEND}")
+                _storage = instrument(backend, 'storage') # 계측이 켜져 있으면 메서드마다 실행 시간을 잼
+    return _storage
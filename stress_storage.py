@@ -0,0 +1,96 @@
+"""여러 프로세스에서 동시에 회원가입/공유방 생성을 실행해 저장 내용이 사라지지 않는지 확인하는 스트레스 테스트입니다.
+
+사용법:
+    python stress_storage.py [--workers 8] [--ops 50] [--backend json|sqlite]
+
+test.py의 register_user / create_sharing_room 은 저장소의 add_user / add_sharing_room 을 그대로 호출하므로
+여기서는 Streamlit 없이 같은 저장소 메서드를 직접 호출합니다.
+모든 작업이 끝난 뒤 사용자와 공유방 수가 (워커 수 x 작업 수)와 같은지 확인하고, 잠금 대기 시간을 보고합니다.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from locking import lock_stats
+from storage import JsonStorage, SqliteStorage
+
+
+def _make_storage(backend, data_dir):
+    if backend == 'sqlite':
+        return SqliteStorage(os.path.join(data_dir, 'records.db'))
+    return JsonStorage(data_dir=data_dir)
+
+
+def _worker(args):
+    backend, data_dir, worker_id, ops = args
+    storage = _make_storage(backend, data_dir)
+    failures = 0
+    for i in range(ops):
+        username = f'user_{worker_id}_{i}'
+        # register_user 와 같은 동작
+        if not storage.add_user(username, {'password': 'pw'}):
+            failures += 1
+        # create_sharing_room 과 같은 동작
+        storage.add_sharing_room(str(uuid.uuid4()), {
+            "room_name": f'room_{worker_id}_{i}',
+            "creator_username": username,
+            "room_password": '',
+            "shared_record_ids": [],
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+    return failures, lock_stats()
+
+
+def run(workers, ops, backend, data_dir):
+    """스트레스 테스트를 실행하고 결과를 딕셔너리로 반환합니다."""
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.map(_worker, [(backend, data_dir, w, ops) for w in range(workers)])
+    elapsed = time.perf_counter() - started
+
+    storage = _make_storage(backend, data_dir)
+    expected = workers * ops
+    acquisitions = sum(stats['acquisitions'] for _, stats in results)
+    total_wait = sum(stats['total_wait_seconds'] for _, stats in results)
+    return {
+        "expected": expected,
+        "users": len(storage.load_users()),
+        "rooms": len(storage.load_sharing_rooms()),
+        "failed_registrations": sum(failures for failures, _ in results),
+        "elapsed_seconds": elapsed,
+        "lock_acquisitions": acquisitions,
+        "avg_lock_wait_ms": total_wait / acquisitions * 1000 if acquisitions else 0.0,
+        "max_lock_wait_ms": max(stats['max_wait_seconds'] for _, stats in results) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장소 동시 쓰기 스트레스 테스트")
+    parser.add_argument('--workers', type=int, default=8, help="동시에 실행할 프로세스 수")
+    parser.add_argument('--ops', type=int, default=50, help="프로세스마다 실행할 가입/방 생성 횟수")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        result = run(args.workers, args.ops, args.backend, data_dir)
+
+    print(f"[{args.backend}] 워커 {args.workers}개 x {args.ops}회, {result['elapsed_seconds']:.2f}초")
+    print(f"  사용자 {result['users']}/{result['expected']}, 공유방 {result['rooms']}/{result['expected']}, "
+          f"가입 실패 {result['failed_registrations']}건")
+    print(f"  잠금 {result['lock_acquisitions']}회, 평균 대기 {result['avg_lock_wait_ms']:.2f}ms, "
+          f"최대 대기 {result['max_lock_wait_ms']:.2f}ms")
+
+    lost = result['users'] != result['expected'] or result['rooms'] != result['expected'] or result['failed_registrations']
+    if lost:
+        print("❌ 저장 내용이 사라졌습니다!")
+        sys.exit(1)
+    print("✅ 사라진 저장 내용이 없습니다.")
+
+
+if __name__ == "__main__":
+    main()
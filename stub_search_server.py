@@ -0,0 +1,143 @@
+"""TMDB / Google Books 검색 API를 흉내 내는 로컬 테스트 서버입니다.
+
+사용법:
+    python stub_search_server.py [--port 8765] [--delay 0.5] [--fail-rate 0.2] [--fail-first 3 --fail-status 429 --retry-after 1]
+
+실행한 뒤 다음 환경 변수로 앱이 이 서버를 사용하게 합니다.
+    TMDB_API_BASE=http://127.0.0.1:8765/3
+    GOOGLE_BOOKS_API_BASE=http://127.0.0.1:8765/books/v1
+
+--delay로 응답 지연을, --fail-rate로 503 응답 비율을 정해 재시도/서킷 브레이커/동시 검색을 확인할 수 있습니다.
+--fail-first를 주면 처음 그만큼의 요청은 항상 --fail-status(기본 503)로 응답합니다. (--retry-after로 Retry-After 헤더 추가)
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def _movie_results(query, page=1):
+    return {
+        "page": page,
+        "total_pages": 3,
+        "total_results": 60,
+        "results": [
+            {
+                "id": page * 100 + i,
+                "title": query if page == 1 and i == 0 else f"{query} 영화 {page}-{i}", # 첫 결과는 제목이 정확히 일치
+                "overview": f"'{query}'에 대한 테스트 줄거리입니다.",
+                "release_date": f"20{10 + i:02d}-01-01",
+                "poster_path": f"/poster-{page * 100 + i}.jpg" if i % 2 == 0 else None,
+            }
+            for i in range(20 if page <= 3 else 0) # total_pages 뒤로는 빈 결과
+        ],
+    }
+
+
+def _book_results(query, start_index=0, max_results=10):
+    return {
+        "totalItems": 40,
+        "items": [
+            {
+                "id": f"book-{start_index + i}",
+                "volumeInfo": {
+                    "title": query if start_index + i == 0 else f"{query} 책 {start_index + i}",
+                    "authors": ["테스트 저자"],
+                    "description": f"'{query}'에 대한 테스트 설명입니다.",
+                    "publishedDate": "2020",
+                    "imageLinks": {"thumbnail": f"http://books.example/cover-{start_index + i}.jpg"},
+                },
+            }
+            for i in range(max(0, min(max_results, 40 - start_index))) # totalItems까지만
+        ],
+    }
+
+
+def _movie_credits(movie_id):
+    return {"id": movie_id, "crew": [{"job": "Director", "name": f"테스트 감독 {movie_id}"}, {"job": "Writer", "name": "작가"}]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+    fail_first = 0 # 처음 이만큼의 요청은 fail_status로 응답
+    fail_status = 503
+    retry_after = None # 실패 응답에 붙일 Retry-After 헤더 값 (초)
+    stats = None # {'requests': 받은 요청 수} (make_server가 서버마다 따로 만듦)
+    stats_lock = threading.Lock()
+
+    def do_GET(self):
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            seen = self.stats['requests']
+        time.sleep(self.delay)
+        if seen <= self.fail_first:
+            self._send(self.fail_status, {"error": "stub failure"}, self.retry_after)
+            return
+        if random.random() < self.fail_rate:
+            self._send(503, {"error": "stub failure"})
+            return
+        parts = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        query = params.get('query') or params.get('q') or ''
+        if parts.path == '/3/search/movie':
+            self._send(200, _movie_results(query, int(params.get('page', 1))))
+        elif parts.path.startswith('/3/movie/') and parts.path.endswith('/credits'):
+            self._send(200, _movie_credits(int(parts.path.split('/')[3])))
+        elif parts.path == '/books/v1/volumes':
+            self._send(200, _book_results(query, int(params.get('startIndex', 0)), int(params.get('maxResults', 10))))
+        else:
+            self._send(404, {"error": "not found"})
+
+    def _send(self, status, body, retry_after=None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if retry_after is not None:
+            self.send_header('Retry-After', str(retry_after))
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass # 요청마다 로그를 찍지 않음
+
+
+def make_server(port=0, delay=0.0, fail_rate=0.0, fail_first=0, fail_status=503, retry_after=None):
+    """테스트 서버를 만듭니다. port=0이면 빈 포트를 고르며, server.server_address로 확인할 수 있습니다.
+
+    받은 요청 수는 server.stats['requests']로 확인할 수 있습니다.
+    """
+    stats = {'requests': 0}
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        "delay": delay, "fail_rate": fail_rate, "fail_first": fail_first, "fail_status": fail_status,
+        "retry_after": retry_after, "stats": stats,
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.stats = stats
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TMDB / Google Books 검색 API 테스트 서버")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help="응답마다 기다릴 시간 (초)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="503으로 응답할 비율 (0~1)")
+    parser.add_argument('--fail-first', type=int, default=0, help="처음 이만큼의 요청은 실패로 응답")
+    parser.add_argument('--fail-status', type=int, default=503, help="--fail-first 요청에 쓸 상태 코드")
+    parser.add_argument('--retry-after', type=int, help="--fail-first 응답에 붙일 Retry-After 헤더 (초)")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.delay, args.fail_rate, args.fail_first, args.fail_status, args.retry_after)
+    print(f"http://127.0.0.1:{args.port} 에서 테스트 서버를 실행합니다. (Ctrl+C로 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
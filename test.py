@@ -1,141 +1,263 @@
 import streamlit as st
-import json
 import os
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid # 고유 ID 생성을 위해 추가
+from image_cache import get_image_cache, is_remote_url # 포스터/표지 썸네일 캐시
+from instrumentation import begin_rerun, get_recorder, is_admin, span, timed # 실행 시간 계측 (RECORD_APP_PROFILE=1)
+from http_client import get_http_client, run_concurrently # 연결을 재사용하는 공용 HTTP 클라이언트
+from passwords import PasswordBusyError, hash_password, verify_password # 비밀번호 해시 (scrypt/PBKDF2)
+from popularity import get_popularity_index # 전체 사용자 작품 인기 집계
+from enrichment import start_background_enricher # 빈 칸이 있는 기록 정보 채우기
+from record_io import EXPORT_FORMATS, iter_export, import_records # 기록 가져오기/내보내기
+from recommender import get_recommender # 비슷한 작품 추천
+import record_changes # 기록 추가/수정/삭제를 저장소와 색인·집계에 함께 반영
+import record_stats # 내 기록 통계 (기록 묶음 버전별 캐시)
+from record_search import get_record_index # 내 기록 전문 검색 인덱스
+from room_snapshots import get_room_snapshot, publish_room_snapshot, sync_creator_rooms # 공유방 스냅샷
+from search_cache import BOOK_RESULT_FIELDS, get_search_cache, normalize_key, slim_movie_results # 외부 검색 결과 캐시
+from storage import get_storage # 저장소 백엔드 (JSON 파일 또는 SQLite)
+from title_index import get_title_index # 제목/감독·저자 자동 완성
 
 # --- Constants ---
-USER_DATA_FILE = 'users.json' # 사용자 정보를 저장할 파일 (로그인 정보)
-SHARING_ROOMS_FILE = 'sharing_rooms.json' # 공유방 정보를 저장할 파일
+# 검색 API 주소 (로컬 테스트 서버 stub_search_server.py를 쓸 때는 환경 변수로 바꿉니다)
+TMDB_API_BASE = os.environ.get("TMDB_API_BASE", "https://api.themoviedb.org/3")
+GOOGLE_BOOKS_API_BASE = os.environ.get("GOOGLE_BOOKS_API_BASE", "https://www.googleapis.com/books/v1")
+RECORDS_PAGE_SIZE = int(os.environ.get("RECORD_APP_PAGE_SIZE", "10")) # '내 기록 보기' 한 페이지의 기본 기록 수
+SEARCH_PAGE_SIZES = {'영화': 20, '책': 10} # 검색 API 한 쪽의 결과 수 (TMDB는 20개 고정, Google Books는 maxResults 기본값)
 
 # Google Books API Key (선택 사항)
 # 발급받으셨다면 여기에 넣어주세요. 없어도 책 검색은 작동할 수 있습니다.
 # st.secrets.get()은 secrets.toml에서 값을 가져오므로, 실제 배포시 Streamlit Cloud의 Secrets에 등록해야 합니다.
 GOOGLE_BOOKS_API_KEY = st.secrets.get("GOOGLE_BOOKS_API_KEY", "YOUR_GOOGLE_BOOKS_API_KEY_HERE_IF_NOT_SET") 
 
-# --- Helper Functions: 파일 기반 데이터 관리 ---
+# --- Helper Functions: 데이터 관리 ---
+# 실제 저장 방식은 storage.py의 백엔드가 담당합니다. (RECORD_APP_STORAGE 환경 변수로 선택)
 def load_users():
     """사용자 데이터를 로드합니다."""
-    if os.path.exists(USER_DATA_FILE):
-        with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    return get_storage().load_users()
 
 def save_users(users):
     """사용자 데이터를 저장합니다."""
-    with open(USER_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(users, f, indent=4)
+    get_storage().save_users(users)
 
 def authenticate_user(username, password):
     """사용자 인증을 시도합니다."""
-    users = load_users()
-    if username in users and users[username]['password'] == password:
-        return True
-    return False
+    user = get_storage().get_user(username)
+    if not user:
+        return False
+    ok, needs_rehash = verify_password(password, user['password'])
+    if ok and needs_rehash:
+        # 예전 평문 비밀번호이거나 해시 비용 설정이 바뀌었으면 지금 설정으로 다시 해시해 저장
+        get_storage().update_user(username, dict(user, password=hash_password(password)))
+    return ok
 
 def register_user(username, password):
     """새로운 사용자를 등록합니다."""
-    users = load_users() 
-    if username in users:
-        return False # 이미 존재하는 사용자
-    users[username] = {'password': password}
-    save_users(users)
-    return True
-
-def get_user_records_file(username):
-    """사용자별 기록 파일 경로를 반환합니다."""
-    return f'{username}_records.json'
+    # 이미 존재하는 사용자면 False
+    return get_storage().add_user(username, {'password': hash_password(password)})
 
 def load_user_records(username):
     """특정 사용자의 기록을 로드합니다."""
-    records_file = get_user_records_file(username)
-    if os.path.exists(records_file):
-        with open(records_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return [] # 파일이 없으면 빈 리스트 반환
+    return get_storage().load_user_records(username)
+
+def query_user_records(username, record_type=None, min_rating=None, date_from=None, sort='recorded_desc', offset=0, limit=RECORDS_PAGE_SIZE):
+    """조건에 맞는 기록 한 페이지와 전체 개수를 (기록 리스트, 전체 개수)로 반환합니다."""
+    return get_storage().query_user_records(username, record_type, min_rating, date_from, sort, offset, limit)
 
 def save_user_records(username, records):
     """특정 사용자의 기록을 저장합니다."""
-    records_file = get_user_records_file(username)
-    with open(records_file, 'w', encoding='utf-8') as f:
-        json.dump(records, f, indent=4, ensure_ascii=False) # 한글 인코딩 문제 방지
+    get_storage().save_user_records(username, records)
+    get_record_index().reindex_user(username, records)
+    sync_creator_rooms(username, records) # 이 사용자의 공유방 스냅샷도 다시 만듦
+    get_recommender().mark_changed(len(records))
+
+def add_user_record(username, record):
+    """특정 사용자의 기록 하나를 추가합니다. (기존 기록 전체를 다시 쓰지 않음)"""
+    record_changes.add_user_records(username, [record]) # 통계, 검색 색인, 인기 집계 등에도 이 기록만 반영
+
+def add_user_records(username, records):
+    """기록 여러 개를 한 번에 추가합니다. (가져오기용: 저장, 검색 색인, 인기 집계를 각각 한 번에 처리)"""
+    record_changes.add_user_records(username, records)
+
+def edit_user_record(username, record):
+    """기록 하나를 ID로 찾아 고칩니다. 고친 기록만 저장소, 색인, 집계, 공유방 스냅샷에 반영합니다."""
+    return record_changes.update_user_records(username, [record]) > 0
+
+def delete_user_record(username, record_id):
+    """기록 하나를 지웁니다. 이 기록을 공유한 공유방에서도 함께 빠집니다."""
+    return record_changes.delete_user_records(username, [record_id]) > 0
+
+def search_user_records(username, query, limit=50):
+    """사용자의 기록을 제목/감독·저자/장르/감상으로 검색합니다."""
+    return get_record_index().search(username, query, limit=limit, load_records=load_user_records)
 
 # --- Helper Functions: 공유방 관리 ---
 def load_sharing_rooms():
     """공유방 데이터를 로드합니다."""
-    if os.path.exists(SHARING_ROOMS_FILE):
-        with open(SHARING_ROOMS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {} # {room_id: room_data, ...} 형태
+    return get_storage().load_sharing_rooms() # {room_id: room_data, ...} 형태
 
 def save_sharing_rooms(rooms):
     """공유방 데이터를 저장합니다."""
-    with open(SHARING_ROOMS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(rooms, f, indent=4, ensure_ascii=False)
+    get_storage().save_sharing_rooms(rooms)
 
 def create_sharing_room(creator_username, room_name, room_password, shared_record_ids):
     """새로운 공유방을 생성하고 저장합니다."""
-    rooms = load_sharing_rooms()
     room_id = str(uuid.uuid4()) # 고유한 방 ID 생성
-    
-    rooms[room_id] = {
+    room_data = {
         "room_name": room_name,
         "creator_username": creator_username,
-        "room_password": room_password, # 평문으로 저장 (보안 강화를 위해선 해싱 필요)
+        "room_password": hash_password(room_password) if room_password else "", # 비밀번호가 없으면 빈 문자열
         "shared_record_ids": shared_record_ids,
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
-    save_sharing_rooms(rooms)
+    get_storage().add_sharing_room(room_id, room_data)
+    publish_room_snapshot(room_id, room_data) # 공유된 기록을 미리 모아 두어 공유방 화면은 스냅샷만 읽음
     return room_id
 
 def get_sharing_room(room_id):
     """특정 공유방 정보를 가져옵니다."""
-    rooms = load_sharing_rooms()
-    return rooms.get(room_id)
+    return get_storage().get_sharing_room(room_id)
 
 # --- API 연동 함수: 영화/책 검색 ---
-def search_movies(query):
-    """TMDB API를 이용해 영화를 검색합니다. (API Key 없어도 작동 시도)"""
-    url = f"https://api.themoviedb.org/3/search/movie"
+# 실제 요청은 _fetch_* 함수가 하고, _cached_* 함수는 검색 캐시(search_cache.py)를 먼저 확인합니다.
+# 실패 결과도 짧은 시간 동안 캐시되므로 같은 오류가 연달아 나도 API를 반복 호출하지 않습니다.
+# 결과는 쪽(page) 단위로 가져오고 캐시하며, 화면에 보이는 쪽의 다음 쪽은 백그라운드에서 미리 가져옵니다.
+def _fetch_movies(query, page=1):
+    """TMDB API를 호출해 page쪽의 (결과 리스트, 오류 메시지)를 반환합니다."""
+    url = f"{TMDB_API_BASE}/search/movie"
     params = {
         # "api_key": "YOUR_TMDB_API_KEY_HERE", # 실제 TMDB API Key를 발급받으면 여기에 입력
         "query": query,
         "language": "ko-KR"
     }
+    if page > 1:
+        params["page"] = page
     try:
-        response = requests.get(url, params=params, timeout=5) # 타임아웃 추가
+        response = get_http_client().get(url, params=params, timeout=5) # 연결 재사용 + 재시도
         if response.status_code == 200:
-            results = response.json().get('results', [])
-            return results
-        else:
-            st.warning(f"영화 검색에 실패했습니다 (코드: {response.status_code}). API Key 없이는 불안정할 수 있습니다. 수동 입력을 이용해보세요.")
-            return []
+            results = slim_movie_results(response.json().get('results', [])) # 화면에 쓰는 필드만 보관
+            get_title_index().add_search_results('영화', [(movie['title'], '') for movie in results])
+            return results, None
+        return [], f"영화 검색에 실패했습니다 (코드: {response.status_code}). API Key 없이는 불안정할 수 있습니다. 수동 입력을 이용해보세요."
     except requests.exceptions.RequestException as e:
-        st.warning(f"영화 검색 요청 중 오류 발생: {e}. 인터넷 연결 또는 API 문제일 수 있습니다. 수동 입력을 이용해보세요.")
-        return []
+        return [], f"영화 검색 요청 중 오류 발생: {e}. 인터넷 연결 또는 API 문제일 수 있습니다. 수동 입력을 이용해보세요."
+
+def _movie_search_request(query, page=1):
+    """영화 검색 page쪽의 (캐시 키, 가져오는 함수)를 반환합니다."""
+    return normalize_key('영화', query, 'ko-KR', page), lambda: _fetch_movies(query, page)
 
-def search_books(query):
-    """Google Books API를 이용해 책을 검색합니다."""
-    url = f"https://www.googleapis.com/books/v1/volumes"
+def _fetch_books(query, page=1):
+    """Google Books API를 호출해 page쪽의 (결과 리스트, 오류 메시지)를 반환합니다."""
+    url = f"{GOOGLE_BOOKS_API_BASE}/volumes"
     params = {
         "q": query,
-        "langRestrict": "ko"
+        "langRestrict": "ko",
+        "fields": BOOK_RESULT_FIELDS, # 화면에 쓰는 필드만 받아서 응답 크기를 줄임
     }
+    if page > 1:
+        params["startIndex"] = (page - 1) * SEARCH_PAGE_SIZES['책']
+        params["maxResults"] = SEARCH_PAGE_SIZES['책']
     # GOOGLE_BOOKS_API_KEY가 존재하고 기본 플레이스홀더가 아니면 사용
     if GOOGLE_BOOKS_API_KEY and GOOGLE_BOOKS_API_KEY != "YOUR_GOOGLE_BOOKS_API_KEY_HERE_IF_NOT_SET":
         params["key"] = GOOGLE_BOOKS_API_KEY
     
     try:
-        response = requests.get(url, params=params, timeout=5) # 타임아웃 추가
+        response = get_http_client().get(url, params=params, timeout=5) # 연결 재사용 + 재시도
         if response.status_code == 200:
-            return response.json().get('items', [])
-        else:
-            st.warning(f"책 검색에 실패했습니다 (코드: {response.status_code}). 수동 입력을 이용해보세요.")
-            return []
+            results = response.json().get('items', [])
+            get_title_index().add_search_results('책', [
+                (book.get('volumeInfo', {}).get('title'), ', '.join(book.get('volumeInfo', {}).get('authors', [])))
+                for book in results
+            ])
+            return results, None
+        return [], f"책 검색에 실패했습니다 (코드: {response.status_code}). 수동 입력을 이용해보세요."
     except requests.exceptions.RequestException as e:
-        st.warning(f"책 검색 요청 중 오류 발생: {e}. 인터넷 연결 또는 API 문제일 수 있습니다. 수동 입력을 이용해보세요.")
-        return []
+        return [], f"책 검색 요청 중 오류 발생: {e}. 인터넷 연결 또는 API 문제일 수 있습니다. 수동 입력을 이용해보세요."
+
+def _book_search_request(query, page=1):
+    """책 검색 page쪽의 (캐시 키, 가져오는 함수)를 반환합니다."""
+    return normalize_key('책', query, 'ko', page), lambda: _fetch_books(query, page)
+
+SEARCH_REQUESTS = {'영화': _movie_search_request, '책': _book_search_request}
+
+def _cached_search_pages(result_type, query, pages):
+    """캐시를 거쳐 1~pages쪽을 가져와 (결과 리스트, 오류 메시지, 다음 쪽이 있을지)를 반환합니다. (st.* 호출 없음)
+
+    API가 한 쪽을 꽉 채워 돌려주지 않았으면 마지막 쪽으로 봅니다.
+    """
+    results = []
+    for page in range(1, pages + 1):
+        page_results, error = get_search_cache().get_or_fetch(*SEARCH_REQUESTS[result_type](query, page))
+        results.extend(page_results)
+        if error or len(page_results) < SEARCH_PAGE_SIZES[result_type]:
+            return results, error, False
+    return results, None, True
+
+def search_works(search_type, query, pages=1):
+    """'영화', '책', '영화+책' 중 search_type으로 1~pages쪽을 검색합니다.
+
+    [('영화', movie) 또는 ('책', book), ...]와 다음 쪽이 있을지를 반환하고, 다음 쪽은 백그라운드에서 미리 가져옵니다.
+    '영화+책'은 두 API를 동시에 호출하고, 각 API의 순위를 유지하며 영화와 책을 번갈아 배치합니다.
+    """
+    result_types = ['영화', '책'] if search_type == "영화+책" else [search_type]
+    fetched = run_concurrently(*[
+        (lambda result_type=result_type: _cached_search_pages(result_type, query, pages)) for result_type in result_types
+    ])
+    merged = []
+    has_more = False
+    for i in range(max(len(results) for results, _, _ in fetched)):
+        for result_type, (results, _, _) in zip(result_types, fetched):
+            if i < len(results):
+                merged.append((result_type, results[i]))
+    for result_type, (_, error, more) in zip(result_types, fetched):
+        if error:
+            st.warning(error)
+        if more:
+            has_more = True
+            get_search_cache().prefetch(*SEARCH_REQUESTS[result_type](query, pages + 1)) # 읽는 동안 다음 쪽 준비
+    return merged, has_more
+
+# --- 렌더링 함수: 검색 캐시 통계 ---
+def render_search_cache_metrics():
+    """사이드바에 외부 검색 캐시의 적중률과 아낀 시간을 보여줍니다."""
+    stats = get_search_cache().stats()
+    with st.sidebar.expander("📊 검색 캐시 통계"):
+        st.metric("적중률", f"{stats['hit_rate'] * 100:.1f}%")
+        st.metric("아낀 시간", f"{stats['saved_seconds']:.1f}초")
+        st.caption(
+            f"적중 {stats['hits']}회 (실패 결과 {stats['negative_hits']}회) / 요청 {stats['misses']}회, "
+            f"보관 중 {stats['entries']}/{stats['max_entries']}건"
+        )
+
+def render_profiling_panel(username):
+    """계측이 켜져 있으면 관리자에게 구간별 실행 시간 통계를 사이드바에 보여줍니다."""
+    if not is_admin(username):
+        return
+    recorder = get_recorder()
+    with st.sidebar.expander("⏱️ 실행 시간 측정"):
+        rows = recorder.summary()
+        if rows:
+            st.dataframe(
+                [{key: round(value, 1) if isinstance(value, float) else value for key, value in row.items()} for row in rows],
+                hide_index=True
+            )
+        st.caption("이번 실행에서 지금까지 끝난 구간")
+        st.text('\n'.join(
+            f"{'  ' * depth}{name} {seconds * 1000:.1f}ms" for name, seconds, depth in recorder.rerun_spans()
+        ) or "-")
+        st.download_button("Prometheus 형식으로 내려받기", recorder.prometheus_text(), file_name="record_app_metrics.txt")
+        if st.button("통계 초기화", key="profiling_reset"):
+            recorder.reset()
+
+# --- 렌더링 함수: 비슷한 작품 추천 ---
+def render_similar_works(record_type, title, limit=5):
+    """이 작품을 높게 평가한 사람들이 좋아한 다른 작품을 보여줍니다. (추천이 없으면 아무것도 표시하지 않음)"""
+    works = get_recommender().similar_works(record_type, title, limit)
+    if works:
+        st.write("**이 작품을 높게 평가한 사람들이 좋아한 작품:** " + ", ".join(
+            f"{work['title']} ({work['type']})" for work in works
+        ))
 
 # --- 렌더링 함수: 검색 결과 표시 및 수동 입력 폼 채우기 ---
 def display_movie_result(movie):
@@ -148,6 +270,7 @@ def display_movie_result(movie):
     st.subheader(title)
     st.write(f"개봉일: {release_date}")
     st.write(f"줄거리: {overview if overview else '줄거리 정보가 없습니다.'}")
+    render_similar_works('영화', title)
     if st.button(f"'{title}' 정보로 기록하기", key=f"movie_record_{movie.get('id')}"):
         st.session_state['manual_entry_title'] = title
         st.session_state['manual_entry_type'] = '영화'
@@ -172,6 +295,7 @@ def display_book_result(book):
     st.write(f"저자: {', '.join(authors)}")
     st.write(f"출판일: {published_date}")
     st.write(f"설명: {description[:200] + '...' if description and len(description) > 200 else (description if description else '설명 정보가 없습니다.')}")
+    render_similar_works('책', title)
     if st.button(f"'{title}' 정보로 기록하기", key=f"book_record_{book.get('id')}"):
         st.session_state['manual_entry_title'] = title
         st.session_state['manual_entry_type'] = '책'
@@ -183,11 +307,75 @@ def display_book_result(book):
         st.session_state['current_page'] = "🔍 작품 검색 및 기록" # 현재 페이지 유지
         st.rerun()
 
+def render_movie_expander(movie):
+    """영화 검색 결과 하나를 Expander로 보여줍니다."""
+    with st.expander(f"**{movie.get('title')} ({movie.get('release_date', '날짜 미상').split('-')[0]})**"):
+        display_movie_result(movie)
+
+def render_book_expander(book):
+    """책 검색 결과 하나를 Expander로 보여줍니다."""
+    volume_info = book.get('volumeInfo', {})
+    with st.expander(f"**{volume_info.get('title')} ({volume_info.get('authors', ['저자 미상'])[0]})**"):
+        display_book_result(book)
+
 # --- 렌더링 함수: 수동 기록 폼 ---
+def _reset_manual_widgets(*keys):
+    """폼 위젯의 현재 값을 지워 다음 실행에서 manual_entry_* 기본값으로 다시 만들어지게 합니다."""
+    for key in keys:
+        st.session_state.pop(key, None)
+
+def _apply_title_suggestion():
+    """자동 완성에서 고른 제목(과 종류, 감독/저자)을 수동 입력 폼에 채웁니다. (on_change 콜백)"""
+    suggestion = st.session_state.get('manual_title_suggestion')
+    if not suggestion:
+        return
+    st.session_state['manual_entry_title'] = suggestion['text']
+    _reset_manual_widgets('manual_title')
+    if suggestion['type']:
+        st.session_state['manual_entry_type'] = suggestion['type']
+        _reset_manual_widgets('manual_type_radio')
+    if suggestion['creator']:
+        st.session_state['manual_entry_director_author'] = suggestion['creator']
+        _reset_manual_widgets('manual_director_author')
+    st.session_state['manual_title_suggestion'] = None
+    st.session_state['manual_title_lookup'] = ''
+
+def _apply_creator_suggestion():
+    """자동 완성에서 고른 감독/저자를 수동 입력 폼에 채웁니다. (on_change 콜백)"""
+    suggestion = st.session_state.get('manual_creator_suggestion')
+    if not suggestion:
+        return
+    st.session_state['manual_entry_director_author'] = suggestion['text']
+    _reset_manual_widgets('manual_director_author')
+    st.session_state['manual_creator_suggestion'] = None
+    st.session_state['manual_title_lookup'] = ''
+
+def render_title_suggestions():
+    """이미 기록되었거나 검색된 적 있는 제목/감독·저자를 입력한 앞부분으로 찾아 고르게 합니다."""
+    prefix = st.text_input(
+        "🔎 제목이나 감독/저자 앞부분으로 찾기", key="manual_title_lookup",
+        help="다른 사용자들이 기록했거나 검색된 적 있는 이름을 골라 같은 작품을 같은 제목으로 기록할 수 있어요."
+    )
+    if not prefix:
+        return
+    index = get_title_index()
+    titles = index.suggest(prefix, 'title')
+    creators = index.suggest(prefix, 'director_author')
+    if not titles and not creators:
+        st.caption("일치하는 제목이 없습니다. 아래 폼에 직접 입력해주세요." if index.ready else "제목 목록을 준비하고 있습니다. 잠시 후 다시 찾아보세요.")
+        return
+    if titles:
+        st.pills("제목", titles, format_func=lambda s: f"{s['text']} ({s['type']})" if s['type'] else s['text'],
+                 key="manual_title_suggestion", on_change=_apply_title_suggestion)
+    if creators:
+        st.pills("감독/저자", creators, format_func=lambda s: s['text'],
+                 key="manual_creator_suggestion", on_change=_apply_creator_suggestion)
+
 def render_manual_entry_form(username):
     """사용자가 직접 작품 정보를 입력하고 저장하는 폼을 렌더링합니다."""
     st.subheader("📝 작품 수동 기록하기")
     st.info("검색되지 않거나 직접 입력하고 싶은 작품의 정보를 기록해보세요. 이미지 URL을 넣으면 포스터/표지도 함께 볼 수 있습니다!")
+    render_title_suggestions() # 폼 안의 입력은 저장할 때만 전달되므로 찾기 칸은 폼 밖에 둠
 
     with st.form("manual_record_form"):
         # 기존 세션 스테이트에서 값 불러오기 (검색 결과에서 가져왔을 경우)
@@ -218,7 +406,7 @@ def render_manual_entry_form(username):
         genre = st.text_input("장르 (예: 판타지, 로맨스, SF)", key="manual_genre")
         
         image_url = st.text_input("이미지 URL (포스터/표지 URL을 직접 입력하세요)", value=default_image_url, key="manual_image_url")
-        if image_url:
+        if is_remote_url(image_url):
             st.image(image_url, width=150, caption="미리보기") # 이미지 미리보기
         
         rating = st.slider("나의 평점 (1점은 최악, 5점은 최고)", 1, 5, 3, key="manual_rating")
@@ -245,9 +433,9 @@ def render_manual_entry_form(username):
                 "recorded_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
             
-            records = load_user_records(username)
-            records.append(new_record)
-            save_user_records(username, records)
+            add_user_record(username, new_record)
+            if image_url:
+                get_image_cache().prefetch(image_url) # 목록에서 볼 썸네일을 미리 준비
             st.success(f"'{title}' 작품 기록이 성공적으로 저장되었습니다!")
             
             # 입력 폼 초기화 (검색 결과에서 가져온 값도 초기화)
@@ -261,6 +449,7 @@ def render_manual_entry_form(username):
             st.rerun() # 화면 새로고침하여 초기화된 폼 보여주기
 
 # --- 렌더링 함수: 작품 검색 및 기록 페이지 ---
+@timed('page.render_search_and_record_page')
 def render_search_and_record_page():
     """작품 검색 및 기록 페이지를 렌더링합니다."""
     st.title("🔍 작품 검색 및 기록")
@@ -269,35 +458,35 @@ def render_search_and_record_page():
         st.session_state['manual_entry_mode'] = False
 
     st.header("온라인 검색으로 찾기")
-    search_type = st.radio("어떤 작품을 검색하시겠어요?", ["영화", "책"], horizontal=True, key="search_type_radio")
+    search_type = st.radio("어떤 작품을 검색하시겠어요?", ["영화", "책", "영화+책"], horizontal=True, key="search_type_radio")
     
     with st.form(key="online_search_form"):
         search_query = st.text_input(f"{search_type} 제목을 입력해주세요:")
         search_button = st.form_submit_button(f"{search_type} 검색")
 
     if search_button and search_query:
-        st.write(f"'{search_query}'(으)로 {search_type}을(를) 검색 중입니다...")
-        if search_type == "영화":
-            results = search_movies(search_query)
-            if results:
-                st.write(f"총 {len(results)}건의 영화를 찾았습니다.")
-                for i, movie in enumerate(results):
-                    with st.expander(f"**{movie.get('title')} ({movie.get('release_date', '날짜 미상').split('-')[0]})**"):
-                        display_movie_result(movie)
-            else:
-                st.info("검색 결과가 없습니다. 직접 기록하기를 이용해보세요.")
-        elif search_type == "책":
-            results = search_books(search_query) # `search_query` 사용
-            if results:
-                st.write(f"총 {len(results)}건의 책을 찾았습니다.")
-                for i, book in enumerate(results):
-                    volume_info = book.get('volumeInfo', {})
-                    with st.expander(f"**{volume_info.get('title')} ({volume_info.get('authors', ['저자 미상'])[0]})**"):
-                        display_book_result(book)
-            else:
-                st.info("검색 결과가 없습니다. 직접 기록하기를 이용해보세요.")
+        # 검색어와 보여줄 쪽 수만 세션에 두고, 결과는 모든 세션이 함께 쓰는 검색 캐시에서 읽음
+        st.session_state['online_search'] = {'type': search_type, 'query': search_query, 'pages': 1}
     elif search_button and not search_query:
         st.warning("검색어를 입력해주세요!")
+        st.session_state.pop('online_search', None)
+
+    online_search = st.session_state.get('online_search')
+    if online_search:
+        st.write(f"'{online_search['query']}'(으)로 {online_search['type']}을(를) 검색한 결과입니다.")
+        results, has_more = search_works(online_search['type'], online_search['query'], online_search['pages'])
+        if results:
+            st.write(f"{len(results)}건을 찾았습니다.")
+            for result_type, item in results:
+                if result_type == "영화":
+                    render_movie_expander(item)
+                else:
+                    render_book_expander(item)
+            if has_more and st.button("더 보기", key="online_search_more"):
+                online_search['pages'] += 1 # 다음 쪽은 대개 이미 미리 가져와 있음
+                st.rerun()
+        else:
+            st.info("검색 결과가 없습니다. 직접 기록하기를 이용해보세요.")
         
     st.markdown("---") # 구분선
 
@@ -309,7 +498,306 @@ def render_search_and_record_page():
     with manual_entry_expander:
         render_manual_entry_form(st.session_state['username'])
 
+# --- 렌더링 함수: 기록 상세 정보 ---
+def render_record_details(record):
+    """기록 하나의 상세 정보(종류, 제목, 포스터, 평점, 감상 등)를 보여줍니다."""
+    st.write(f"**종류:** {record.get('type')}")
+    st.write(f"**제목:** {record.get('title')}")
+    if record.get('director_author'):
+        st.write(f"**{'감독' if record.get('type')=='영화' else '저자'}:** {record.get('director_author')}")
+    if record.get('release_pub_date'):
+        st.write(f"**{'개봉일' if record.get('type')=='영화' else '출판일'}:** {record.get('release_pub_date')}")
+    if record.get('genre'):
+        st.write(f"**장르:** {record.get('genre')}")
+    
+    if record.get('image_url'):
+        try:
+            # 서버에 캐시된 200px 썸네일을 보여주고, 아직 캐시에 없으면 기다리지 않고 브라우저가 원격 URL을 직접 읽게 함
+            # (st.image는 http(s)가 아닌 문자열을 서버의 파일 경로로 읽으므로 원격 URL만 넘김)
+            image = get_image_cache().get(record.get('image_url'))
+            if image or is_remote_url(record.get('image_url')):
+                st.image(image or record.get('image_url'), width=200, caption=f"'{record.get('title')}' 포스터/표지")
+        except Exception as e: # 이미지 로드 실패 시
+            st.warning(f"이미지를 불러올 수 없습니다: {e}")
+            st.text(f"URL: {record.get('image_url')}")
+    
+    if record.get('rating'):
+        st.write(f"**나의 평점:** {'⭐' * record.get('rating')} ({record.get('rating')}점)")
+    else: # 평점 없이 가져온 기록
+        st.write("**나의 평점:** 없음")
+    st.write(f"**나의 감상:** {record.get('review')}")
+    st.write(f"기록일: {record.get('recorded_date')}")
+    render_similar_works(record.get('type'), record.get('title'))
+
+# --- 렌더링 함수: 내 기록 보기 페이지 ---
+RECORD_SORT_OPTIONS = {
+    "최근 기록순": 'recorded_desc',
+    "오래된 기록순": 'recorded_asc',
+    "평점 높은순": 'rating_desc',
+    "평점 낮은순": 'rating_asc',
+    "제목순": 'title_asc',
+}
+RECORD_PERIOD_OPTIONS = {"전체 기간": None, "최근 7일": 7, "최근 30일": 30, "최근 1년": 365}
+RECORD_SEARCH_LIMIT = 50 # 내 기록 검색 결과 최대 개수
+
+def render_record_edit_form(username, record):
+    """기록 하나를 고치는 폼을 그립니다. 위젯 키에 기록 ID를 붙여 다른 기록의 폼과 섞이지 않게 합니다."""
+    prefix = f"edit_{record['id']}_"
+    with st.form(f"{prefix}form"):
+        record_type = st.radio("종류", ["영화", "책"], horizontal=True, index=0 if record.get('type') == '영화' else 1, key=f"{prefix}type")
+        title = st.text_input("제목", value=record.get('title') or '', key=f"{prefix}title")
+        col_maker, col_date = st.columns(2)
+        director_author = col_maker.text_input("감독/저자", value=record.get('director_author') or '', key=f"{prefix}director_author")
+        release_pub_date = col_date.text_input("개봉일/출판일", value=record.get('release_pub_date') or '', key=f"{prefix}release_pub_date")
+        genre = st.text_input("장르", value=record.get('genre') or '', key=f"{prefix}genre")
+        image_url = st.text_input("이미지 URL", value=record.get('image_url') or '', key=f"{prefix}image_url")
+        rating = st.slider("나의 평점", 1, 5, record.get('rating') or 3, key=f"{prefix}rating")
+        review = st.text_area("나의 감상/기록", value=record.get('review') or '', key=f"{prefix}review")
+        col_save, col_cancel = st.columns(2)
+        save_button = col_save.form_submit_button("수정 내용 저장 ✅")
+        cancel_button = col_cancel.form_submit_button("취소")
+
+    if cancel_button:
+        st.session_state['editing_record_id'] = None
+        st.rerun()
+    if save_button:
+        if not title:
+            st.error("제목은 필수로 입력해야 합니다!")
+            return
+        edited = dict(record, type=record_type, title=title, director_author=director_author,
+                      release_pub_date=release_pub_date, genre=genre, image_url=image_url, rating=rating, review=review)
+        if edit_user_record(username, edited):
+            if image_url and image_url != record.get('image_url'):
+                get_image_cache().prefetch(image_url)
+            st.session_state['editing_record_id'] = None
+            st.rerun()
+        st.error("기록을 찾을 수 없습니다. 이미 지워졌을 수 있습니다.")
+
+def render_record_actions(username, record):
+    """펼친 기록의 수정/삭제 버튼을 그립니다. 삭제는 한 번 더 확인합니다."""
+    if st.session_state.get('editing_record_id') == record['id']:
+        render_record_edit_form(username, record)
+        return
+    if st.session_state.get('deleting_record_id') == record['id']:
+        st.warning(f"'{record.get('title')}' 기록을 삭제할까요? 이 기록을 공유한 공유방에서도 빠집니다.")
+        col_confirm, col_cancel = st.columns(2)
+        if col_confirm.button("삭제", type="primary", key=f"confirm_delete_{record['id']}"):
+            delete_user_record(username, record['id'])
+            st.session_state['deleting_record_id'] = None
+            st.session_state['expanded_record_id'] = None
+            st.rerun()
+        if col_cancel.button("취소", key=f"cancel_delete_{record['id']}"):
+            st.session_state['deleting_record_id'] = None
+            st.rerun()
+        return
+    col_edit, col_delete = st.columns(2)
+    if col_edit.button("✏️ 수정", key=f"edit_record_{record['id']}"):
+        st.session_state['editing_record_id'] = record['id']
+        st.rerun()
+    if col_delete.button("🗑️ 삭제", key=f"delete_record_{record['id']}"):
+        st.session_state['deleting_record_id'] = record['id']
+        st.rerun()
+
+def render_record_rows(username, records):
+    """기록을 한 줄 요약으로 나열하고, 펼친 기록 하나만 상세 정보와 수정/삭제 버튼을 그립니다."""
+    for record in records:
+        expanded = st.session_state.get('expanded_record_id') == record['id']
+        col_label, col_toggle = st.columns([0.85, 0.15])
+        col_label.markdown(f"{'▾' if expanded else '▸'} **{record.get('title')}** ({record.get('recorded_date').split(' ')[0]}) {'⭐' * (record.get('rating') or 0)}")
+        if col_toggle.button("접기" if expanded else "자세히", key=f"toggle_record_{record['id']}"):
+            st.session_state['expanded_record_id'] = None if expanded else record['id']
+            st.rerun()
+        if expanded: # 펼친 기록만 상세 위젯을 만듦
+            with st.container(border=True):
+                render_record_details(record)
+                render_record_actions(username, record)
+
+@timed('page.render_my_records_page')
+def render_my_records_page(username):
+    """내 기록을 필터/정렬해서 한 페이지씩 보여줍니다. 검색어를 입력하면 검색 결과를 대신 보여줍니다.
+
+    저장소에서 현재 페이지의 기록만 가져오고, 상세 정보는 펼친 기록 하나에 대해서만 그립니다.
+    """
+    st.title("📖 내 기록 보기")
+
+    search_query = st.text_input("🔎 내 기록 검색", placeholder="제목, 감독/저자, 장르, 감상 내용으로 검색", key="records_search_query")
+    if search_query.strip():
+        results = search_user_records(username, search_query, limit=RECORD_SEARCH_LIMIT)
+        if results:
+            note = f" (최근 기록부터 최대 {RECORD_SEARCH_LIMIT}건)" if len(results) == RECORD_SEARCH_LIMIT else ""
+            st.write(f"'{search_query}' 검색 결과 {len(results)}건{note}")
+            render_record_rows(username, results)
+        else:
+            st.info(f"'{search_query}'와(과) 일치하는 기록이 없습니다.")
+        return
+
+    col_type, col_rating, col_period, col_sort, col_size = st.columns(5)
+    record_type = col_type.selectbox("종류", ["전체", "영화", "책"], key="records_filter_type")
+    min_rating = col_rating.selectbox("최소 평점", [1, 2, 3, 4, 5], format_func=lambda x: f"{x}점 이상", key="records_filter_rating")
+    period = col_period.selectbox("기간", list(RECORD_PERIOD_OPTIONS), key="records_filter_period")
+    sort_label = col_sort.selectbox("정렬", list(RECORD_SORT_OPTIONS), key="records_sort")
+    page_size_options = sorted({RECORDS_PAGE_SIZE, 10, 20, 50})
+    page_size = col_size.selectbox("페이지당", page_size_options, index=page_size_options.index(RECORDS_PAGE_SIZE), key="records_page_size")
+
+    # 조건이 바뀌면 첫 페이지로 돌아감
+    filters = (record_type, min_rating, period, sort_label, page_size)
+    if st.session_state.get('records_filters') != filters:
+        st.session_state['records_filters'] = filters
+        st.session_state['records_page'] = 0
+        st.session_state['expanded_record_id'] = None
+
+    days = RECORD_PERIOD_OPTIONS[period]
+    date_from = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d") if days else None
+    page = st.session_state.get('records_page', 0)
+    records, total = query_user_records(
+        username,
+        record_type=None if record_type == "전체" else record_type,
+        min_rating=min_rating if min_rating > 1 else None,
+        date_from=date_from,
+        sort=RECORD_SORT_OPTIONS[sort_label],
+        offset=page * page_size,
+        limit=page_size,
+    )
+
+    if not total:
+        if record_type == "전체" and min_rating == 1 and days is None: # 필터 없이도 기록이 없는 경우
+            st.info(f"{username}님의 기록이 아직 없습니다. '작품 검색 및 기록'에서 새로운 작품을 추가해보세요!")
+        else:
+            st.info("조건에 맞는 기록이 없습니다.")
+        return
+
+    page_count = (total + page_size - 1) // page_size
+    st.write(f"{username}님의 소중한 기록들을 보여드릴게요. (총 {total}건 중 {page * page_size + 1}–{page * page_size + len(records)}번째)")
+
+    render_record_rows(username, records)
+
+    col_prev, col_page, col_next = st.columns([0.2, 0.6, 0.2])
+    if col_prev.button("◀ 이전", disabled=page == 0, key="records_prev_page"):
+        st.session_state['records_page'] = page - 1
+        st.rerun()
+    col_page.markdown(f"<div style='text-align: center'>{page + 1} / {page_count} 페이지</div>", unsafe_allow_html=True)
+    if col_next.button("다음 ▶", disabled=page + 1 >= page_count, key="records_next_page"):
+        st.session_state['records_page'] = page + 1
+        st.rerun()
+
+# --- 렌더링 함수: 인기 작품 보기 페이지 ---
+POPULARITY_WINDOW_OPTIONS = {"오늘": 'day', "최근 7일": 'week', "전체 기간": 'all'}
+POPULAR_WORKS_COUNT = 10
+
+@timed('page.render_popular_works_page')
+def render_popular_works_page():
+    """모든 사용자의 기록을 모은 인기 작품 순위를 보여줍니다. (미리 집계된 상위 k개만 읽음)"""
+    st.title("✨ 인기 작품 보기")
+    st.write("지금 다른 사용자들이 어떤 작품에 관심을 가지고 있는지 보여드려요!")
+
+    col_window, col_type = st.columns(2)
+    window_label = col_window.radio("기간", list(POPULARITY_WINDOW_OPTIONS), index=1, horizontal=True, key="popular_window")
+    type_label = col_type.radio("종류", ["전체", "영화", "책"], horizontal=True, key="popular_type")
+
+    works = get_popularity_index().top_k(
+        POPULARITY_WINDOW_OPTIONS[window_label], POPULAR_WORKS_COUNT,
+        record_type=None if type_label == "전체" else type_label
+    )
+    if not works:
+        st.info("이 기간에는 아직 기록된 작품이 없습니다.")
+        return
+    for rank, work in enumerate(works, start=1):
+        icon = "🎬" if work['type'] == "영화" else "📚"
+        average = f"평균 ⭐ {work['avg_rating']:.1f}" if work['avg_rating'] is not None else "평점 없음"
+        st.markdown(f"**{rank}. {icon} {work['title']}** — 기록 {work['count']}건 · {average}")
+
+# --- 렌더링 함수: 내 기록 통계 페이지 ---
+@timed('page.render_stats_page')
+def render_stats_page(username):
+    """평점 분포, 종류/장르별 기록 수, 월별 기록 수, 감독·저자별 평균 평점을 보여줍니다. (기록이 그대로면 캐시된 집계 사용)"""
+    st.title("📊 내 기록 통계")
+    stats = record_stats.load_record_stats(username)
+    if not stats.total:
+        st.info("아직 기록이 없습니다. '작품 검색 및 기록'에서 첫 기록을 남겨보세요!")
+        return
+
+    average = stats.average_rating()
+    col_total, col_average, col_types = st.columns(3)
+    col_total.metric("전체 기록", f"{stats.total}건")
+    col_average.metric("평균 평점", f"{average:.2f}점" if average is not None else "-")
+    col_types.metric("종류", " · ".join(f"{record_type} {count}" for record_type, count in stats.type_counts.items()) or "-")
+
+    st.subheader("평점 분포")
+    st.bar_chart(stats.rating_distribution())
+    st.subheader("월별 기록 수")
+    st.line_chart(stats.records_per_month())
+
+    col_genre, col_type = st.columns(2)
+    with col_genre:
+        st.subheader("장르별 기록 수")
+        st.bar_chart(stats.top_genres(), horizontal=True)
+    with col_type:
+        st.subheader("종류별 기록 수")
+        st.bar_chart(stats.type_counts)
+
+    st.subheader("감독·저자별 평균 평점")
+    min_count = st.slider("최소 기록 수", 1, 10, 1, key="stats_creator_min_count")
+    st.dataframe(stats.creator_ratings(min_count=min_count), column_config={
+        "평균 평점": st.column_config.NumberColumn(format="%.2f ⭐"),
+    })
+
+# --- 렌더링 함수: 기록 가져오기/내보내기 페이지 ---
+IMPORT_FORMAT_OPTIONS = {
+    "이 앱의 CSV": 'csv',
+    "JSON Lines": 'jsonl',
+    "Letterboxd CSV (영화)": 'letterboxd',
+    "Goodreads CSV (책)": 'goodreads',
+}
+
+@timed('page.render_import_export_page')
+def render_import_export_page(username):
+    """파일에서 기록을 한꺼번에 가져오거나 내 기록 전체를 파일로 내려받습니다."""
+    st.title("📦 기록 가져오기/내보내기")
+
+    st.header("가져오기")
+    st.info("다른 서비스에서 내보낸 파일로 기록을 한꺼번에 옮길 수 있어요. 이미 기록한 작품(같은 종류와 제목)은 건너뜁니다.")
+    with st.form("import_form"):
+        format_label = st.selectbox("파일 형식", list(IMPORT_FORMAT_OPTIONS), key="import_format")
+        uploaded = st.file_uploader("파일 선택", type=['csv', 'jsonl', 'json', 'txt'], key="import_file")
+        import_button = st.form_submit_button("가져오기 📥")
+
+    if import_button:
+        if uploaded is None:
+            st.warning("가져올 파일을 선택해주세요!")
+        else:
+            progress_bar = st.progress(0.0, text="가져오는 중...")
+
+            def report(result, fraction):
+                progress_bar.progress(fraction or 0.0, text=f"{result.rows}행 읽음, {result.imported}건 저장")
+
+            result = import_records(
+                uploaded, IMPORT_FORMAT_OPTIONS[format_label], load_user_records(username),
+                lambda records: add_user_records(username, records), report
+            )
+            progress_bar.progress(1.0, text="완료")
+            st.success(f"{result.imported}건을 가져왔습니다. (이미 있는 작품 {result.duplicates}건, 건너뜀 {result.skipped}건)")
+            if result.errors:
+                with st.expander(f"건너뛴 행 ({len(result.errors)}건까지 표시)"):
+                    for error in result.errors:
+                        st.text(error)
+
+    st.header("내보내기")
+    records = load_user_records(username)
+    if not records:
+        st.info("내보낼 기록이 없습니다.")
+        return
+    export_format = st.radio("파일 형식", EXPORT_FORMATS, format_func=str.upper, horizontal=True, key="export_format")
+    st.download_button(
+        f"내 기록 {len(records)}건 내려받기 📤",
+        # st.download_button은 내용 전체를 받아 메모리에 두므로 조각을 이어 붙여 넘기고, 버튼을 누를 때만 만듦
+        # (큰 파일을 조각씩 쓰려면 python record_io.py export 사용)
+        data=lambda: b''.join(iter_export(records, export_format)),
+        file_name=f"{username}_records.{export_format}",
+        mime='text/csv' if export_format == 'csv' else 'application/jsonl',
+    )
+
 # --- 렌더링 함수: 감상 공유방 생성 페이지 ---
+@timed('page.render_create_sharing_room_page')
 def render_create_sharing_room_page(username):
     st.title("🎉 새 감상 공유방 만들기")
     st.info("나만의 감상 공유방을 만들고 친구들에게 링크를 공유해보세요!")
@@ -382,21 +870,25 @@ def render_create_sharing_room_page(username):
             #     st.error("공유할 기록물을 최소 한 개 이상 선택해주세요!")
             # ---- ▲ 이 부분이 변경되었습니다! ▲ ----
             else: # 이제 기록물 선택 여부와 상관없이 방 생성 가능
-                room_id = create_sharing_room(username, room_name, room_password, selected_record_ids)
-                sharing_link = f"/?room_id={room_id}" 
-
-                # 공유방 생성 성공 정보를 세션 상태에 저장 (폼 외부에서 표시하기 위함)
-                st.session_state['sharing_success_info'] = {
-                    "room_name": room_name,
-                    "sharing_link": sharing_link,
-                    "room_password": room_password
-                }
-                # multiselect를 초기화하도록 지시하는 플래그 설정 (다음 렌더링 사이클에 반영)
-                st.session_state['clear_sharing_multiselect_flag'] = True 
+                try:
+                    room_id = create_sharing_room(username, room_name, room_password, selected_record_ids)
+                except PasswordBusyError as e: # 비밀번호 해시 작업이 한꺼번에 몰린 경우
+                    st.error(str(e))
+                else:
+                    sharing_link = f"/?room_id={room_id}" 
+
+                    # 공유방 생성 성공 정보를 세션 상태에 저장 (폼 외부에서 표시하기 위함)
+                    st.session_state['sharing_success_info'] = {
+                        "room_name": room_name,
+                        "sharing_link": sharing_link,
+                        "room_password": room_password
+                    }
+                    # multiselect를 초기화하도록 지시하는 플래그 설정 (다음 렌더링 사이클에 반영)
+                    st.session_state['clear_sharing_multiselect_flag'] = True 
                 
-                # 페이지를 다시 로드하여 성공 메시지 표시 및 폼 초기화 (UI 업데이트)
-                st.session_state['current_page'] = "🤝 감상 공유방" 
-                st.rerun() 
+                    # 페이지를 다시 로드하여 성공 메시지 표시 및 폼 초기화 (UI 업데이트)
+                    st.session_state['current_page'] = "🤝 감상 공유방" 
+                    st.rerun() 
     
     # 세션 상태에 저장된 성공 메시지 정보를 폼 외부에 표시 (placeholder 사용)
     if 'sharing_success_info' in st.session_state:
@@ -412,6 +904,7 @@ def render_create_sharing_room_page(username):
             # del st.session_state['sharing_success_info'] 
 
 # --- 렌더링 함수: 감상 공유방 조회 페이지 ---
+@timed('page.render_sharing_room_viewer')
 def render_sharing_room_viewer():
     # st.query_params는 딕셔너리처럼 동작하여 URL 쿼리 파라미터에 접근
     query_params = st.query_params 
@@ -441,44 +934,29 @@ def render_sharing_room_viewer():
                 auth_button = st.form_submit_button("접속")
                 
                 if auth_button:
-                    if entered_password == room_data['room_password']:
-                        st.session_state[auth_key] = True # 해당 방에 대한 인증 성공 표시
-                        st.rerun() # 인증 후 페이지 리로드
+                    try:
+                        ok, needs_rehash = verify_password(entered_password, room_data['room_password'])
+                        if ok and needs_rehash: # 예전에 평문으로 저장된 공유방 비밀번호
+                            get_storage().add_sharing_room(room_id, dict(room_data, room_password=hash_password(entered_password)))
+                    except PasswordBusyError as e: # 접속이 한꺼번에 몰린 경우
+                        st.error(str(e))
                     else:
-                        st.error("비밀번호가 올바르지 않습니다.")
+                        if ok:
+                            st.session_state[auth_key] = True # 해당 방에 대한 인증 성공 표시
+                            st.rerun() # 인증 후 페이지 리로드
+                        else:
+                            st.error("비밀번호가 올바르지 않습니다.")
             return # 비밀번호 입력 폼이 보이면 여기서 함수 종료 (아래 콘텐츠는 표시 안 함)
 
     st.info("이 방은 친구들과 함께 즐기는 공유방입니다. 비밀번호는 만든 사람에게 문의하세요.")
 
-    # 공유된 기록물 표시
-    creator_username = room_data['creator_username']
-    all_creator_records = load_user_records(creator_username)
-    shared_record_ids = room_data['shared_record_ids']
-    
-    # 모든 기록물 중 공유된 ID에 해당하는 기록물만 필터링
-    shared_records = [r for r in all_creator_records if r['id'] in shared_record_ids]
+    # 공유된 기록물 표시 (만든 사람의 기록 전체 대신 미리 모아 둔 스냅샷만 읽음)
+    shared_records = get_room_snapshot(room_id, room_data)['records']
 
     if shared_records:
         for record in shared_records:
             with st.expander(f"{record.get('title')} ({record.get('recorded_date').split(' ')[0]})"): 
-                st.write(f"**종류:** {record.get('type')}")
-                st.write(f"**제목:** {record.get('title')}")
-                if record.get('director_author'):
-                    st.write(f"**{'감독' if record.get('type')=='영화' else '저자'}:** {record.get('director_author')}")
-                if record.get('release_pub_date'):
-                    st.write(f"**{'개봉일' if record.get('type')=='영화' else '출판일'}:** {record.get('release_pub_date')}")
-                if record.get('genre'):
-                    st.write(f"**장르:** {record.get('genre')}")
-                
-                if record.get('image_url'):
-                    try:
-                        st.image(record.get('image_url'), width=200, caption=f"'{record.get('title')}' 포스터/표지")
-                    except Exception: # 이미지 로드 실패 시
-                        st.warning(f"이미지를 불러올 수 없습니다: {record.get('image_url')}")
-                
-                st.write(f"**나의 평점:** {'⭐' * record.get('rating')} ({record.get('rating')}점)")
-                st.write(f"**나의 감상:** {record.get('review')}")
-                st.write(f"기록일: {record.get('recorded_date')}")
+                render_record_details(record)
     else:
         st.info("이 공유방에는 아직 공유된 기록물이 없습니다.")
 
@@ -540,9 +1018,10 @@ def main():
             st.sidebar.markdown("---")
             selected_page_from_radio = st.sidebar.radio( # 라디오 버튼의 실제 선택값
                 "메뉴",
-                ["📖 내 기록 보기", "🔍 작품 검색 및 기록", "🤝 감상 공유방", "✨ 인기 작품 보기"],
+                ["📖 내 기록 보기", "🔍 작품 검색 및 기록", "🤝 감상 공유방", "✨ 인기 작품 보기", "📊 내 기록 통계", "📦 기록 가져오기/내보내기"],
                 key="main_menu_radio"
             )
+            render_search_cache_metrics()
             
             # 페이지 전환 로직: 선택된 페이지가 현재 페이지와 다를 경우만 처리
             if st.session_state['current_page'] != selected_page_from_radio:
@@ -559,43 +1038,20 @@ def main():
 
             # 메인 콘텐츠 영역: 현재 선택된 페이지에 따라 다른 함수 호출
             if st.session_state['current_page'] == "📖 내 기록 보기":
-                st.title("📖 내 기록 보기")
-                user_records = load_user_records(st.session_state['username'])
-                if user_records:
-                    st.write(f"{st.session_state['username']}님의 소중한 기록들을 보여드릴게요.")
-                    for record in user_records: 
-                        with st.expander(f"{record.get('title')} ({record.get('recorded_date').split(' ')[0]})"):
-                            st.write(f"**종류:** {record.get('type')}")
-                            st.write(f"**제목:** {record.get('title')}")
-                            if record.get('director_author'):
-                                st.write(f"**{'감독' if record.get('type')=='영화' else '저자'}:** {record.get('director_author')}")
-                            if record.get('release_pub_date'):
-                                st.write(f"**{'개봉일' if record.get('type')=='영화' else '출판일'}:** {record.get('release_pub_date')}")
-                            if record.get('genre'):
-                                st.write(f"**장르:** {record.get('genre')}")
-                            
-                            if record.get('image_url'):
-                                try:
-                                    st.image(record.get('image_url'), width=200, caption=f"'{record.get('title')}' 포스터/표지")
-                                except Exception as e:
-                                    st.warning(f"이미지를 불러올 수 없습니다: {e}")
-                                    st.text(f"URL: {record.get('image_url')}")
-                            
-                            st.write(f"**나의 평점:** {'⭐' * record.get('rating')} ({record.get('rating')}점)")
-                            st.write(f"**나의 감상:** {record.get('review')}")
-                            st.write(f"기록일: {record.get('recorded_date')}")
-                else:
-                    st.info(f"{st.session_state['username']}님의 기록이 아직 없습니다. '작품 검색 및 기록'에서 새로운 작품을 추가해보세요!")
-
+                render_my_records_page(st.session_state['username'])
 
             elif st.session_state['current_page'] == "🔍 작품 검색 및 기록":
                 render_search_and_record_page()
             elif st.session_state['current_page'] == "🤝 감상 공유방":
                 render_create_sharing_room_page(st.session_state['username'])
             elif st.session_state['current_page'] == "✨ 인기 작품 보기":
-                st.title("✨ 인기 작품 보기")
-                st.write("지금 다른 사용자들이 어떤 작품에 관심을 가지고 있는지 보여주는 공간이 될 거예요!")
-                st.info("인기 작품 목록은 나중에 구현될 예정입니다.")
+                render_popular_works_page()
+            elif st.session_state['current_page'] == "📊 내 기록 통계":
+                render_stats_page(st.session_state['username'])
+            elif st.session_state['current_page'] == "📦 기록 가져오기/내보내기":
+                render_import_export_page(st.session_state['username'])
+
+            render_profiling_panel(st.session_state['username']) # 페이지를 그린 뒤라 이번 실행의 구간이 모두 보임
 
         else: # 로그인되지 않은 상태일 경우 로그인/회원가입 페이지 표시
             st.title("📝 나만의 기록 앱 로그인/회원가입")
@@ -607,13 +1063,18 @@ def main():
                 login_button = st.form_submit_button("로그인")
 
                 if login_button:
-                    if authenticate_user(username, password):
-                        st.session_state['logged_in'] = True
-                        st.session_state['username'] = username
-                        st.success(f"{username}님, 환영합니다!")
-                        st.rerun()
+                    try:
+                        authenticated = authenticate_user(username, password)
+                    except PasswordBusyError as e: # 로그인이 한꺼번에 몰린 경우
+                        st.warning(str(e))
                     else:
-                        st.error("사용자 이름 또는 비밀번호가 잘못되었습니다.")
+                        if authenticated:
+                            st.session_state['logged_in'] = True
+                            st.session_state['username'] = username
+                            st.success(f"{username}님, 환영합니다!")
+                            st.rerun()
+                        else:
+                            st.error("사용자 이름 또는 비밀번호가 잘못되었습니다.")
 
             st.subheader("새로운 계정을 만드시려면 회원가입해주세요.")
 
@@ -623,10 +1084,21 @@ def main():
                 register_button = st.form_submit_button("회원가입")
 
                 if register_button:
-                    if register_user(new_username, new_password):
-                        st.success(f"'{new_username}' 계정이 성공적으로 생성되었습니다! 이제 로그인해주세요.")
+                    try:
+                        registered = register_user(new_username, new_password)
+                    except PasswordBusyError as e:
+                        st.warning(str(e))
                     else:
-                        st.error(f"'{new_username}'은 이미 존재하는 사용자 이름입니다. 다른 이름을 사용해주세요.")
+                        if registered:
+                            st.success(f"'{new_username}' 계정이 성공적으로 생성되었습니다! 이제 로그인해주세요.")
+                        else:
+                            st.error(f"'{new_username}'은 이미 존재하는 사용자 이름입니다. 다른 이름을 사용해주세요.")
 
 if __name__ == "__main__":
-    main()
+    begin_rerun()
+    start_background_enricher() # RECORD_APP_ENRICH_INTERVAL이 있을 때만 한 번 띄움
+    try:
+        with span('rerun.test'):
+            main()
+    finally:
+        get_recorder().maybe_write_file() # RECORD_APP_METRICS_FILE이 있으면 일정 간격으로 내보냄
@@ -0,0 +1,12 @@
+"""테스트 공통 설정입니다.
+
+앱 모듈은 저장소 루트에 있으므로 경로에 추가하고, 모듈을 불러올 때 데이터 폴더 기본값이
+실제 데이터가 아닌 임시 폴더를 가리키도록 환경 변수를 먼저 정합니다.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('RECORD_APP_DATA_DIR', tempfile.mkdtemp(prefix='record-app-tests-'))
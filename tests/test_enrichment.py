@@ -0,0 +1,77 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from enrichment import Enricher, missing_fields
+from storage import get_storage
+
+FOUND = {'image_url': 'https://image.tmdb.org/t/p/w200/p.jpg', 'director_author': '봉준호', 'release_pub_date': '2019-05-30'}
+
+
+def _record(title, **fields):
+    return {'id': str(uuid.uuid4()), 'type': '영화', 'title': title, 'rating': 4, 'review': '',
+            'recorded_date': '2024-01-01 00:00:00', **fields}
+
+
+@pytest.fixture
+def enricher(tmp_path):
+    return Enricher(str(tmp_path / 'enrichment.db'), concurrency=2)
+
+
+@pytest.fixture
+def username():
+    return f"enrich-{uuid.uuid4().hex[:8]}"
+
+
+def test_missing_fields():
+    assert missing_fields({'image_url': 'x', 'director_author': ''}) == ['director_author', 'release_pub_date']
+    assert missing_fields(FOUND) == []
+
+
+def test_enrich_batch_fills_only_empty_fields(enricher, username, monkeypatch):
+    storage = get_storage()
+    filled = _record('기생충', director_author='내가 적은 감독')
+    edited = _record('괴물')
+    deleted = _record('마더')
+    nothing = _record('없는 영화')
+    storage.append_user_records(username, [filled, edited, deleted, nothing])
+
+    def lookup(record_type, title):
+        if title == '괴물': # 찾는 동안 사용자가 직접 채운 칸은 덮어쓰지 않아야 함
+            storage.update_user_records(username, [dict(edited, release_pub_date='2006')])
+        if title == '마더':
+            storage.delete_user_records(username, [deleted['id']])
+        if title == '없는 영화':
+            return {}, 'no_match'
+        return dict(FOUND, image_url=''), 'enriched' # 찾은 값이 비어 있는 칸은 채우지 않음
+
+    monkeypatch.setattr(enricher, '_lookup', lookup)
+    batch = [filled, edited, deleted, nothing]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        enriched, attempts = enricher._enrich_batch(username, batch, pool)
+
+    assert enriched == 2
+    assert sorted(status for _, status, _ in attempts) == ['enriched', 'enriched', 'enriched', 'no_match']
+    records = {r['id']: r for r in storage.load_user_records(username)}
+    assert deleted['id'] not in records # 지운 기록을 되살리지 않음
+    assert records[filled['id']]['director_author'] == '내가 적은 감독'
+    assert records[filled['id']]['release_pub_date'] == '2019-05-30'
+    assert records[edited['id']]['release_pub_date'] == '2006'
+    assert records[edited['id']]['director_author'] == '봉준호'
+    assert records[nothing['id']] == nothing
+    assert all(not r.get('image_url') for r in records.values())
+
+
+def test_finished_attempts_are_not_retried(enricher, username, monkeypatch):
+    storage = get_storage()
+    found, failed = _record('기생충'), _record('괴물')
+    storage.append_user_records(username, [found, failed])
+    monkeypatch.setattr(enricher, '_lookup', lambda record_type, title: (
+        ({}, 'error') if title == '괴물' else ({'director_author': '봉준호'}, 'enriched')
+    ))
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        counts = enricher.enrich_user(username, pool)
+    assert counts == {'checked': 2, 'enriched': 1, 'no_match': 0, 'error': 1}
+    # 채운 기록은 다른 칸이 비어 있어도 며칠 동안 다시 찾지 않고, 오류였던 기록만 다음에 다시 시도
+    assert [r['id'] for r in enricher.pending_records(storage.load_user_records(username))] == [failed['id']]
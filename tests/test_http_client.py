@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError, HttpClient, run_concurrently
+from stub_search_server import make_server
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(**options):
+        server = make_server(**options)
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address
+        return server, f"http://{host}:{port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def waits(monkeypatch):
+    """재시도 전에 기다릴 시간을 기록하고 실제로는 기다리지 않습니다."""
+    recorded = []
+    backoff = http_client._backoff_seconds
+
+    def record(attempt, response=None):
+        recorded.append(backoff(attempt, response))
+        return 0
+
+    monkeypatch.setattr(http_client, '_backoff_seconds', record)
+    return recorded
+
+
+@pytest.mark.parametrize('status', [503, 429])
+def test_retries_until_success(start_server, waits, status):
+    server, base = start_server(fail_first=2, fail_status=status)
+    response = HttpClient(max_retries=2).get(f"{base}/3/search/movie", params={'query': '기생충'})
+    assert response.status_code == 200
+    assert response.json()['results'][0]['title'] == '기생충'
+    assert server.stats['requests'] == 3
+    assert len(waits) == 2
+    assert all(0 <= wait <= http_client.HTTP_BACKOFF_MAX_SECONDS for wait in waits)
+
+
+def test_gives_up_after_max_retries(start_server, waits):
+    server, base = start_server(fail_first=10)
+    response = HttpClient(max_retries=2).get(f"{base}/3/search/movie")
+    assert response.status_code == 503 # 마지막 응답을 그대로 돌려줌
+    assert server.stats['requests'] == 3
+
+
+def test_retry_after_header_is_respected(start_server, waits):
+    _, base = start_server(fail_first=1, fail_status=429, retry_after=2)
+    assert HttpClient(max_retries=1).get(f"{base}/books/v1/volumes").status_code == 200
+    assert waits == [2.0]
+
+
+def test_retry_after_is_capped():
+    response = type('Response', (), {'headers': {'Retry-After': '120'}})()
+    assert http_client._backoff_seconds(0, response) == http_client.HTTP_BACKOFF_MAX_SECONDS
+
+
+def test_circuit_opens_then_half_opens(start_server):
+    server, base = start_server(fail_first=3)
+    client = HttpClient(max_retries=0)
+    url = f"{base}/3/search/movie"
+    breaker = client._breaker(url)
+    breaker.failure_threshold, breaker.reset_seconds = 2, 0.2
+
+    assert client.get(url).status_code == 503
+    assert client.get(url).status_code == 503 # 두 번 연속 실패로 서킷이 열림
+    with pytest.raises(CircuitOpenError):
+        client.get(url)
+    assert server.stats['requests'] == 2 # 열린 동안에는 요청을 보내지 않음
+
+    time.sleep(0.25)
+    assert client.get(url).status_code == 503 # 시험 요청 하나는 보냄 (half-open) -> 실패하면 다시 기다림
+    with pytest.raises(CircuitOpenError):
+        client.get(url)
+    assert server.stats['requests'] == 3
+
+    time.sleep(0.25)
+    assert client.get(url).status_code == 200 # 시험 요청이 성공하면 서킷이 닫힘
+    assert client.get(url).status_code == 200
+    assert breaker.failures == 0 and breaker.opened_at is None
+
+
+def test_circuit_breaker_is_per_host(start_server):
+    _, failing = start_server(fail_first=10)
+    _, healthy = start_server()
+    client = HttpClient(max_retries=0)
+    client._breakers[failing.split('//')[1]] = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    client.get(f"{failing}/3/search/movie")
+    with pytest.raises(CircuitOpenError):
+        client.get(f"{failing}/3/search/movie")
+    assert client.get(f"{healthy}/3/search/movie").status_code == 200
+
+
+def test_run_concurrently_takes_as_long_as_the_slowest(start_server):
+    _, movies = start_server(delay=0.3)
+    _, books = start_server(delay=0.6)
+    client = HttpClient(max_retries=0)
+    started = time.perf_counter()
+    movie, book = run_concurrently(
+        lambda: client.get(f"{movies}/3/search/movie", params={'query': '해리'}).json(),
+        lambda: client.get(f"{books}/books/v1/volumes", params={'q': '해리'}).json(),
+    )
+    elapsed = time.perf_counter() - started
+    assert movie['results'][0]['title'] == '해리'
+    assert book['items'][0]['volumeInfo']['title'] == '해리'
+    assert 0.6 <= elapsed < 0.85 # 두 지연의 합(0.9초)이 아니라 더 느린 쪽만큼
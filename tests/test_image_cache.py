@@ -0,0 +1,95 @@
+import io
+import os
+import threading
+
+import pytest
+
+from image_cache import ImageCache, is_allowed_image_url, looks_like_image
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+def _png(color, size=(40, 60)):
+    out = io.BytesIO()
+    PIL.new('RGB', size, color).save(out, format='PNG')
+    return out.getvalue()
+
+
+def _url(name):
+    return f"https://image.tmdb.org/t/p/w500/{name}.jpg"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    images = {}
+    cache = ImageCache(str(tmp_path / 'images'), max_bytes=10 ** 6)
+    monkeypatch.setattr(cache, '_fetch', lambda url: images[url])
+    cache.images = images
+    return cache
+
+
+def test_allowed_urls():
+    assert is_allowed_image_url(_url('a'))
+    assert is_allowed_image_url('http://books.google.com/books/content?id=1')
+    assert not is_allowed_image_url('http://127.0.0.1/secret.png')
+    assert not is_allowed_image_url('file:///etc/passwd')
+    assert not is_allowed_image_url('https://user:pw@image.tmdb.org/a.jpg')
+    assert looks_like_image(_png('red'))
+    assert not looks_like_image(b'<html>')
+
+
+def test_same_image_from_two_urls_is_counted_once(cache):
+    data = _png('red')
+    cache.images.update({_url('a'): data, _url('b'): data})
+    barrier = threading.Barrier(2)
+    fetch = cache._fetch
+
+    def fetch_together(url):
+        barrier.wait() # 두 URL이 같은 이미지를 동시에 저장하려 함
+        return fetch(url)
+
+    cache._fetch = fetch_together
+    threads = [threading.Thread(target=cache._download, args=(url,)) for url in (_url('a'), _url('b'))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache._total_bytes == len(data)
+    assert cache._read_cached(_url('a')) == cache._read_cached(_url('b')) == data
+    assert ImageCache(cache.root)._total_bytes == len(data)
+
+
+def test_eviction_removes_url_mappings(cache):
+    colors = ['red', 'green', 'blue', 'white']
+    for i, color in enumerate(colors):
+        cache.images[_url(color)] = _png(color, size=(40 + i, 60))
+    size = len(cache.images[_url('red')])
+    cache.max_bytes = size * 2.5 # 이미지 두 개 정도만 남음
+    for i, color in enumerate(colors):
+        cache._download(_url(color))
+        with open(cache._url_path(_url(color))) as f:
+            os.utime(cache._object_path(f.read()), (i, i)) # 앞에서 저장한 이미지일수록 오래전에 쓴 것으로
+    urls = os.listdir(os.path.join(cache.root, 'urls'))
+    objects = list(cache._objects())
+    assert len(urls) == len(objects) < len(colors) # 지운 이미지를 가리키던 항목도 지워짐
+    assert cache._total_bytes == sum(size for _, size, _ in objects) <= cache.max_bytes
+    assert cache._read_cached(_url('white')) == cache.images[_url('white')] # 가장 최근 이미지는 남음
+
+
+def test_stale_url_mapping_is_dropped(cache):
+    cache.images[_url('a')] = _png('red')
+    cache._download(_url('a'))
+    for path, _, _ in cache._objects():
+        os.remove(path)
+    assert cache._read_cached(_url('a')) is None
+    assert not os.path.exists(cache._url_path(_url('a'))) # 다음 prefetch 때 다시 내려받음
+
+
+def test_objects_skips_stray_files(tmp_path):
+    root = tmp_path / 'images'
+    (root / 'objects' / 'ab').mkdir(parents=True)
+    (root / 'objects' / 'README').write_text('폴더가 아닌 항목')
+    (root / 'objects' / 'ab' / 'ab12').write_bytes(b'1234')
+    (root / 'objects' / 'ab' / '.ab34.tmp').write_bytes(b'writing')
+    cache = ImageCache(str(root))
+    assert cache._total_bytes == 4
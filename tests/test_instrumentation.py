@@ -0,0 +1,16 @@
+import pytest
+
+import instrumentation
+
+
+@pytest.mark.parametrize('enabled, admins, username, expected', [
+    (True, {'admin'}, 'admin', True),
+    (True, {'admin'}, 'guest', False),
+    (True, set(), 'guest', False), # 관리자를 정하지 않으면 아무도 볼 수 없음
+    (True, set(), '', False),
+    (False, {'admin'}, 'admin', False),
+])
+def test_is_admin(monkeypatch, enabled, admins, username, expected):
+    monkeypatch.setattr(instrumentation, 'PROFILING_ENABLED', enabled)
+    monkeypatch.setattr(instrumentation, 'ADMIN_USERS', admins)
+    assert instrumentation.is_admin(username) is expected
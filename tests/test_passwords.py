@@ -0,0 +1,54 @@
+import pytest
+
+from passwords import PasswordHasher, hash_password_sync, is_hashed, verify_password_sync
+
+FAST = {'scrypt': (16, 1, 1), 'pbkdf2_sha256': (1000,)} # 테스트용으로 비용을 낮춤
+
+
+@pytest.mark.parametrize('scheme', sorted(FAST))
+def test_hash_and_verify(scheme):
+    current = (scheme, FAST[scheme])
+    stored = hash_password_sync('비밀번호', scheme, FAST[scheme])
+    assert is_hashed(stored) and stored.startswith(scheme + '$')
+    assert stored != hash_password_sync('비밀번호', scheme, FAST[scheme]) # salt가 다름
+    assert verify_password_sync('비밀번호', stored, current) == (True, False)
+    assert verify_password_sync('틀림', stored, current) == (False, False)
+
+
+def test_rehash_when_settings_change():
+    stored = hash_password_sync('pw', 'pbkdf2_sha256', (1000,))
+    assert verify_password_sync('pw', stored, ('pbkdf2_sha256', (2000,))) == (True, True)
+    assert verify_password_sync('pw', stored, ('scrypt', FAST['scrypt'])) == (True, True)
+    assert verify_password_sync('x', stored, ('scrypt', FAST['scrypt'])) == (False, False)
+
+
+def test_legacy_plaintext_needs_rehash():
+    assert not is_hashed('plain')
+    assert verify_password_sync('plain', 'plain') == (True, True)
+    assert verify_password_sync('other', 'plain') == (False, False)
+
+
+@pytest.mark.parametrize('stored', ['scrypt$x$1$1$a$b', 'pbkdf2_sha256$many$c2FsdA==$c2FsdA==', 'scrypt$16$1$1$c2FsdA==', ''])
+def test_malformed_hashes_are_not_hashes(stored):
+    assert not is_hashed(stored)
+
+
+def test_tampered_hash_fails():
+    stored = hash_password_sync('pw', 'scrypt', FAST['scrypt'])
+    scheme, n, r, p, salt, digest = stored.split('$')
+    tampered = '$'.join([scheme, n, r, p, salt, ('A' if digest[0] != 'A' else 'B') + digest[1:]])
+    assert verify_password_sync('pw', tampered, ('scrypt', FAST['scrypt']))[0] is False
+
+
+def test_hasher_caches_successful_checks_only():
+    hasher = PasswordHasher('scrypt', FAST['scrypt'], workers=1)
+    stored = hasher.hash_password('pw')
+    assert hasher.verify_password('pw', stored) == (True, False)
+    assert hasher.verify_password('pw', stored) == (True, False)
+    assert hasher.cache_hits == 1
+    assert hasher.verify_password('wrong', stored) == (False, False)
+    assert hasher.verify_password('wrong', stored) == (False, False)
+    assert hasher.cache_hits == 1
+    hasher.clear_cache()
+    assert hasher.verify_password('pw', stored) == (True, False)
+    assert hasher.cache_hits == 1
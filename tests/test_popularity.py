@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+import popularity
+from popularity import PopularityIndex, work_key
+
+TODAY = date(2024, 5, 10)
+
+
+def _record(record_id, title='기생충', rating=0, day='2024-05-10', record_type='영화'):
+    return {'id': record_id, 'type': record_type, 'title': title, 'rating': rating, 'recorded_date': f'{day} 12:00:00'}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return PopularityIndex(str(tmp_path / 'popularity.db'))
+
+
+def _top(index, window='all', **options):
+    return [(w['title'], w['count'], w['avg_rating']) for w in index.top_k(window, today=TODAY, **options)]
+
+
+def test_average_counts_only_rated_records(index):
+    index.add_records([_record('1', rating=4), _record('2', rating=2), _record('3'), _record('4', ' 기생충 ', 5)])
+    index.add_record(_record('4', rating=5)) # 같은 기록 ID는 한 번만 셈
+    assert _top(index) == [('기생충', 4, pytest.approx(11 / 3))]
+
+
+def test_remove_reverts_rated_count(index):
+    index.add_records([_record('1', rating=4), _record('2'), _record('3', '괴물', rating=3)])
+    index.remove_record('1')
+    assert _top(index) == [('괴물', 1, 3.0), ('기생충', 1, None)] # 남은 기록에 평점이 없으면 None
+    index.remove_record('2')
+    index.remove_record('missing')
+    assert _top(index) == [('괴물', 1, 3.0)]
+
+
+def test_windows_and_type_filter(index):
+    index.add_records([
+        _record('1', '오늘', rating=5), _record('2', '이번주', day='2024-05-05'), _record('3', '이번주', day='2024-05-04'),
+        _record('4', '예전', day='2024-04-01'), _record('5', '책', record_type='책'),
+    ])
+    assert [title for title, _, _ in _top(index, 'day')] == ['오늘', '책']
+    assert [title for title, _, _ in _top(index, 'week')] == ['이번주', '오늘', '책']
+    assert [title for title, _, _ in _top(index, 'all', record_type='책')] == ['책']
+    index.add_record(_record('6', '오늘', rating=1)) # 계산해 둔 오늘/이번 주 합계에도 바로 반영
+    assert _top(index, 'day')[0] == ('오늘', 2, 3.0)
+    with pytest.raises(ValueError):
+        index.top_k('month')
+
+
+def test_migration_fills_rated_count(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(popularity._SCHEMA) # rated_count 열이 없던 예전 스키마
+    key = work_key('영화', '기생충')
+    conn.execute("INSERT INTO works VALUES (?, '영화', '기생충')", (key,))
+    conn.executemany("INSERT INTO counted_records VALUES (?, ?, '2024-05-10', ?)", [('1', key, 4), ('2', key, 0), ('3', key, 2)])
+    conn.execute("INSERT INTO daily VALUES (?, '2024-05-10', 3, 6)", (key,))
+    conn.executemany("INSERT INTO window_totals VALUES (?, ?, 3, 6)", [('all', key), ('day', key)])
+    conn.execute("INSERT INTO meta VALUES ('windows_day', '2024-05-10')")
+    conn.commit()
+    conn.close()
+
+    index = PopularityIndex(path)
+    assert index._conn().execute("PRAGMA user_version").fetchone()[0] == len(popularity._MIGRATIONS)
+    assert _top(index) == [('기생충', 3, 3.0)] # 예전에는 평점 없는 기록까지 나눠 2.0이었음
+    assert _top(index, 'day') == [('기생충', 3, 3.0)] # 'day' 합계는 daily에서 다시 계산
+    PopularityIndex(path) # 이미 적용된 마이그레이션은 다시 적용하지 않음
+    assert _top(index) == [('기생충', 3, 3.0)]
@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+import recommender
+from recommender import Recommender, build_matrix, top_k_neighbors
+
+
+def _liked(*titles, rating=5):
+    return [{'type': '영화', 'title': title, 'rating': rating} for title in titles]
+
+
+def test_build_matrix_weights_and_keys():
+    matrix, keys, items = build_matrix([
+        ('a', _liked('X', 'Y') + [{'type': '영화', 'title': 'Z', 'rating': 3}]), # 3점은 좋아함이 아님
+        ('b', _liked('x ') + _liked('Y', rating=4) + _liked('Y', rating=5)), # 같은 작품은 가장 높은 평점
+    ])
+    assert keys == ['영화:x', '영화:y']
+    assert items == [('영화', 'X'), ('영화', 'Y')]
+    assert matrix.toarray().tolist() == [[2, 2], [2, 2]]
+
+
+def _dense_similarity(matrix, shrinkage):
+    by_item = matrix.T.toarray().astype(np.float64)
+    binary = (by_item > 0).astype(np.float64)
+    norms = np.linalg.norm(by_item, axis=1)
+    norms[norms == 0] = 1
+    together = binary @ binary.T
+    sim = (by_item @ by_item.T) / np.outer(norms, norms) * together / (together + shrinkage)
+    np.fill_diagonal(sim, 0)
+    return sim
+
+
+@pytest.mark.parametrize('block_bytes', [1, 10 ** 9]) # 블록 하나씩 / 한 번에
+def test_top_k_matches_dense_computation(block_bytes):
+    rng = np.random.default_rng(0)
+    dense = (rng.random((40, 25)) < 0.2) * rng.integers(1, 3, size=(40, 25))
+    matrix = sparse.csr_matrix(dense.astype(np.float32))
+    neighbors, scores = top_k_neighbors(matrix, k=5, shrinkage=2.0, block_bytes=block_bytes)
+    sim = _dense_similarity(matrix, 2.0)
+    for item in range(sim.shape[0]):
+        expected = np.sort(sim[item][sim[item] > 0])[::-1][:5] # 점수가 같은 이웃은 어느 쪽이든 됨
+        got = neighbors[item][neighbors[item] >= 0]
+        assert np.allclose(scores[item][:len(got)], expected, atol=1e-5)
+        assert np.allclose(sim[item][got], expected, atol=1e-5) # 고른 이웃의 실제 점수
+        assert item not in got
+
+
+def test_top_k_empty_and_single_item():
+    neighbors, scores = top_k_neighbors(sparse.csr_matrix((0, 0), dtype=np.float32))
+    assert neighbors.shape == (0, 0)
+    neighbors, scores = top_k_neighbors(sparse.csr_matrix(np.ones((3, 1), dtype=np.float32)))
+    assert neighbors.shape == (1, 0)
+
+
+@pytest.fixture
+def model(tmp_path):
+    rec = Recommender(str(tmp_path / 'recommendations.npz'))
+    rec.rebuild([
+        ('a', _liked('기생충', '마더', '살인의 추억')),
+        ('b', _liked('기생충', '마더')),
+        ('c', _liked('기생충', '올드보이')),
+    ])
+    return rec
+
+
+def test_similar_works_ranks_and_excludes(model):
+    works = model.similar_works('영화', ' 기생충', k=5)
+    assert [w['title'] for w in works][0] == '마더'
+    assert {w['title'] for w in works} == {'마더', '살인의 추억', '올드보이'}
+    excluded = model.similar_works('영화', '기생충', exclude={'영화:마더'})
+    assert '마더' not in [w['title'] for w in excluded]
+    assert model.similar_works('책', '기생충') == []
+
+
+def test_idle_model_is_not_rebuilt(model, monkeypatch):
+    monkeypatch.setattr(recommender, 'REBUILD_INTERVAL_SECONDS', 0)
+    assert not model._needs_rebuild() # 오래됐어도 바뀐 기록이 없으면 그대로 씀
+    model.mark_changed()
+    assert model._needs_rebuild()
+
+
+@pytest.mark.parametrize('error', [OSError("디스크 오류"), ValueError("잘못된 평점")])
+def test_failed_rebuild_restores_changes(model, monkeypatch, error):
+    def fail(records_by_user=None):
+        raise error
+
+    monkeypatch.setattr(model, 'rebuild', fail)
+    model._model = model._load()[:6] + (time.time() - 10,) # 방금 만든 것이 아니도록
+    model._rebuild_in_background(recommender.REBUILD_AFTER_CHANGES) # maybe_rebuild_async가 바뀐 기록 수를 0으로 만든 뒤
+    assert model._changes == recommender.REBUILD_AFTER_CHANGES
+    assert not model._needs_rebuild() # 잠시 기다렸다가 다시 시도
@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+
+import record_changes
+import record_stats
+from popularity import get_popularity_index
+from recommender import get_recommender
+from record_search import get_record_index
+from storage import get_storage
+from title_index import get_title_index
+
+
+def _record(title, rating=4, **fields):
+    return {'id': str(uuid.uuid4()), 'type': '영화', 'title': title, 'director_author': '감독',
+            'genre': '', 'rating': rating, 'review': '', 'recorded_date': '2024-05-01 10:00:00', **fields}
+
+
+@pytest.fixture
+def username():
+    return f"u-{uuid.uuid4().hex[:8]}"
+
+
+def _search(username, query):
+    return [r['title'] for r in get_record_index().search(username, query)]
+
+
+def _count(title):
+    works = get_popularity_index().top_k('all', k=1000)
+    return sum(work['count'] for work in works if work['title'] == title)
+
+
+def test_add_fans_out_to_every_derived_index(username):
+    title = f"변경전파{uuid.uuid4().hex[:6]}"
+    record_stats.load_record_stats(username) # 통계가 캐시에 있어야 추가분만 더함
+    changes = get_recommender()._changes
+    record_changes.add_user_records(username, [_record(title), _record(title, rating=2)])
+
+    assert len(get_storage().load_user_records(username)) == 2
+    assert record_stats.load_record_stats(username).total == 2
+    assert _search(username, title) == [title, title]
+    assert _count(title) == 2
+    assert title.casefold() in [s['text'].casefold() for s in get_title_index().suggest(title[:4])]
+    assert get_recommender()._changes == changes + 2
+
+
+def test_update_and_delete_keep_indexes_in_step(username):
+    old, new = f"예전{uuid.uuid4().hex[:6]}", f"새제목{uuid.uuid4().hex[:6]}"
+    record = _record(old)
+    record_changes.add_user_records(username, [record])
+
+    assert record_changes.update_user_records(username, [dict(record, title=new), _record('없는 기록')]) == 1
+    assert _search(username, old) == []
+    assert _search(username, new) == [new]
+    assert _count(old) == 0 and _count(new) == 1
+    assert _search(username, '없는 기록') == [] # 저장소에 없는 ID는 색인하지 않음
+
+    assert record_changes.delete_user_records(username, [record['id'], 'missing']) == 1
+    assert get_storage().load_user_records(username) == []
+    assert _search(username, new) == []
+    assert _count(new) == 0
+    assert record_changes.delete_user_records(username, [record['id']]) == 0
@@ -0,0 +1,56 @@
+import pytest
+
+from record_codec import SERIALIZERS, get_serializer, load_file
+
+RECORDS = [
+    {'id': '1', 'type': '영화', 'title': '기생충', 'rating': 5, 'score': 4.5, 'tags': ['드라마'], 'review': ''},
+    {'id': '2', 'type': '영화', 'title': 'Parasite 😀', 'rating': None, 'score': 1.0, 'tags': [], 'review': '줄\n바꿈'},
+    {'id': '3', 'type': '책', 'title': '', 'score': -2.25, 'extra': {'a': 1}}, # 키가 없는 열
+    {'id': '4', 'type': '영화', 'title': '큰 수', 'rating': 2 ** 70, 'score': 0.0, 'flag': True},
+]
+
+
+@pytest.mark.parametrize('name', sorted(SERIALIZERS))
+def test_round_trip(name):
+    serializer = get_serializer(name)
+    assert serializer.loads(serializer.dumps(RECORDS)) == RECORDS
+
+
+@pytest.mark.parametrize('name', sorted(SERIALIZERS))
+def test_empty_list(name):
+    serializer = get_serializer(name)
+    assert serializer.loads(serializer.dumps([])) == []
+
+
+def test_columnar_keeps_missing_keys_missing():
+    serializer = get_serializer('columnar')
+    loaded = serializer.loads(serializer.dumps(RECORDS))
+    assert 'rating' not in loaded[2]
+    assert loaded[1]['rating'] is None
+    assert type(loaded[3]['flag']) is bool
+
+
+def test_columnar_wide_dictionary_codes():
+    # 고유 값이 65535개를 넘고 절반 이하로 반복되면 사전 번호를 u32로 저장
+    records = [{'genre': f'g{i % 70000}'} for i in range(140000)]
+    serializer = get_serializer('columnar')
+    assert serializer.loads(serializer.dumps(records)) == records
+
+
+def test_columnar_rejects_other_data():
+    with pytest.raises(ValueError):
+        get_serializer('columnar').loads(b'NOPE' + bytes(12))
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        get_serializer('yaml')
+
+
+def test_load_file_uses_mmap(tmp_path):
+    path = tmp_path / 'records.snap'
+    serializer = get_serializer('columnar')
+    path.write_bytes(serializer.dumps(RECORDS))
+    assert load_file(str(path), serializer) == RECORDS
+    (tmp_path / 'empty.snap').write_bytes(b'')
+    assert load_file(str(tmp_path / 'empty.snap'), serializer) == []
@@ -0,0 +1,101 @@
+import io
+import json
+
+import pytest
+
+from record_io import RECORD_FIELDS, import_records, iter_export
+
+
+def _import(text, fmt, existing=(), batch_size=500):
+    batches = []
+    result = import_records(io.BytesIO(text.encode('utf-8')), fmt, list(existing), batches.append,
+                            batch_size=batch_size)
+    return result, [record for batch in batches for record in batch], batches
+
+
+def _jsonl(*rows):
+    return '\n'.join(row if isinstance(row, str) else json.dumps(row, ensure_ascii=False) for row in rows)
+
+
+def test_jsonl_coerces_numbers_and_reports_bad_rows():
+    text = _jsonl(
+        {'type': '영화', 'title': '기생충', 'rating': 5},
+        {'type': '영화', 'title': 123},
+        {'type': '영화', 'title': {'a': 1}},
+        {'type': '책', 'title': '평점', 'rating': [1]},
+        {'type': '음악', 'title': '종류'},
+        '{깨진 줄',
+        {'type': 'book', 'title': '저자', 'director_author': 7, 'review': '  감상  '},
+    )
+    result, records, _ = _import(text, 'jsonl')
+    assert (result.rows, result.imported, result.skipped) == (7, 3, 4)
+    assert [r['title'] for r in records] == ['기생충', '123', '저자']
+    assert records[2]['type'] == '책' and records[2]['director_author'] == '7' and records[2]['review'] == '감상'
+    assert [error.split(':')[0] for error in result.errors] == ['3행', '4행', '5행', '6행']
+
+
+def test_duplicates_in_file_and_existing_records_are_skipped():
+    text = _jsonl({'type': '영화', 'title': ' 기생충 '}, {'type': '영화', 'title': '기생충'},
+                  {'type': '영화', 'title': 'Old Boy'}, {'type': '책', 'title': '기생충'})
+    result, records, _ = _import(text, 'jsonl', existing=[{'type': '영화', 'title': 'old  boy'}])
+    assert result.duplicates == 2
+    assert [(r['type'], r['title']) for r in records] == [('영화', '기생충'), ('책', '기생충')]
+
+
+def test_batches_and_progress():
+    text = _jsonl(*({'type': '영화', 'title': f't{i}'} for i in range(7)))
+    calls = []
+    batches = []
+    result = import_records(io.BytesIO(text.encode()), 'jsonl', [], batches.append,
+                            progress=lambda r, fraction: calls.append((r.imported, fraction)), batch_size=3)
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert result.imported == 7
+    assert calls[-1] == (7, 1.0)
+
+
+def test_letterboxd_ratings_and_dates():
+    text = 'Date,Name,Year,Rating,Watched Date\n2024-01-02,Paterson,2016,4.5,2024-01-01\n2024-01-03,Tár,2022,,\n'
+    result, records, _ = _import(text, 'letterboxd')
+    assert result.imported == 2
+    assert records[0]['rating'] == 5 and records[0]['recorded_date'] == '2024-01-01 00:00:00'
+    assert records[1]['rating'] is None and records[1]['recorded_date'] == '2024-01-03 00:00:00'
+
+
+def test_goodreads_skips_to_read_and_cleans_review():
+    text = ('Title,Author,My Rating,Exclusive Shelf,My Review,Date Read\n'
+            '채식주의자,한강,5,read,좋음<br/>&amp; 다시,2023/05/01\n'
+            '소년이 온다,한강,0,to-read,,\n')
+    result, records, _ = _import(text, 'goodreads')
+    assert (result.imported, result.skipped) == (1, 1)
+    assert records[0]['review'] == '좋음\n& 다시'
+    assert records[0]['recorded_date'] == '2023-05-01 00:00:00'
+
+
+def test_bad_rating_and_date_are_reported():
+    text = _jsonl({'type': '영화', 'title': 'a', 'rating': 9}, {'type': '영화', 'title': 'b', 'recorded_date': '어제'})
+    result, records, _ = _import(text, 'jsonl')
+    assert records == [] and result.skipped == 2
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl'])
+def test_export_then_import_round_trip(fmt):
+    records = [
+        {'id': str(i), 'type': '영화' if i % 2 else '책', 'title': f'제목 "{i}", 쉼표', 'director_author': '감독',
+         'release_pub_date': '2020', 'genre': '드라마', 'image_url': '', 'rating': i % 5 + 1,
+         'review': '여러 줄\n감상', 'recorded_date': '2024-01-01 12:00:00'}
+        for i in range(5)
+    ]
+    data = b''.join(iter_export(records, fmt, batch_size=2))
+    if fmt == 'csv':
+        assert data.startswith('﻿'.encode('utf-8'))
+    result, imported, _ = _import(data.decode('utf-8'), fmt)
+    assert result.imported == 5
+    fields = [field for field in RECORD_FIELDS if field != 'id'] # 가져오면 새 ID를 붙임
+    assert [{f: r[f] for f in fields} for r in imported] == [{f: r[f] for f in fields} for r in records]
+
+
+def test_unknown_formats():
+    with pytest.raises(ValueError):
+        import_records(io.BytesIO(b''), 'xml', [], lambda records: None)
+    with pytest.raises(ValueError):
+        list(iter_export([], 'xml'))
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+import record_log
+from record_log import RecordLog, _encode_line
+
+
+def _record(record_id, title='제목', **fields):
+    return {'id': record_id, 'type': '영화', 'title': title, **fields}
+
+
+@pytest.fixture(params=['json', 'columnar'])
+def log(request, tmp_path):
+    return RecordLog(str(tmp_path / 'u_records.jsonl'), record_format=request.param)
+
+
+def test_missing_log_loads_empty(log):
+    assert not log.exists()
+    assert log.load() == []
+
+
+def test_append_and_load_keep_order(log):
+    log.append(_record('a'))
+    log.append_many([_record('b'), _record('c')])
+    assert [r['id'] for r in log.load()] == ['a', 'b', 'c']
+
+
+def test_later_put_wins_and_counts_garbage(log):
+    log.append_many([_record('a', '처음'), _record('b')])
+    log.append(_record('a', '고침'))
+    records = log.load()
+    assert [(r['id'], r['title']) for r in records] == [('a', '고침'), ('b', '제목')]
+    assert log.garbage_lines == 1
+
+
+def test_delete_removes_record(log):
+    log.append_many([_record('a'), _record('b')])
+    log.delete_many(['a', 'missing'])
+    assert [r['id'] for r in log.load()] == ['b']
+    assert log.garbage_lines == 3 # 지운 값과 삭제 줄, 없는 ID의 삭제 줄
+
+
+def test_corrupted_and_truncated_lines_are_skipped(log):
+    log.append_many([_record('a'), _record('b')])
+    with open(log.path, 'rb') as f:
+        lines = f.readlines()
+    bad_crc = b'00000000' + lines[1][8:]
+    with open(log.path, 'wb') as f:
+        f.write(lines[0] + bad_crc + _encode_line({'op': 'put', 'record': _record('c')})[:-5]) # 마지막 줄이 잘림
+    assert [r['id'] for r in log.load()] == ['a']
+    assert log.garbage_lines == 2
+
+
+def test_append_after_truncated_line_starts_new_line(log):
+    log.append(_record('a'))
+    with open(log.path, 'ab') as f:
+        f.write(b'deadbeef {"op":') # 쓰다가 죽은 줄
+    log.append(_record('b'))
+    assert [r['id'] for r in log.load()] == ['a', 'b']
+
+
+def test_compact_keeps_live_records_only(log):
+    log.append_many([_record(str(i)) for i in range(5)])
+    log.append(_record('0', '고침'))
+    log.delete_many(['1'])
+    before = log.load()
+    log.compact()
+    assert log.garbage_lines == 0
+    assert log.load() == before
+    assert [r['id'] for r in before] == ['0', '2', '3', '4']
+    assert log.load()[0]['title'] == '고침'
+
+
+def test_rewrite_replaces_snapshot_and_appends_after_it(log):
+    log.rewrite([_record('a'), _record('b')])
+    log.rewrite([_record('c')])
+    log.append(_record('d'))
+    assert [r['id'] for r in log.load()] == ['c', 'd']
+    snapshots = [name for name in os.listdir(os.path.dirname(log.path)) if name.endswith('.snap')]
+    assert len(snapshots) == (1 if log.serializer.name == 'columnar' else 0) # 이전 스냅샷은 지움
+
+
+def test_read_retries_when_snapshot_is_replaced(tmp_path, monkeypatch):
+    path = str(tmp_path / 'u_records.jsonl')
+    log = RecordLog(path, record_format='columnar')
+    log.rewrite([_record('a'), _record('b')])
+    other = RecordLog(path, record_format='columnar') # 다른 프로세스
+    load_file = record_log.load_file
+    replaced = []
+
+    def racing_load_file(snapshot_path, serializer):
+        if not replaced: # 스냅샷을 열기 직전에 다른 프로세스가 로그를 새로 쓰고 이전 스냅샷을 지움
+            replaced.append(snapshot_path)
+            other.rewrite([_record('c')])
+        return load_file(snapshot_path, serializer)
+
+    monkeypatch.setattr(record_log, 'load_file', racing_load_file)
+    assert [r['id'] for r in log.load()] == ['c']
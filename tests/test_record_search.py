@@ -0,0 +1,59 @@
+import pytest
+
+from record_search import RecordSearchIndex, build_match_query, ngrams, strip_particle
+
+
+def test_ngrams():
+    assert ngrams('사랑을 해') == ['사랑', '랑을', '해']
+    assert ngrams(None) == []
+
+
+@pytest.mark.parametrize('word, expected', [
+    ('영화가', '영화'), ('사랑이라는', '사랑'), ('어벤져스에서', '어벤져스'), ('어린이', '어린'),
+    ('영화', '영화'), ('가', '가'), ('이', '이'), ('movie는', 'movie는'), ('sf영화를', 'sf영화'),
+    # 떼고 남는 글자가 NGRAM_SIZE보다 짧으면 단어의 일부로 봅니다.
+    ('책을', '책을'), ('포도', '포도'), ('아이', '아이'), ('오이', '오이'), ('나의', '나의'), ('기도', '기도'),
+])
+def test_strip_particle(word, expected):
+    assert strip_particle(word) == expected
+
+
+def test_build_match_query():
+    assert build_match_query('영화가') == '"영화"'
+    assert build_match_query('기생충 봉준호의') == '"기생" AND "생충" AND "봉준" AND "준호"'
+    assert build_match_query('책') == '"책"*'
+    assert build_match_query('포도') == '"포도"'
+    assert build_match_query('영화가', strip=False) == '"영화" AND "화가"'
+    assert build_match_query(' !? ') is None
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = RecordSearchIndex(str(tmp_path / 'search.db'))
+    index.add_records('u', [
+        {'id': '1', 'title': '좋은 영화', 'review': '책 한 권'},
+        {'id': '2', 'title': '고양이', 'review': '사랑을 말하다'},
+        {'id': '4', 'title': '포기하지 마', 'review': '아침에 읽은 어린 왕자'},
+        {'id': '5', 'title': '어린이 대공원', 'review': '오늘의 기억'},
+    ])
+    index.add_record('other', {'id': '3', 'title': '영화'})
+    return index
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('영화가', ['1']), ('영화를', ['1']), ('고양이가', ['2']),
+    ('사랑이', ['2']), ('사랑을', ['2']), ('말하다', ['2']), ('없는말', []),
+    # 조사처럼 끝나는 단어가 더 짧은 검색어로 바뀌어 엉뚱한 기록을 찾으면 안 됩니다.
+    ('포도', []), ('아이', []), ('오이', []), ('나의', []), ('기도', []), ('책을', []),
+    ('어린이', ['5']), ('어린이가', ['5']), ('어린', ['5', '4']),
+])
+def test_search_with_particles(index, query, expected):
+    assert [record['id'] for record in index.search('u', query)] == expected
+
+
+def test_remove_and_update(index):
+    index.remove_record('1')
+    assert index.search('u', '영화') == []
+    index.add_record('u', {'id': '2', 'title': '강아지'})
+    assert [r['id'] for r in index.search('u', '강아지')] == ['2']
+    assert index.search('u', '고양이') == []
@@ -0,0 +1,35 @@
+import record_stats
+from data_cache import get_cache
+from record_stats import RecordStats
+
+
+def _record(i, genre='드라마', creator='감독', rating=4):
+    return {'type': '영화', 'genre': genre, 'director_author': creator, 'rating': rating,
+            'recorded_date': f'2024-{i % 12 + 1:02d}-01 00:00:00'}
+
+
+def test_merge_matches_full_computation():
+    first = [_record(i) for i in range(5)]
+    second = [_record(i, genre='스릴러, 드라마', creator=f'감독{i}', rating=None if i == 0 else i % 5 + 1) for i in range(8)]
+    merged = RecordStats.from_records(first).merge(RecordStats.from_records(second))
+    full = RecordStats.from_records(first + second)
+    assert merged.total == full.total == 13
+    assert merged.rating_distribution().equals(full.rating_distribution())
+    assert merged.top_genres().to_dict() == full.top_genres().to_dict()
+    assert merged.records_per_month().equals(full.records_per_month())
+    assert merged.average_rating() == full.average_rating()
+
+
+def test_add_records_updates_cached_stats_and_cost():
+    cache = get_cache()
+    name = record_stats._cache_name('stats-user')
+    stats = RecordStats.from_records([_record(0)])
+    cache.put(name, 'v1', stats, stats.nbytes)
+
+    record_stats.add_records('stats-user', [_record(i, genre=f'장르{i}', creator=f'감독{i}') for i in range(20)], 'v1', 'v2')
+    merged = cache.get(name, 'v2')
+    assert merged.total == 21
+    assert cache._entries[name][2] == merged.nbytes > stats.nbytes # 늘어난 크기만큼 캐시 크기도 늘어남
+
+    record_stats.add_records('stats-user', [_record(0)], 'v1', 'v3') # 캐시에 없는 버전이면 버림
+    assert cache.get(name, 'v2') is None and cache.get(name, 'v3') is None
@@ -0,0 +1,158 @@
+import threading
+
+import pytest
+
+import search_cache
+from search_cache import SearchCache, normalize_key, slim_movie_results
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(search_cache, 'time', clock)
+    return clock
+
+
+def test_normalize_key():
+    assert normalize_key('movie', '  기생충   봉준호 ', 'ko') == normalize_key('movie', '기생충 봉준호', 'ko')
+    assert normalize_key('movie', 'Parasite', 'ko') == ('movie', 'parasite', 'ko')
+    assert normalize_key('book', 'a', 'ko', page=2) == ('book', 'a', 'ko', 2)
+
+
+def test_slim_movie_results_keeps_listed_fields():
+    slim = slim_movie_results([{'id': 1, 'title': '기생충', 'popularity': 9.9, 'adult': False}])
+    assert slim == [{'id': 1, 'title': '기생충', 'overview': None, 'release_date': None, 'poster_path': None}]
+
+
+def test_results_expire_after_ttl(clock):
+    cache = SearchCache(ttl=60, negative_ttl=5, max_entries=10, path='')
+    cache.put('k', ['결과'], None, 0.5)
+    clock.now += 59
+    assert cache.get('k') == (['결과'], None)
+    clock.now += 1
+    assert cache.get('k') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    assert cache.stats()['saved_seconds'] == 0.5
+
+
+def test_errors_use_negative_ttl(clock):
+    cache = SearchCache(ttl=60, negative_ttl=5, max_entries=10, path='')
+    cache.put('k', [], '검색 서버 오류', 0.1)
+    clock.now += 4
+    assert cache.get('k') == ([], '검색 서버 오류')
+    assert cache.stats()['negative_hits'] == 1
+    clock.now += 1
+    assert cache.get('k') is None # 실패 결과는 짧게만 보관
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = SearchCache(ttl=60, negative_ttl=5, max_entries=2, path='')
+    cache.put('a', [1], None, 0)
+    cache.put('b', [2], None, 0)
+    assert cache.get('a') == ([1], None) # a를 최근에 씀
+    cache.put('c', [3], None, 0)
+    assert cache.get('b') is None
+    assert cache.get('a') == ([1], None) and cache.get('c') == ([3], None)
+    assert cache.stats()['entries'] == 2
+
+
+def test_disk_cache_survives_restart(clock, tmp_path):
+    path = str(tmp_path / 'search.db')
+    cache = SearchCache(ttl=60, negative_ttl=5, max_entries=2, path=path)
+    cache.put(('movie', '기생충', 'ko'), [{'title': '기생충'}], None, 0.2)
+    cache.put(('movie', '괴물', 'ko'), [], '오류', 0.2)
+    cache.put(('movie', '마더', 'ko'), [{'title': '마더'}], None, 0.2) # 기생충은 밀려나 디스크에서도 지워짐
+    clock.now += 10 # 실패 결과는 만료
+
+    restarted = SearchCache(ttl=60, negative_ttl=5, max_entries=2, path=path)
+    assert restarted.get(('movie', '마더', 'ko')) == ([{'title': '마더'}], None)
+    assert restarted.get(('movie', '기생충', 'ko')) is None
+    assert restarted.get(('movie', '괴물', 'ko')) is None
+    restarted.clear()
+    assert SearchCache(path=path).stats()['entries'] == 0
+
+
+def test_get_or_fetch_fetches_each_key_once():
+    cache = SearchCache(ttl=60, negative_ttl=5, max_entries=10, path='')
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5) # 다른 스레드들이 기다리는 동안 붙잡아 둠
+        return ['결과'], None
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch('k', fetch))) for _ in range(8)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == [(['결과'], None)] * 8
+    assert cache.get_or_fetch('k', lambda: pytest.fail("캐시에 있으면 다시 가져오지 않음")) == (['결과'], None)
+
+
+def test_waiter_fetches_itself_when_leader_fails():
+    cache = SearchCache(ttl=60, negative_ttl=5, max_entries=10, path='')
+    started, release = threading.Event(), threading.Event()
+
+    def failing_fetch():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("연결 끊김")
+
+    errors = []
+
+    def leader():
+        try:
+            cache.get_or_fetch('k', failing_fetch)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait(5)
+    waiter_result = []
+    waiter = threading.Thread(target=lambda: waiter_result.append(cache.get_or_fetch('k', lambda: (['다시'], None))))
+    waiter.start()
+    release.set()
+    thread.join(5)
+    waiter.join(5)
+    assert len(errors) == 1
+    assert waiter_result == [(['다시'], None)]
+
+
+def test_prefetch_runs_in_background_and_is_shared():
+    cache = SearchCache(ttl=60, negative_ttl=5, max_entries=10, path='')
+    key = normalize_key('movie', '기생충', 'ko', page=2)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ['2쪽'], None
+
+    cache.prefetch(key, fetch) # 기다리지 않고 바로 돌아옴
+    cache.prefetch(key, fetch) # 가져오는 중이면 다시 걸지 않음
+    assert cache.get(key) is None
+    release.set()
+    assert cache.get_or_fetch(key, fetch) == (['2쪽'], None) # 미리 가져오던 결과를 기다려 씀
+    cache.prefetch(key, fetch) # 이미 캐시에 있으면 가져오지 않음
+    assert len(calls) == 1
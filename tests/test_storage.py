@@ -0,0 +1,109 @@
+import pytest
+
+from data_cache import file_identity, get_cache
+from room_snapshots import build_snapshot
+from storage import JsonStorage, SqliteStorage, compute_etag
+
+
+def _record(record_id, title='제목', **fields):
+    return {'id': record_id, 'type': '영화', 'title': title, 'rating': 3,
+            'recorded_date': '2024-01-01 00:00:00', **fields}
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'json':
+        return JsonStorage(data_dir=str(tmp_path))
+    return SqliteStorage(str(tmp_path / 'records.db'))
+
+
+@pytest.fixture
+def records(storage):
+    records = [_record(str(i), f'제목{i}') for i in range(10)]
+    storage.append_user_records('u', records)
+    return records
+
+
+def _ids(records):
+    return [record['id'] for record in records]
+
+
+def _reload(storage, username='u'):
+    get_cache().clear() # 캐시를 비우고 파일/DB에서 다시 읽음
+    return storage.load_user_records(username)
+
+
+def test_get_user_record(storage, records):
+    assert storage.get_user_record('u', '3') == records[3]
+    assert storage.get_user_record('u', 'missing') is None
+    assert storage.get_user_record('nobody', '3') is None
+
+
+def test_update_keeps_order_and_skips_missing_ids(storage, records):
+    assert storage.update_user_records('u', [_record('4', '고친 제목'), _record('missing')]) == 1
+    loaded = storage.load_user_records('u')
+    assert _ids(loaded) == _ids(records)
+    assert loaded[4]['title'] == '고친 제목'
+    assert storage.get_user_record('u', '4')['title'] == '고친 제목'
+    assert _reload(storage) == loaded
+    assert storage.update_user_records('u', [_record('missing')]) == 0
+
+
+def test_delete_removes_records(storage, records):
+    assert storage.delete_user_records('u', ['2', '7', 'missing', '2']) == 2
+    expected = [r for r in records if r['id'] not in ('2', '7')]
+    assert storage.load_user_records('u') == expected
+    assert storage.get_user_record('u', '7') is None
+    assert storage.get_user_record('u', '8') == records[8]
+    assert _reload(storage) == expected
+    assert storage.delete_user_records('u', ['2']) == 0
+
+
+def test_json_positions_are_patched_and_spliced(tmp_path):
+    storage = JsonStorage(data_dir=str(tmp_path))
+    records = [_record(str(i)) for i in range(200)]
+    storage.append_user_records('u', records)
+    log = storage._record_log('u')
+    assert storage.get_user_record('u', '150') == records[150] # 위치 색인을 만듦
+
+    storage.update_user_records('u', [_record('150', '고침')])
+    positions = get_cache().get(log.path + '#positions', file_identity(log.path))
+    assert positions is not None and positions['150'] == 150 # 고친 뒤에도 다시 만들지 않고 그대로 씀
+    assert storage.load_user_records('u')[150]['title'] == '고침'
+
+    storage.delete_user_records('u', ['0', '99', '199'])
+    loaded = storage.load_user_records('u')
+    assert len(loaded) == 197
+    assert _ids(loaded) == [str(i) for i in range(200) if i not in (0, 99, 199)]
+    assert storage.get_user_record('u', '150')['title'] == '고침' # 지운 뒤 위치 색인은 새로 만듦
+    assert loaded[storage._record_positions(log, loaded)['150']]['id'] == '150'
+    assert _reload(storage) == loaded
+
+
+def test_delete_unshares_records_from_rooms(storage, records):
+    room = {'room_name': '방', 'creator_username': 'u', 'room_password': '',
+            'shared_record_ids': ['1', '3', '5'], 'created_at': ''}
+    other = dict(room, shared_record_ids=['5'])
+    for room_id, data in (('R', room), ('S', other)):
+        storage.add_sharing_room(room_id, data)
+        storage.save_room_snapshot(room_id, build_snapshot(room_id, data, records))
+    rooms_before = file_identity(storage.rooms_file) if isinstance(storage, JsonStorage) else None
+
+    assert storage.delete_user_records('u', ['3', '5']) == 2
+
+    snapshot = storage.get_room_snapshot('R')
+    assert _ids(snapshot['records']) == ['1']
+    assert snapshot['etag'] == compute_etag(snapshot['records'])
+    assert storage.get_room_snapshot('S')['records'] == []
+    assert storage.room_ids_for_records(['3']) == set()
+    assert storage.room_ids_for_records(['5']) == set()
+    assert storage.room_ids_for_records(['1']) == {'R'}
+    # 스냅샷을 다시 만들어도 지운 기록은 나오지 않음
+    rebuilt = build_snapshot('R', storage.get_sharing_room('R'), storage.load_user_records('u'))
+    assert rebuilt['etag'] == snapshot['etag']
+    if isinstance(storage, JsonStorage):
+        assert file_identity(storage.rooms_file) == rooms_before # 모든 공유방이 든 파일은 다시 쓰지 않음
+    else:
+        assert storage.get_sharing_room('R')['shared_record_ids'] == ['1']
+        rows = storage._conn().execute("SELECT COUNT(*) FROM room_records WHERE record_id IN ('3', '5')").fetchone()
+        assert rows[0] == 0
@@ -0,0 +1,73 @@
+import pytest
+
+from title_index import TitleIndex, normalize
+
+
+def _record(title, creator='', record_type='영화'):
+    return {'type': record_type, 'title': title, 'director_author': creator}
+
+
+@pytest.fixture
+def index():
+    index = TitleIndex(max_entries=1000)
+    index._build_started = True # 테스트에서는 모든 사용자의 기록으로 색인을 만들지 않음
+    return index
+
+
+def _texts(suggestions):
+    return [s['text'] for s in suggestions]
+
+
+def test_normalize():
+    assert normalize(' 반지의  제왕 ') == normalize('반지의제왕') == '반지의제왕'
+    assert normalize('The Matrix') == 'thematrix'
+
+
+def test_prefix_ignores_spaces_and_case(index):
+    index.add_records([_record('반지의 제왕', '피터 잭슨'), _record('The Matrix', '워쇼스키'), _record('반지', '')])
+    assert _texts(index.suggest('반지의제')) == ['반지의 제왕']
+    assert _texts(index.suggest('the m')) == ['The Matrix']
+    assert index.suggest('반지의')[0]['creator'] == '피터 잭슨'
+    assert index.suggest('  ') == []
+    assert index.suggest('없는') == []
+
+
+def test_records_rank_above_search_results(index):
+    index.add_search_results('영화', [('기생충 다큐', ''), ('기생충 2', '')])
+    index.add_records([_record('기생충', '봉준호')])
+    assert _texts(index.suggest('기생')) == ['기생충', '기생충 2', '기생충 다큐'] # 같은 횟수면 짧은 것부터
+    index.add_records([_record('기생충 다큐')])
+    assert _texts(index.suggest('기생', limit=2)) == ['기생충 다큐', '기생충'] # 검색 1 + 기록 3으로 가장 많이 쓰임
+
+
+def test_field_and_type_filters(index):
+    index.add_records([_record('봉준호 특집', '봉준호'), _record('봉순이', '권정생', record_type='책')])
+    assert _texts(index.suggest('봉', field='director_author')) == ['봉준호']
+    assert _texts(index.suggest('봉', record_type='책')) == ['봉순이']
+    index.add_records([_record('다른 영화', '봉준호, 한진원')])
+    assert _texts(index.suggest('한진', field='director_author')) == ['한진원'] # 쉼표로 나눈 이름마다 색인
+
+
+def test_memo_is_cleared_when_index_changes(index):
+    index.add_records([_record('해리 포터')])
+    first = index.suggest('해리')
+    assert index.suggest('해리') is first # 바뀌지 않았으면 같은 결과를 재사용
+    index.add_records([_record('해리 포터'), _record('해리 포터'), _record('해리')])
+    assert _texts(index.suggest('해리')) == ['해리 포터', '해리']
+
+
+def test_bulk_insert_keeps_keys_sorted(index):
+    index.add_search_results('책', [(f'책 {i:03d}', '') for i in range(100, 0, -1)])
+    assert index._keys == sorted(index._keys)
+    assert _texts(index.suggest('책05', limit=3)) == ['책 050', '책 051', '책 052']
+
+
+def test_least_used_entries_are_evicted(index):
+    index.max_entries = 10
+    index.add_records([_record(f'자주 {i}') for i in range(5)] * 3)
+    index.add_search_results('영화', [(f'가끔 {i}', '') for i in range(6)]) # 11개가 되어 2개를 버림 (한도의 90%까지)
+    stats = index.stats()
+    assert stats['entries'] == 9 and stats['evictions'] == 2
+    assert len(index._keys) == 9
+    assert len(index.suggest('자주', limit=10)) == 5 # 많이 쓰인 항목은 남음
+    assert len(index.suggest('가끔', limit=10)) == 4
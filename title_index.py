@@ -0,0 +1,169 @@
+"""직접 기록하기 폼의 제목/감독·저자 자동 완성을 위한 공용 접두사 색인입니다.
+
+- 모든 사용자가 기록한 제목과 감독/저자, 온라인 검색에서 받아 온 영화/책 제목과 저자를 모읍니다.
+- 정렬된 키 리스트에서 bisect로 접두사 범위를 찾으므로 항목 수가 많아도 몇 마이크로초 안에 끝납니다.
+  키는 공백을 모두 빼고 대소문자를 무시한 글자라서 '반지의제왕'으로도 '반지의 제왕'을 찾습니다.
+- 처음 suggest()를 부를 때 백그라운드 스레드에서 모든 사용자의 기록으로 색인을 만듭니다. (만드는 동안에는 있는 만큼만 제안)
+  그 뒤에는 기록을 저장하거나 검색 결과를 받을 때 add_records()/add_search_results()로 그 항목만 더합니다.
+- 제안 결과는 색인이 바뀔 때까지 SUGGEST_MEMO_SIZE개까지 기억해 두므로 같은 접두사를 다시 물으면 바로 돌려줍니다.
+- 항목이 SUGGEST_MAX_ENTRIES개를 넘으면 적게 쓰인(기록/검색된 횟수가 적고 오래 제안되지 않은) 항목부터
+  EVICT_FRACTION만큼 한꺼번에 버립니다.
+"""
+import bisect
+import heapq
+import os
+import threading
+import time
+
+from storage import get_storage
+
+SUGGEST_MAX_ENTRIES = int(os.environ.get('RECORD_APP_SUGGEST_MAX_ENTRIES', '50000'))
+EVICT_FRACTION = 0.1 # 한도를 넘으면 이 비율만큼 버려서 매번 정리하지 않도록 함
+RECORD_WEIGHT = 3 # 누군가 기록한 제목은 검색 결과로만 본 제목보다 먼저 제안
+SEARCH_WEIGHT = 1
+MAX_SCAN = 500 # 접두사가 짧아 후보가 너무 많으면 앞에서부터 이만큼만 보고 고름
+SUGGEST_MEMO_SIZE = 1024 # 같은 접두사를 다시 물으면(화면 다시 그리기 등) 색인이 바뀌지 않은 동안 결과를 재사용
+
+
+def normalize(text):
+    """공백을 모두 빼고 대소문자를 무시한 색인 키 글자를 만듭니다."""
+    return ''.join((text or '').split()).casefold()
+
+
+class TitleIndex:
+    """제목/감독·저자 접두사 색인입니다. 모든 메서드는 여러 스레드에서 불러도 됩니다."""
+
+    def __init__(self, max_entries=SUGGEST_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._keys = [] # 정렬된 '정규화한 글자\0필드\0종류' 리스트
+        self._entries = {} # 키 -> [표시할 글자, 필드, 종류, 사용 횟수, 마지막 사용 시각, 함께 기록된 감독/저자]
+        self._memo = {} # (접두사, 필드, 종류, 개수) -> 제안 결과 (색인이 바뀌면 비움)
+        self._build_started = False
+        self.ready = False # 처음 색인 만들기가 끝났는지
+        self.evictions = 0
+
+    def _add(self, new_keys, text, field, record_type, weight, now, creator=''):
+        """항목을 더하거나 사용 횟수를 늘립니다. 새 키는 new_keys에 모았다가 _insert_keys()로 한 번에 넣습니다."""
+        text = ' '.join((text or '').split())
+        normalized = normalize(text)
+        if not normalized:
+            return
+        key = f"{normalized}\0{field}\0{record_type or ''}"
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = [text, field, record_type or '', weight, now, creator]
+            new_keys.append(key)
+        else:
+            entry[3] += weight
+            entry[4] = now
+            if creator:
+                entry[5] = creator
+
+    def _add_work(self, new_keys, record_type, title, creator, weight, now):
+        creator = (creator or '').strip()
+        self._add(new_keys, title, 'title', record_type, weight, now, creator)
+        for name in creator.split(','):
+            self._add(new_keys, name, 'director_author', record_type, weight, now)
+
+    def _insert_keys(self, new_keys):
+        self._memo.clear() # 사용 횟수만 바뀌어도 순위가 바뀔 수 있음
+        if len(new_keys) < 16:
+            for key in new_keys:
+                bisect.insort(self._keys, key)
+        elif new_keys:
+            self._keys += new_keys
+            self._keys.sort() # 이미 정렬된 앞부분과 새 키를 합치므로 전체 정렬보다 빠름
+        self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        if len(self._entries) <= self.max_entries:
+            return
+        count = len(self._entries) - int(self.max_entries * (1 - EVICT_FRACTION))
+        victims = set(heapq.nsmallest(count, self._entries, key=lambda key: (self._entries[key][3], self._entries[key][4])))
+        for key in victims:
+            del self._entries[key]
+        self._keys = [key for key in self._keys if key not in victims]
+        self.evictions += len(victims)
+
+    def add_records(self, records):
+        """저장한 기록들의 제목과 감독/저자를 색인에 더합니다."""
+        now = time.time()
+        new_keys = []
+        with self._lock:
+            for record in records:
+                self._add_work(new_keys, record.get('type'), record.get('title'), record.get('director_author'),
+                               RECORD_WEIGHT, now)
+            self._insert_keys(new_keys)
+
+    def add_search_results(self, record_type, works):
+        """온라인 검색에서 받은 (제목, 감독/저자) 목록을 색인에 더합니다."""
+        now = time.time()
+        new_keys = []
+        with self._lock:
+            for title, creator in works:
+                self._add_work(new_keys, record_type, title, creator, SEARCH_WEIGHT, now)
+            self._insert_keys(new_keys)
+
+    def suggest(self, prefix, field='title', record_type=None, limit=8):
+        """prefix로 시작하는 항목을 많이 쓰인 순서로 최대 limit개 반환합니다.
+
+        [{'text', 'type', 'creator'}, ...] 형태이고, creator는 제목과 함께 기록된 감독/저자입니다. (없으면 '')
+        돌려준 리스트는 다른 호출과 함께 쓰므로 고치지 마세요.
+        """
+        self.ensure_built()
+        normalized = normalize(prefix)
+        if not normalized:
+            return []
+        memo_key = (normalized, field, record_type, limit)
+        with self._lock:
+            suggestions = self._memo.get(memo_key)
+            if suggestions is not None:
+                return suggestions
+            start = bisect.bisect_left(self._keys, normalized)
+            end = min(bisect.bisect_left(self._keys, normalized + '\U0010ffff', start), start + MAX_SCAN)
+            candidates = [
+                entry for entry in map(self._entries.__getitem__, self._keys[start:end])
+                if entry[1] == field and (record_type is None or entry[2] == record_type)
+            ]
+            best = heapq.nsmallest(limit, candidates, key=lambda entry: (-entry[3], len(entry[0])))
+            now = time.time()
+            for entry in best:
+                entry[4] = now # 제안된 항목은 최근에 쓰인 것으로 봄
+            suggestions = [{'text': entry[0], 'type': entry[2], 'creator': entry[5]} for entry in best]
+            if len(self._memo) >= SUGGEST_MEMO_SIZE:
+                self._memo.clear()
+            self._memo[memo_key] = suggestions
+            return suggestions
+
+    def ensure_built(self):
+        """처음 한 번만 백그라운드에서 모든 사용자의 기록으로 색인을 만듭니다."""
+        with self._lock:
+            if self._build_started:
+                return
+            self._build_started = True
+        threading.Thread(target=self._build, name='title-index-build', daemon=True).start()
+
+    def _build(self):
+        storage = get_storage()
+        for username in list(storage.load_users()):
+            self.add_records(storage.load_user_records(username)) # 사용자 단위로 잠가서 그 사이 제안도 가능
+        self.ready = True
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'evictions': self.evictions}
+
+
+_title_index = None
+_title_index_lock = threading.Lock()
+
+
+def get_title_index():
+    """프로세스 전체에서 공유하는 제목 색인을 반환합니다."""
+    global _title_index
+    if _title_index is None:
+        with _title_index_lock:
+            if _title_index is None:
+                _title_index = TitleIndex()
+    return _title_index